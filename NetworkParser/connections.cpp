@@ -28,10 +28,20 @@ ConnectionsChromosomeParseResult ParseConnectionsChromosome(const char* Filepath
 		return result;
 	}
 
+	//the rest of the chromosome is parsed from the stream already open
+	result = ParseConnectionsChromosomeBody(chromosomeFile);
+	chromosomeFile.close();
+	return result;
+}
+
+//parses the remainder of a connections chromosome from a stream positioned just past its magic,
+//so that a caller which has already identified the chromosome needn't reopen it
+ConnectionsChromosomeParseResult ParseConnectionsChromosomeBody(std::ifstream& ChromosomeFile) {
+	ConnectionsChromosomeParseResult result = { };
+
 	//stream successfully opened, first 4 bytes are the quadrant connections count
-	chromosomeFile.read((char*)&result.QuadrantConnectionsCount, 4);
-	if (chromosomeFile.gcount() != 4) {
-		chromosomeFile.close();
+	ChromosomeFile.read((char*)&result.QuadrantConnectionsCount, 4);
+	if (ChromosomeFile.gcount() != 4) {
 		result.ReturnCode = CONNECTIONS_CHROMOSOME_SHORT;
 		return result;
 	}
@@ -39,10 +49,9 @@ ConnectionsChromosomeParseResult ParseConnectionsChromosome(const char* Filepath
 	//attempt to read the quadrant connections from disk into the newly created array
 	result.QuadrantConnectionsArray = new QuadrantConnections[result.QuadrantConnectionsCount];
 	for (uint32_t i = 0; i < result.QuadrantConnectionsCount; i++) {
-		int status = ParseQuadrantConnections(chromosomeFile, result.QuadrantConnectionsArray + i);
+		int status = ParseQuadrantConnections(ChromosomeFile, result.QuadrantConnectionsArray + i);
 
 		if (status != CONNECTIONS_GENE_SUCCESS) {
-			chromosomeFile.close();
 			result.AdditionalInfo = i;
 			result.ReturnCode = CONNECTIONS_CHROMOSOME_QUADRANT_SHORT;
 			return result;
@@ -50,7 +59,6 @@ ConnectionsChromosomeParseResult ParseConnectionsChromosome(const char* Filepath
 	}
 
 
-	chromosomeFile.close();
 	result.ReturnCode = CONNECTIONS_CHROMOSOME_SUCCESS;
 	return result;
 }
@@ -36,6 +36,8 @@ struct ConnectionsChromosomeParseResult {
 DLL_EXPORT ConnectionsChromosomeParseResult ParseConnectionsChromosome(const char* Filepath);
 DLL_EXPORT void FreeConnectionsParseResult(ConnectionsChromosomeParseResult Result);
 
+ConnectionsChromosomeParseResult ParseConnectionsChromosomeBody(std::ifstream& ChromosomeFile);
+
 
 #define CONNECTIONS_CHROMOSOME_QUADRANT_SHORT		3
 
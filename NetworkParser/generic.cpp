@@ -15,7 +15,7 @@ GenericChromosomeParseResult ParseGenericChromosome(const char* Filepath) {
 	}
 
 	//read the first 4 bytes as a string
-	char *buf = new char[4];
+	char buf[4];
 	chromosomeFile.read(buf, 4);
 	if (chromosomeFile.gcount() != 4) {
 		chromosomeFile.close();
@@ -23,23 +23,24 @@ GenericChromosomeParseResult ParseGenericChromosome(const char* Filepath) {
 		return result;
 	}
 
-	//parse the chromosome based on the determined type
-	chromosomeFile.close();
+	//parse the chromosome based on the determined type, carrying on from the same stream
+	//rather than reopening the file and reading the magic a second time
 	if (strncmp(buf, "SUBN", 4) == 0) {
-		result.ParseResult.SCPR = ParseSubnetworkChromosome(Filepath);
+		result.ParseResult.SCPR = ParseSubnetworkChromosomeBody(chromosomeFile);
 		result.ReturnCode = GENERIC_PARSE_SUBNETWORKS;
 	}
 	else if (strncmp(buf, "QUAD", 4) == 0) {
-		result.ParseResult.QCPR = ParseQuadrantChromosome(Filepath);
+		result.ParseResult.QCPR = ParseQuadrantChromosomeBody(chromosomeFile);
 		result.ReturnCode = GENERIC_PARSE_QUADRANTS;
 	}
 	else if (strncmp(buf, "CONN", 4) == 0) {
-		result.ParseResult.CCPR = ParseConnectionsChromosome(Filepath);
+		result.ParseResult.CCPR = ParseConnectionsChromosomeBody(chromosomeFile);
 		result.ReturnCode = GENERIC_PARSE_CONNECTIONS;
 	}
 	else {
 		result.ReturnCode = GENERIC_PARSE_UNRECOGNISED;
 	}
 
+	chromosomeFile.close();
 	return result;
 }
\ No newline at end of file
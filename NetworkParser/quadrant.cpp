@@ -28,19 +28,28 @@ QuadrantChromosomeParseResult ParseQuadrantChromosome(const char* Filepath) {
 		return result;
 	}
 
+	//the rest of the chromosome is parsed from the stream already open
+	result = ParseQuadrantChromosomeBody(chromosomeFile);
+	chromosomeFile.close();
+	return result;
+}
+
+//parses the remainder of a quadrants chromosome from a stream positioned just past its magic,
+//so that a caller which has already identified the chromosome needn't reopen it
+QuadrantChromosomeParseResult ParseQuadrantChromosomeBody(std::ifstream& ChromosomeFile) {
+	QuadrantChromosomeParseResult result = { };
+
 	//stream successfully opened, first 4 bytes are the quadrant count
-	chromosomeFile.read((char*)&result.QuadrantCount, 4);
-	if (chromosomeFile.gcount() != 4) {
-		chromosomeFile.close();
+	ChromosomeFile.read((char*)&result.QuadrantCount, 4);
+	if (ChromosomeFile.gcount() != 4) {
 		result.ReturnCode = QUADRANT_CHROMOSOME_FILE_SHORT;
 		return result;
 	}
 
 	//next 4 bytes are the subnetworks per quadrant
 	//seems redundant, but necessary so that a chromosome is intelligible on its own
-	chromosomeFile.read((char*)&result.SubnetworksPerQuadrant, 4);
-	if (chromosomeFile.gcount() != 4) {
-		chromosomeFile.close();
+	ChromosomeFile.read((char*)&result.SubnetworksPerQuadrant, 4);
+	if (ChromosomeFile.gcount() != 4) {
 		result.ReturnCode = QUADRANT_CHROMOSOME_FILE_SHORT;
 		return result;
 	}
@@ -49,9 +58,8 @@ QuadrantChromosomeParseResult ParseQuadrantChromosome(const char* Filepath) {
 	//set of quadrants into memory, then section it out into a 2D array from there
 	uint32_t nIndices = result.SubnetworksPerQuadrant* result.QuadrantCount;
 	uint32_t* subnetworkIndices = new uint32_t[nIndices];
-	chromosomeFile.read((char*)subnetworkIndices, nIndices * sizeof(uint32_t));
-	if (chromosomeFile.gcount() != nIndices * sizeof(uint32_t)) {
-		chromosomeFile.close();
+	ChromosomeFile.read((char*)subnetworkIndices, nIndices * sizeof(uint32_t));
+	if (ChromosomeFile.gcount() != nIndices * sizeof(uint32_t)) {
 		result.ReturnCode = QUADRANT_CHROMOSOME_MISSING_QUADRANTS;
 		return result;
 	}
@@ -62,7 +70,6 @@ QuadrantChromosomeParseResult ParseQuadrantChromosome(const char* Filepath) {
 		result.SubnetworkIndices[i] = subnetworkIndices + (i * result.SubnetworksPerQuadrant);
 	}
 
-	chromosomeFile.close();
 	result.ReturnCode = QUADRANT_CHROMOSOME_SUCCESS;
 	return result;
 }
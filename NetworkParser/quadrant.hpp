@@ -21,4 +21,6 @@ struct QuadrantChromosomeParseResult {
 };
 
 DLL_EXPORT QuadrantChromosomeParseResult ParseQuadrantChromosome(const char* Filepath);
-DLL_EXPORT void FreeQuadrantParseResult(QuadrantChromosomeParseResult Result);
\ No newline at end of file
+DLL_EXPORT void FreeQuadrantParseResult(QuadrantChromosomeParseResult Result);
+
+QuadrantChromosomeParseResult ParseQuadrantChromosomeBody(std::ifstream& ChromosomeFile);
\ No newline at end of file
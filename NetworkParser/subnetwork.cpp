@@ -30,11 +30,21 @@ SubnetworkChromosomeParseResult ParseSubnetworkChromosome(const char* Filepath)
 		return result;
 	}
 
+	//the rest of the chromosome is parsed from the stream already open
+	result = ParseSubnetworkChromosomeBody(chromosomeFile);
+	chromosomeFile.close();
+	return result;
+}
+
+//parses the remainder of a subnetworks chromosome from a stream positioned just past its magic,
+//so that a caller which has already identified the chromosome needn't reopen it
+SubnetworkChromosomeParseResult ParseSubnetworkChromosomeBody(std::ifstream& ChromosomeFile) {
+	SubnetworkChromosomeParseResult result = { };
+
 	//stream successfully opened, first 4 bytes are the subnetwork gene count,
 	//i.e. how many times we try to read an individual gene
-	chromosomeFile.read((char*)&result.GeneCount, 4);
-	if (chromosomeFile.gcount() != 4) {
-		chromosomeFile.close();
+	ChromosomeFile.read((char*)&result.GeneCount, 4);
+	if (ChromosomeFile.gcount() != 4) {
 		result.ReturnCode = SUBNETWORK_CHROMOSOME_FILE_SHORT;
 		result.AdditionalInfo = -1;
 		return result;
@@ -44,21 +54,19 @@ SubnetworkChromosomeParseResult ParseSubnetworkChromosome(const char* Filepath)
 	//iterate through each gene until the end of the genome
 	result.Genes = new SubnetworkGene[result.GeneCount];
 	for (uint32_t i = 0; i < result.GeneCount; i++) {
-		int status = ParseSubnetworkGene(chromosomeFile, result.Genes + i);
+		int status = ParseSubnetworkGene(ChromosomeFile, result.Genes + i);
 
 		switch (status) {
 		case SUBNETWORK_GENE_SUCCESS:
 			continue;
 
 		case SUBNETWORK_GENE_EOF:
-			chromosomeFile.close();
 			result.ReturnCode = SUBNETWORK_CHROMOSOME_MISSING_GENES;
 			result.AdditionalInfo = i;
 			return result;
 
 		case SUBNETWORK_GENE_SHORT:
 		case SUBNETWORK_GENE_MISSING_CONNECTIONS:
-			chromosomeFile.close();
 			result.ReturnCode = SUBNETWORK_CHROMOSOME_BAD_GENE;
 			result.AdditionalInfo = i;
 			return result;
@@ -66,7 +74,6 @@ SubnetworkChromosomeParseResult ParseSubnetworkChromosome(const char* Filepath)
 	}
 
 	//successful chromosome parse
-	chromosomeFile.close();
 	result.ReturnCode = SUBNETWORK_CHROMOSOME_SUCCESS;
 	result.AdditionalInfo = -1;
 	return result;
@@ -42,6 +42,8 @@ struct SubnetworkChromosomeParseResult {
 DLL_EXPORT SubnetworkChromosomeParseResult ParseSubnetworkChromosome(const char* Filepath);
 DLL_EXPORT void FreeSubnetworkParseResult(SubnetworkChromosomeParseResult Result);
 
+SubnetworkChromosomeParseResult ParseSubnetworkChromosomeBody(std::ifstream& ChromosomeFile);
+
 
 #define SUBNETWORK_GENE_SUCCESS					0
 #define SUBNETWORK_GENE_SHORT					1
@@ -1,6 +1,56 @@
-from .networkparser import \
-    SubnetworkChromosomeParseResult, \
-    QuadrantChromosomeParseResult, \
-    ConnectionsChromosomeParseResult, \
-    GenericChromosomeParseResult, \
-    NetworkGenome
\ No newline at end of file
+from .networkparser import SubnetworkChromosomeParseResult, QuadrantChromosomeParseResult, ConnectionsChromosomeParseResult, GenericChromosomeParseResult, NetworkGenome, SOURCE_TYPE_INPUT, SOURCE_TYPE_HIDDEN, TARGET_TYPE_HIDDEN, TARGET_TYPE_OUTPUT
+from .backends import set_backend, get_backend, register_backend
+from . import metrics
+
+#everything else is imported on first access, so that importing the package doesn't pull in
+#numpy or the parser backend until they are used
+_LAZY_EXPORTS = {
+    "ColumnarGenome": "columnar",
+    "load_population": "population",
+    "iter_subnetwork_genes": "streaming",
+    "iter_quadrant_connections": "streaming",
+    "write_gene_index": "geneindex",
+    "get_gene": "geneindex",
+    "get_nth_gene": "geneindex",
+    "get_quadrant_connections": "geneindex",
+    "find_quadrant_connections": "geneindex",
+    "ParseCache": "parsecache",
+    "write_chromosome": "chromosomewriter",
+    "CompiledNetwork": "compiled",
+    "CSRMatrix": "compiled",
+    "ConnectionAdjacency": "adjacency",
+    "GenomeArchive": "archive",
+    "ValidationReport": "validation",
+    "validate_population": "validation",
+    "load_many_async": "asyncloader",
+    "iter_genomes_async": "asyncloader",
+    "GeneStore": "genestore",
+    "GenomeDelta": "delta",
+    "load_child": "delta",
+    "scan_directory": "scan",
+    "PopulationStatistics": "populationstats",
+    "population_statistics": "populationstats",
+}
+
+
+__all__ = [
+    "SubnetworkChromosomeParseResult", "QuadrantChromosomeParseResult", "ConnectionsChromosomeParseResult",
+    "GenericChromosomeParseResult", "NetworkGenome",
+    "SOURCE_TYPE_INPUT", "SOURCE_TYPE_HIDDEN", "TARGET_TYPE_HIDDEN", "TARGET_TYPE_OUTPUT",
+    "set_backend", "get_backend", "register_backend", "metrics",
+] + list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+
+    value = getattr(importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
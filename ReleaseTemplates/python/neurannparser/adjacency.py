@@ -0,0 +1,184 @@
+import numpy as np
+
+from .chromosomewriter import connections_arrays_from_blocks
+from .columnar import decode_connections
+
+
+#subnetwork endpoints are keyed as subnetwork * 256 + port, since ports are a single byte
+_PORTS = 256
+
+
+def _group(keys):
+    #sorts edge ids by key, keeping file order within each key, and returns the distinct keys
+    #with the range of sorted edges belonging to each
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+    starts = np.concatenate(([0], boundaries)).astype(np.int64)
+    ends = np.concatenate((boundaries, [len(keys)])).astype(np.int64)
+    return order, sorted_keys[starts] if len(keys) else sorted_keys, starts, ends
+
+
+def _group_blocks(block_keys, gene_offsets):
+    #as _group, for keys shared by every edge of a block. only the blocks are sorted, each then
+    #contributing its whole run of edges
+    block_order, keys, block_starts, block_ends = _group(block_keys)
+    counts = np.diff(gene_offsets)[block_order]
+    sorted_starts = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=sorted_starts[1:])
+
+    order = np.arange(sorted_starts[-1], dtype=np.int64) + \
+        np.repeat(gene_offsets[:-1][block_order] - sorted_starts[:-1], counts)
+    return order, keys, sorted_starts[block_starts], sorted_starts[block_ends]
+
+
+#edge lookups over a connections chromosome. every connection gene is an edge, numbered by its
+#position across all QuadrantConnections blocks in file order, and the edge columns
+#(weight, source_subnetwork_index, ...) are indexed by that number.
+#
+#edges are grouped by source endpoint, by target endpoint and by quadrant pair. each group is
+#a contiguous run of a sorted edge list, so a lookup is a binary search followed by a slice,
+#costing O(log groups + degree). lookups return edge numbers in file order
+class ConnectionAdjacency:
+    def __init__(self, source_quadrant_indices, target_quadrant_indices, gene_offsets, weight,
+                 source_subnetwork_index, source_output_index, target_subnetwork_index, target_input_index):
+        self.source_quadrant_indices = np.asarray(source_quadrant_indices)
+        self.target_quadrant_indices = np.asarray(target_quadrant_indices)
+        self.gene_offsets = np.asarray(gene_offsets, dtype=np.int64)
+        self.weight = np.asarray(weight)
+        self.source_subnetwork_index = np.asarray(source_subnetwork_index)
+        self.source_output_index = np.asarray(source_output_index)
+        self.target_subnetwork_index = np.asarray(target_subnetwork_index)
+        self.target_input_index = np.asarray(target_input_index)
+
+        #the block of each edge, and from it the quadrants each edge joins
+        self.edge_block = np.repeat(np.arange(len(self.source_quadrant_indices), dtype=np.int64), np.diff(self.gene_offsets))
+        self.edge_source_quadrant = self.source_quadrant_indices[self.edge_block]
+        self.edge_target_quadrant = self.target_quadrant_indices[self.edge_block]
+
+        self._by_source = _group(self.source_subnetwork_index.astype(np.int64) * _PORTS + self.source_output_index)
+        self._by_target = _group(self.target_subnetwork_index.astype(np.int64) * _PORTS + self.target_input_index)
+        self._by_quadrant_pair = _group_blocks(
+            (self.source_quadrant_indices.astype(np.uint64) << np.uint64(32)) | self.target_quadrant_indices.astype(np.uint64),
+            self.gene_offsets)
+        self._by_source_quadrant = _group_blocks(self.source_quadrant_indices, self.gene_offsets)
+        self._by_target_quadrant = _group_blocks(self.target_quadrant_indices, self.gene_offsets)
+
+    def __len__(self):
+        return len(self.weight)
+
+    @staticmethod
+    def _lookup(group, low, high=None):
+        #edges whose key is low, or in [low, high) when high is given. a range can span several
+        #groups, whose edges are put back into file order
+        order, keys, starts, ends = group
+        if high is None:
+            first = np.searchsorted(keys, low, side="left")
+            last = np.searchsorted(keys, low, side="right")
+        else:
+            first = np.searchsorted(keys, low, side="left")
+            last = np.searchsorted(keys, high, side="left")
+
+        if first >= last:
+            return np.empty(0, dtype=np.int64)
+        edge_ids = order[starts[first]:ends[last - 1]]
+        return np.sort(edge_ids) if last - first > 1 else edge_ids
+
+    #-----LOOKUPS-----
+    #with the port left out, every edge of the subnetwork is returned
+    def fan_out(self, source_subnetwork_index, source_output_index=None):
+        key = source_subnetwork_index * _PORTS
+        if source_output_index is None:
+            return ConnectionAdjacency._lookup(self._by_source, key, key + _PORTS)
+        return ConnectionAdjacency._lookup(self._by_source, key + source_output_index)
+
+    def fan_in(self, target_subnetwork_index, target_input_index=None):
+        key = target_subnetwork_index * _PORTS
+        if target_input_index is None:
+            return ConnectionAdjacency._lookup(self._by_target, key, key + _PORTS)
+        return ConnectionAdjacency._lookup(self._by_target, key + target_input_index)
+
+    def between_quadrants(self, source_quadrant_index, target_quadrant_index):
+        return ConnectionAdjacency._lookup(
+            self._by_quadrant_pair, (source_quadrant_index << 32) | target_quadrant_index)
+
+    def leaving_quadrant(self, source_quadrant_index):
+        return ConnectionAdjacency._lookup(self._by_source_quadrant, source_quadrant_index)
+
+    def entering_quadrant(self, target_quadrant_index):
+        return ConnectionAdjacency._lookup(self._by_target_quadrant, target_quadrant_index)
+
+    #-----DEGREES-----
+    #number of edges on every distinct endpoint, as (subnetwork indices, ports, degrees)
+    def out_degrees(self):
+        _, keys, starts, ends = self._by_source
+        return keys // _PORTS, keys % _PORTS, ends - starts
+
+    def in_degrees(self):
+        _, keys, starts, ends = self._by_target
+        return keys // _PORTS, keys % _PORTS, ends - starts
+
+    def edges(self, edge_ids):
+        #the columns of the given edges, as a dict of arrays
+        return {
+            "weight": self.weight[edge_ids],
+            "source_quadrant_index": self.edge_source_quadrant[edge_ids],
+            "target_quadrant_index": self.edge_target_quadrant[edge_ids],
+            "source_subnetwork_index": self.source_subnetwork_index[edge_ids],
+            "source_output_index": self.source_output_index[edge_ids],
+            "target_subnetwork_index": self.target_subnetwork_index[edge_ids],
+            "target_input_index": self.target_input_index[edge_ids],
+        }
+
+    def __str__(self):
+        return f"""ConnectionAdjacency:
+\tEdge count = {len(self)}
+\tSource endpoints = {len(self._by_source[1])}
+\tTarget endpoints = {len(self._by_target[1])}
+\tQuadrant pairs = {len(self._by_quadrant_pair[1])}"""
+
+    #-----CONSTRUCTION-----
+    @staticmethod
+    def _from_records(source_quadrant_indices, target_quadrant_indices, gene_offsets, connection_genes):
+        return ConnectionAdjacency(
+            source_quadrant_indices,
+            target_quadrant_indices,
+            gene_offsets,
+            connection_genes["Weight"],
+            connection_genes["SourceSubnetworkIndex"],
+            connection_genes["SourceOutputIndex"],
+            connection_genes["TargetSubnetworkIndex"],
+            connection_genes["TargetInputIndex"]
+        )
+
+    @staticmethod
+    def from_arrays(connections_arrays):
+        return ConnectionAdjacency._from_records(
+            connections_arrays.source_quadrant_indices,
+            connections_arrays.target_quadrant_indices,
+            connections_arrays.gene_offsets,
+            connections_arrays.connection_genes
+        )
+
+    @staticmethod
+    def from_file(path):
+        #decodes the chromosome straight into arrays, without building any python objects
+        return ConnectionAdjacency.from_arrays(decode_connections(path))
+
+    @staticmethod
+    def from_result(connections_result):
+        return ConnectionAdjacency._from_records(
+            *connections_arrays_from_blocks(connections_result.quadrant_connections_array))
+
+    @staticmethod
+    def from_columns(columns):
+        return ConnectionAdjacency(
+            columns.source_quadrant_index,
+            columns.target_quadrant_index,
+            columns.connection_offsets,
+            columns.connection_weight,
+            columns.source_subnetwork_index,
+            columns.source_output_index,
+            columns.target_subnetwork_index,
+            columns.target_input_index
+        )
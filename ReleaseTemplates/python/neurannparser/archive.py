@@ -0,0 +1,287 @@
+import json
+import lzma
+import mmap
+import os
+import pathlib
+import struct
+import zlib
+
+import numpy as np
+
+from .chromosomewriter import \
+    GENOME_CHROMOSOME_FILES, \
+    encode_genome, \
+    encode_columnar_genome
+from .columnar import \
+    ColumnarGenome, \
+    decode_subnetwork_buffer, \
+    decode_quadrant_buffer, \
+    decode_connections_buffer
+from .networkparser import NetworkGenome, logger
+
+
+#-----ARCHIVE LAYOUT-----
+#header, padded to the alignment
+#   "GARC", u32 version, u32 genome count, u32 alignment,
+#   u64 directory offset, u64 directory size, u64 names offset, u64 names size
+#sections, each starting on an alignment boundary
+#   the subnetworks, quadrants and connections chromosome of every genome in turn, each stored
+#   exactly as its .chr file or compressed as a whole
+#directory
+#   one DIRECTORY_DTYPE record per genome
+#names
+#   a JSON list with one name per genome
+ARCHIVE_MAGIC = b"GARC"
+ARCHIVE_VERSION = 1
+
+_HEADER = struct.Struct("<4sIIIQQQQ")
+
+SECTION_COUNT = len(GENOME_CHROMOSOME_FILES)
+SUBNETWORKS_SECTION = 0
+QUADRANTS_SECTION = 1
+CONNECTIONS_SECTION = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZMA = 2
+
+_COMPRESSION_CODES = {
+    None: COMPRESSION_NONE,
+    "zlib": COMPRESSION_ZLIB,
+    "lzma": COMPRESSION_LZMA
+}
+
+DIRECTORY_DTYPE = np.dtype([
+    ("Offset", "<u8", (SECTION_COUNT,)),
+    ("StoredSize", "<u8", (SECTION_COUNT,)),
+    ("Size", "<u8", (SECTION_COUNT,)),
+    ("Compression", "u1", (SECTION_COUNT,))
+])
+
+
+def _compress(data, compression, level):
+    if compression == COMPRESSION_ZLIB:
+        return zlib.compress(data, 6 if level is None else level)
+    return lzma.compress(data, preset=level)
+
+
+def _decompress(data, compression):
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(data)
+    return lzma.decompress(data)
+
+
+def _chromosomes(genome):
+    #the (subnetworks, quadrants, connections) bytes of any genome the archive accepts.
+    #genome directories are copied as they are, without being parsed
+    if isinstance(genome, NetworkGenome):
+        return encode_genome(genome)
+    if isinstance(genome, ColumnarGenome):
+        return encode_columnar_genome(genome)
+    if isinstance(genome, tuple):
+        return genome
+
+    path = pathlib.Path(genome)
+    chromosomes = []
+    for name in GENOME_CHROMOSOME_FILES:
+        with open(path.joinpath(name), "rb") as chromosome_file:
+            chromosomes.append(chromosome_file.read())
+    return tuple(chromosomes)
+
+
+def _name(genome, i):
+    if isinstance(genome, (str, os.PathLike)):
+        return os.fspath(genome)
+    if isinstance(genome, NetworkGenome):
+        return os.fspath(genome.path)
+    return str(i)
+
+
+#many genomes packed into one file, so a whole population costs a single open.
+#every genome's chromosomes are stored as sections listed in a directory table, and any one
+#genome can be decoded without touching the rest. the archive is mapped rather than read,
+#so only the sections actually used are paged in
+class GenomeArchive:
+    class ArchiveFormatException(Exception):
+        pass
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as archive_file:
+            try:
+                self._mapping = mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise GenomeArchive.ArchiveFormatException(f"\"{path}\" is empty")
+
+        if len(self._mapping) < _HEADER.size:
+            self.close()
+            raise GenomeArchive.ArchiveFormatException(f"\"{path}\" is too short to be a genome archive")
+        magic, version, genome_count, self.alignment, directory_offset, directory_size, names_offset, names_size = \
+            _HEADER.unpack_from(self._mapping)
+        if magic != ARCHIVE_MAGIC:
+            self.close()
+            raise GenomeArchive.ArchiveFormatException(f"\"{path}\" is not a genome archive")
+        if version != ARCHIVE_VERSION:
+            self.close()
+            raise GenomeArchive.ArchiveFormatException(f"\"{path}\" is archive version {version}, expected {ARCHIVE_VERSION}")
+        if directory_size != genome_count * DIRECTORY_DTYPE.itemsize or \
+                directory_offset + directory_size > len(self._mapping) or names_offset + names_size > len(self._mapping):
+            self.close()
+            raise GenomeArchive.ArchiveFormatException(f"\"{path}\" has a truncated directory")
+
+        #copied out, so that the mapping can be closed while the directory is still referenced
+        self.directory = np.frombuffer(self._mapping, dtype=DIRECTORY_DTYPE, count=genome_count, offset=directory_offset).copy()
+        self.names = json.loads(bytes(self._mapping[names_offset:names_offset + names_size]).decode("utf-8"))
+        self._positions = {name: i for i, name in reversed(list(enumerate(self.names)))}
+        logger.debug("Opened genome archive \"%s\": %s genomes", path, genome_count)
+
+    @staticmethod
+    def open(path):
+        return GenomeArchive(path)
+
+    #writes every genome to a new archive at path, returning the path. genomes can be genome
+    #directories, NetworkGenome or ColumnarGenome objects, or (subnetworks, quadrants,
+    #connections) tuples of chromosome bytes, and are consumed one at a time.
+    #compression is None, "zlib" or "lzma", and is applied per section wherever it saves space.
+    #names default to each genome's path, or its position in the archive
+    @staticmethod
+    def write(path, genomes, compression=None, level=None, alignment=mmap.PAGESIZE, names=None):
+        if compression not in _COMPRESSION_CODES:
+            raise ValueError(f"Unknown compression \"{compression}\", expected None, \"zlib\" or \"lzma\"")
+        compression = _COMPRESSION_CODES[compression]
+        alignment = max(int(alignment), 1)
+        names = None if names is None else list(names)
+
+        records = []
+        archive_names = []
+        with open(path, "wb") as archive_file:
+            position = 0
+
+            def pad():
+                nonlocal position
+                padding = -position % alignment
+                archive_file.write(b"\0" * padding)
+                position += padding
+
+            #the header is rewritten once the directory's position is known
+            archive_file.write(b"\0" * _HEADER.size)
+            position = _HEADER.size
+            pad()
+
+            for i, genome in enumerate(genomes):
+                record = np.zeros((), dtype=DIRECTORY_DTYPE)
+                for section, data in enumerate(_chromosomes(genome)):
+                    stored = data
+                    record["Compression"][section] = COMPRESSION_NONE
+                    if compression != COMPRESSION_NONE:
+                        compressed = _compress(data, compression, level)
+                        if len(compressed) < len(data):
+                            stored = compressed
+                            record["Compression"][section] = compression
+
+                    record["Offset"][section] = position
+                    record["StoredSize"][section] = len(stored)
+                    record["Size"][section] = len(data)
+                    archive_file.write(stored)
+                    position += len(stored)
+                    pad()
+
+                records.append(record)
+                archive_names.append(names[i] if names is not None else _name(genome, i))
+
+            directory = np.array(records, dtype=DIRECTORY_DTYPE)
+            directory_offset = position
+            archive_file.write(directory.tobytes())
+            position += directory.nbytes
+
+            names_data = json.dumps(archive_names).encode("utf-8")
+            archive_file.write(names_data)
+
+            archive_file.seek(0)
+            archive_file.write(_HEADER.pack(
+                ARCHIVE_MAGIC, ARCHIVE_VERSION, len(records), alignment,
+                directory_offset, directory.nbytes, position, len(names_data)))
+
+        logger.debug("Wrote genome archive \"%s\": %s genomes", path, len(records))
+        return path
+
+    def __len__(self):
+        return len(self.directory)
+
+    def __getitem__(self, key):
+        return self.genome(key)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.genome(i)
+
+    def index_of(self, name):
+        #position of the first genome with the given name, raising KeyError if there is none
+        return self._positions[name]
+
+    def _position(self, key):
+        return self.index_of(key) if isinstance(key, str) else range(len(self))[key]
+
+    #-----ACCESS-----
+    def chromosome(self, key, section):
+        #the bytes of one chromosome, exactly as its .chr file. uncompressed sections are
+        #returned as a view into the mapping
+        record = self.directory[self._position(key)]
+        start = int(record["Offset"][section])
+        end = start + int(record["StoredSize"][section])
+        compression = int(record["Compression"][section])
+
+        if compression == COMPRESSION_NONE:
+            return memoryview(self._mapping)[start:end]
+        return _decompress(self._mapping[start:end], compression)
+
+    def arrays(self, key):
+        #the decoded (subnetworks, quadrants, connections) arrays of a genome, raising the same
+        #ChromosomeParseException as NetworkGenome for a corrupt chromosome
+        position = self._position(key)
+        subnetwork_arrays = decode_subnetwork_buffer(self.chromosome(position, SUBNETWORKS_SECTION))
+        quadrant_arrays = decode_quadrant_buffer(self.chromosome(position, QUADRANTS_SECTION))
+        connections_arrays = decode_connections_buffer(self.chromosome(position, CONNECTIONS_SECTION))
+
+        #the quadrant table is decoded as a view, and is copied so it doesn't pin the mapping
+        quadrant_arrays = quadrant_arrays._replace(subnetwork_indices=quadrant_arrays.subnetwork_indices.copy())
+        return subnetwork_arrays, quadrant_arrays, connections_arrays
+
+    def columns(self, key):
+        return ColumnarGenome.from_arrays(*self.arrays(key))
+
+    def genome(self, key):
+        position = self._position(key)
+        subnetwork_arrays, quadrant_arrays, connections_arrays = self.arrays(position)
+        path = f"{self.path}[{self.names[position]}]"
+        return NetworkGenome.from_arrays(path, subnetwork_arrays, quadrant_arrays, connections_arrays)
+
+    def extract(self, key, path):
+        #writes a genome back out as a directory of chromosome files
+        path = pathlib.Path(path)
+        os.makedirs(path, exist_ok=True)
+        position = self._position(key)
+        for section, name in enumerate(GENOME_CHROMOSOME_FILES):
+            with open(path.joinpath(name), "wb") as chromosome_file:
+                chromosome_file.write(self.chromosome(position, section))
+
+    def close(self):
+        #raises BufferError if any chromosome views are still alive
+        if self._mapping is not None:
+            self._mapping.close()
+        self._mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __str__(self):
+        stored = int(np.sum(self.directory["StoredSize"]))
+        size = int(np.sum(self.directory["Size"]))
+        return f"""GenomeArchive:
+\tPath = {self.path}
+\tGenome count = {len(self)}
+\tChromosome bytes = {size}
+\tStored bytes = {stored}"""
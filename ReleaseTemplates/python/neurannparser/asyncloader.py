@@ -0,0 +1,92 @@
+import asyncio
+
+from .networkparser import NetworkGenome, logger
+
+
+#the NetworkGenome attribute that triggers each chromosome's parse
+_CHROMOSOME_ATTRIBUTES = ("subnetwork_genes", "quadrant_definitions", "quadrant_connections")
+
+DEFAULT_CONCURRENCY = 8
+
+
+async def _gather_or_cancel(awaitables):
+    #gathers awaitables, cancelling whatever is left of them if any one fails or the caller is
+    #cancelled, so that no work is left running on behalf of an abandoned load
+    futures = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*futures)
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        await asyncio.gather(*futures, return_exceptions=True)
+        raise
+
+
+#parses a genome off the event loop, each chromosome on its own executor thread, and returns the
+#fully loaded NetworkGenome. executor defaults to the loop's default executor.
+#a parse that has already started can't be interrupted; on cancellation its result is dropped
+#and the chromosomes not yet started are never parsed
+async def load_genome_async(path, cache=None, executor=None):
+    loop = asyncio.get_running_loop()
+    genome = NetworkGenome(path, cache=cache, lazy=True)
+    await _gather_or_cancel(
+        loop.run_in_executor(executor, getattr, genome, attribute) for attribute in _CHROMOSOME_ATTRIBUTES)
+    return genome
+
+
+#loads every genome directory in paths with at most concurrency genomes in flight, returning
+#one entry per path in input order. as with population.load_population, genomes that fail to
+#parse are returned as their ChromosomeParseException
+async def load_many_async(paths, concurrency=DEFAULT_CONCURRENCY, cache=None, executor=None):
+    paths = list(paths)
+    results = [None] * len(paths)
+    positions = iter(range(len(paths)))
+
+    #a fixed set of workers share the queue of paths, so a large genome only ever holds up
+    #its own worker and the paths waiting behind it go to the others
+    async def worker():
+        for i in positions:
+            try:
+                results[i] = await load_genome_async(paths[i], cache, executor)
+            except NetworkGenome.ChromosomeParseException as e:
+                results[i] = e
+
+    logger.debug("Loading %s genomes asynchronously, %s at a time", len(paths), concurrency)
+    await _gather_or_cancel(worker() for _ in range(min(max(int(concurrency), 1), len(paths))))
+
+    failures = sum(isinstance(result, NetworkGenome.ChromosomeParseException) for result in results)
+    if failures:
+        logger.error(f"{failures} of {len(paths)} genomes failed to load")
+    return results
+
+
+#yields (path, genome) pairs in the order they finish, keeping at most concurrency genomes in
+#flight. no more genomes are started than the consumer has room for, so a slow consumer holds
+#back the loading instead of letting finished genomes pile up in memory
+async def iter_genomes_async(paths, concurrency=DEFAULT_CONCURRENCY, cache=None, executor=None):
+    async def load(path):
+        try:
+            return path, await load_genome_async(path, cache, executor)
+        except NetworkGenome.ChromosomeParseException as e:
+            return path, e
+
+    paths = iter(paths)
+    pending = set()
+    try:
+        for path in paths:
+            pending.add(asyncio.ensure_future(load(path)))
+            if len(pending) >= max(int(concurrency), 1):
+                break
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                path = next(paths, None)
+                if path is not None:
+                    pending.add(asyncio.ensure_future(load(path)))
+    finally:
+        for future in pending:
+            future.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
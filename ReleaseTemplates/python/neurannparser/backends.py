@@ -0,0 +1,137 @@
+import os
+import threading
+
+from collections import namedtuple
+
+
+#the parser backends. nothing is loaded on import: the backend is chosen and loaded the first
+#time a chromosome is parsed, from, in order of precedence
+#   a set_backend() call
+#   the environment variable NEURANNPARSER_BACKEND
+#   "auto", which is the native library where it loads and numpy otherwise
+BACKEND_ENVIRONMENT_VARIABLE = "NEURANNPARSER_BACKEND"
+AUTO = "auto"
+
+LIBRARY_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "NetworkParser.dll")
+
+#the functions every backend provides, mirroring the NetworkParser.dll exports. parse functions
+#take an ASCII encoded path and return a C_ result structure, or a numpyparser record with the
+#same field names
+Backend = namedtuple("Backend", [
+    "name",
+    "parse_subnetwork_chromosome", "free_subnetwork_parse_result",
+    "parse_quadrant_chromosome", "free_quadrant_parse_result",
+    "parse_connections_chromosome", "free_connections_parse_result",
+    "parse_generic_chromosome"
+])
+
+_lock = threading.Lock()
+_factories = {}
+_selected = None
+_backend = None
+
+
+def _load_dll():
+    import ctypes
+
+    from . import networkparser
+
+    networkparser.logger.info("Loading library file")
+    library = ctypes.cdll.LoadLibrary(LIBRARY_PATH)
+    networkparser.logger.info("Library file loaded.")
+
+    def prototype(function, restype, argtypes):
+        function.restype = restype
+        function.argtypes = argtypes
+        return function
+
+    return Backend(
+        "dll",
+        prototype(library.ParseSubnetworkChromosome, networkparser.C_SubnetworkChromosomeParseResult, [ctypes.c_char_p]),
+        prototype(library.FreeSubnetworkParseResult, None, [networkparser.C_SubnetworkChromosomeParseResult]),
+        prototype(library.ParseQuadrantChromosome, networkparser.C_QuadrantChromosomeParseResult, [ctypes.c_char_p]),
+        prototype(library.FreeQuadrantParseResult, None, [networkparser.C_QuadrantChromosomeParseResult]),
+        prototype(library.ParseConnectionsChromosome, networkparser.C_ConnectionsChromosomeParseResult, [ctypes.c_char_p]),
+        prototype(library.FreeConnectionsParseResult, None, [networkparser.C_ConnectionsChromosomeParseResult]),
+        prototype(library.ParseGenericChromosome, networkparser.C_GenericChromosomeParseResult, [ctypes.c_char_p])
+    )
+
+
+def _load_numpy():
+    from . import numpyparser
+
+    return Backend(
+        "numpy",
+        numpyparser.parse_subnetwork_chromosome, numpyparser.free_parse_result,
+        numpyparser.parse_quadrant_chromosome, numpyparser.free_parse_result,
+        numpyparser.parse_connections_chromosome, numpyparser.free_parse_result,
+        numpyparser.parse_generic_chromosome
+    )
+
+
+def _load_auto():
+    from .networkparser import logger
+
+    try:
+        return _load_dll()
+    except OSError:
+        logger.info("Library file unavailable, falling back to numpy backend.")
+        return _load_numpy()
+
+
+#registers a backend under name. factory is called with no arguments the first time the backend
+#is used, and returns a Backend
+def register_backend(name, factory):
+    with _lock:
+        _factories[name] = factory
+
+
+def available_backends():
+    return [AUTO] + sorted(_factories)
+
+
+#selects the backend used from the next parse on, by registered name or as a Backend itself.
+#None goes back to the environment variable or "auto"
+def set_backend(backend):
+    global _selected, _backend
+    if isinstance(backend, str) and backend != AUTO and backend not in _factories:
+        raise ValueError(f"Unknown backend \"{backend}\", expected one of {available_backends()}")
+    with _lock:
+        _selected = backend
+        _backend = None
+
+
+def get_backend():
+    #the current Backend, loading it if this is the first use
+    backend = _backend
+    if backend is not None:
+        return backend
+    return _load()
+
+
+def _load():
+    global _backend
+    with _lock:
+        if _backend is not None:
+            return _backend
+
+        selected = _selected
+        if selected is None:
+            selected = os.environ.get(BACKEND_ENVIRONMENT_VARIABLE, AUTO) or AUTO
+        if isinstance(selected, Backend):
+            _backend = selected
+        elif selected == AUTO:
+            _backend = _load_auto()
+        elif selected in _factories:
+            _backend = _factories[selected]()
+        else:
+            raise ValueError(f"Unknown backend \"{selected}\", expected one of {available_backends()}")
+        return _backend
+
+
+def backend_name():
+    return get_backend().name
+
+
+register_backend("dll", _load_dll)
+register_backend("numpy", _load_numpy)
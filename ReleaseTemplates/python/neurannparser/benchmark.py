@@ -0,0 +1,355 @@
+#parser benchmarks over synthetic genomes. run with
+#   python -m neurannparser.benchmark --codons 1000 100000 10000000 --output results.json
+#and pass --compare with an earlier results file to see how a change moved each case.
+#--startup-only measures just what a fresh process pays to import the package and load its backend.
+#every case runs in a fresh process, so that peak memory belongs to that case alone
+import argparse
+import concurrent.futures
+import json
+import logging
+import multiprocessing
+import os
+import pathlib
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from . import backends, synthetic
+from .networkparser import \
+    SubnetworkChromosomeParseResult, \
+    QuadrantChromosomeParseResult, \
+    ConnectionsChromosomeParseResult, \
+    GenericChromosomeParseResult, \
+    NetworkGenome
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+DEFAULT_CODONS = (1000, 100000, 1000000)
+DEFAULT_REPEATS = 3
+
+#shape of the generated genomes. codon totals set the size of everything else
+_CODONS_PER_GENE = 100
+_CONNECTIONS_PER_PAIR = 100
+_QUADRANT_COUNT = 64
+_SUBNETWORKS_PER_QUADRANT = 8
+
+
+
+#-----GENOMES-----
+def genome_shape(codons):
+    codons_per_gene = min(codons, _CODONS_PER_GENE)
+    return {
+        "gene_count": max(1, codons // max(codons_per_gene, 1)),
+        "codons_per_gene": codons_per_gene,
+        "quadrant_count": _QUADRANT_COUNT,
+        "subnetworks_per_quadrant": _SUBNETWORKS_PER_QUADRANT,
+        "quadrant_pairs": max(1, codons // 10000),
+        "connections_per_pair": _CONNECTIONS_PER_PAIR,
+    }
+
+
+def prepare_genomes(directory, codons):
+    #generates a valid genome of the given size, plus copies with each error case, reusing
+    #anything already generated in directory
+    genome_path = pathlib.Path(directory).joinpath(f"genome-{codons}")
+    if not genome_path.joinpath("connections.chr").exists():
+        synthetic.generate_genome(genome_path, **genome_shape(codons))
+
+    shape = genome_shape(codons)
+    corrupted = {
+        "bad_gene": ("subnetworks.chr", shape["gene_count"] // 2),
+        "quadrant_short": ("connections.chr", shape["quadrant_pairs"] // 2),
+    }
+    for corruption, (chromosome, position) in corrupted.items():
+        corrupted_path = pathlib.Path(directory).joinpath(f"genome-{codons}-{corruption}.chr")
+        if not corrupted_path.exists():
+            shutil.copyfile(genome_path.joinpath(chromosome), corrupted_path)
+            synthetic.corrupt_chromosome(corrupted_path, corruption, position)
+    return genome_path
+
+
+
+#-----CASES-----
+#each case is (result class, chromosome file, which count to report throughput in). the error
+#cases have nothing to count. NetworkGenome cases parse the whole directory
+def _cases(directory, codons):
+    genome_path = pathlib.Path(directory).joinpath(f"genome-{codons}")
+    return {
+        "subnetworks": (SubnetworkChromosomeParseResult, genome_path.joinpath("subnetworks.chr"), "codons"),
+        "quadrants": (QuadrantChromosomeParseResult, genome_path.joinpath("quadrants.chr"), "quadrant_entries"),
+        "connections": (ConnectionsChromosomeParseResult, genome_path.joinpath("connections.chr"), "connection_genes"),
+        "generic_subnetworks": (GenericChromosomeParseResult, genome_path.joinpath("subnetworks.chr"), "codons"),
+        "generic_connections": (GenericChromosomeParseResult, genome_path.joinpath("connections.chr"), "connection_genes"),
+        "network_genome": (NetworkGenome, genome_path, "codons"),
+        "subnetworks_bad_gene": (
+            SubnetworkChromosomeParseResult, pathlib.Path(directory).joinpath(f"genome-{codons}-bad_gene.chr"), None),
+        "connections_quadrant_short": (
+            ConnectionsChromosomeParseResult, pathlib.Path(directory).joinpath(f"genome-{codons}-quadrant_short.chr"), None),
+    }
+
+
+#the raw parse, without building any python objects, for splitting decode from construction.
+#names are Backend fields
+_RAW_PARSERS = {
+    SubnetworkChromosomeParseResult: ("parse_subnetwork_chromosome", "free_subnetwork_parse_result"),
+    QuadrantChromosomeParseResult: ("parse_quadrant_chromosome", "free_quadrant_parse_result"),
+    ConnectionsChromosomeParseResult: ("parse_connections_chromosome", "free_connections_parse_result"),
+}
+
+
+def _item_count(result, unit):
+    #failed parses have nothing to count
+    if isinstance(result, NetworkGenome):
+        return sum(len(gene.codons) for gene in result.subnetwork_genes)
+    if isinstance(result, GenericChromosomeParseResult):
+        result = result.parse_result
+    if result is None or result.return_code.value != 0:
+        return 0
+    if unit == "codons":
+        return sum(len(gene.codons) for gene in result.genes)
+    if unit == "quadrant_entries":
+        return len(result.quadrants) * result.subnetworks_per_quadrant
+    return sum(len(block.connection_genes) for block in result.quadrant_connections_array)
+
+
+def _time(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+        #dropped outside the timed region, so teardown isn't counted as parsing
+        del result
+    return timings
+
+
+def _max_rss():
+    #ru_maxrss is in KiB on linux and bytes on macOS
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def _measure(case, result_class, path, unit, repeats):
+    #runs in a fresh process. errors are expected from the corrupted cases, so they aren't logged
+    logging.getLogger("NetworkParser").setLevel(logging.CRITICAL)
+
+    if result_class is NetworkGenome:
+        parse = lambda: NetworkGenome(path)
+    else:
+        parse = lambda: result_class.from_file(path)
+
+    #the first parse gives the item count and the peak memory of a single parse. the peak is
+    #measured with tracemalloc on every platform, covering python objects and numpy arrays but
+    #not allocations made inside NetworkParser.dll. ru_maxrss, where available, is only reported
+    #as how far the process's high-water mark grew, which is 0 for any parse smaller than the
+    #imports that came before it
+    rss_before = _max_rss() if resource is not None else None
+    tracemalloc.start()
+    result = parse()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    rss_growth = _max_rss() - rss_before if resource is not None else None
+
+    return_code = getattr(result, "return_code", None)
+    items = _item_count(result, unit)
+    del result
+
+    timings = _time(parse, repeats)
+    best = min(timings)
+    file_size = sum(f.stat().st_size for f in pathlib.Path(path).glob("*.chr")) if result_class is NetworkGenome \
+        else os.path.getsize(path)
+
+    measurement = {
+        "case": case,
+        "path": os.fspath(path),
+        "file_bytes": file_size,
+        "unit": unit,
+        "items": items,
+        "return_code": str(return_code) if return_code is not None else None,
+        "best_seconds": best,
+        "median_seconds": statistics.median(timings),
+        "megabytes_per_second": file_size / best / 1e6 if best > 0 else None,
+        "items_per_second": items / best if best > 0 and items else None,
+        "peak_memory_bytes": peak_memory,
+        "peak_memory_source": "tracemalloc",
+        "peak_rss_growth_bytes": rss_growth,
+        "decode_seconds": None,
+        "construct_seconds": None,
+    }
+
+    #the raw parse returns the C structs (or numpy records) the results are built from.
+    #the rest of from_file is python object construction
+    if result_class in _RAW_PARSERS:
+        parse_name, free_name = _RAW_PARSERS[result_class]
+        backend = backends.get_backend()
+        raw_parse = getattr(backend, parse_name)
+        free = getattr(backend, free_name)
+        encoded_path = bytes(os.fspath(path), "ASCII")
+        decode = min(_time(lambda: free(raw_parse(encoded_path)), repeats))
+        measurement["decode_seconds"] = decode
+        measurement["construct_seconds"] = max(best - decode, 0.0)
+
+    return measurement
+
+
+
+#-----STARTUP-----
+#what a fresh interpreter pays before its first parse: the package import, then loading the
+#backend. each repeat is a new process, since a second import in one process is free
+_STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import neurannparser
+imported = time.perf_counter()
+modules_on_import = set(sys.modules)
+from neurannparser import backends
+backend = backends.get_backend()
+loaded = time.perf_counter()
+print(json.dumps({
+    "backend": backend.name,
+    "import_seconds": imported - start,
+    "backend_seconds": loaded - imported,
+    "numpy_on_import": "numpy" in modules_on_import,
+}))
+"""
+
+
+def measure_startup(repeats=DEFAULT_REPEATS, backend=None):
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(
+        [os.fspath(pathlib.Path(__file__).resolve().parent.parent)] +
+        ([environment["PYTHONPATH"]] if environment.get("PYTHONPATH") else []))
+    if backend is not None:
+        environment[backends.BACKEND_ENVIRONMENT_VARIABLE] = backend
+
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT], env=environment,
+                                check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output))
+
+    return {
+        "backend": runs[0]["backend"],
+        "best_import_seconds": min(run["import_seconds"] for run in runs),
+        "median_import_seconds": statistics.median(run["import_seconds"] for run in runs),
+        "best_backend_seconds": min(run["backend_seconds"] for run in runs),
+        "median_backend_seconds": statistics.median(run["backend_seconds"] for run in runs),
+        "numpy_on_import": any(run["numpy_on_import"] for run in runs),
+    }
+
+
+def _format_startup(startup, previous=None):
+    line = f"{'startup':>12} {startup['backend']:<28} import {startup['best_import_seconds'] * 1000:.2f} ms" \
+        f"  backend load {startup['best_backend_seconds'] * 1000:.2f} ms"
+    if startup["numpy_on_import"]:
+        line += "  (numpy imported with the package)"
+    if previous is not None and startup["best_import_seconds"] > 0:
+        line += f"  ({previous['best_import_seconds'] / startup['best_import_seconds']:.2f}x import vs previous)"
+    return line
+
+
+
+#-----RUNNING-----
+def run(codons=DEFAULT_CODONS, repeats=DEFAULT_REPEATS, directory=None, cases=None, startup=True):
+    temporary_directory = None
+    if directory is None:
+        temporary_directory = tempfile.TemporaryDirectory(prefix="neurannparser-benchmark-")
+        directory = temporary_directory.name
+    os.makedirs(directory, exist_ok=True)
+
+    results = {
+        "backend": backends.backend_name(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeats": repeats,
+        "startup": None,
+        "measurements": [],
+    }
+
+    if startup:
+        results["startup"] = measure_startup(repeats)
+        print(_format_startup(results["startup"]), flush=True)
+
+    #spawned rather than forked, so no memory is inherited from this process
+    context = multiprocessing.get_context("spawn")
+    try:
+        for codon_count in codons:
+            prepare_genomes(directory, codon_count)
+            for case, (result_class, path, unit) in _cases(directory, codon_count).items():
+                if cases is not None and case not in cases:
+                    continue
+                with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as executor:
+                    measurement = executor.submit(_measure, case, result_class, path, unit, repeats).result()
+                measurement["codons"] = codon_count
+                results["measurements"].append(measurement)
+                print(_format(measurement), flush=True)
+    finally:
+        if temporary_directory is not None:
+            temporary_directory.cleanup()
+    return results
+
+
+def _format(measurement, previous=None):
+    line = f"{measurement['codons']:>12} {measurement['case']:<28} {measurement['best_seconds'] * 1000:>10.2f} ms"
+    if measurement["megabytes_per_second"] is not None:
+        line += f" {measurement['megabytes_per_second']:>9.1f} MB/s"
+    if measurement["items_per_second"] is not None:
+        line += f" {measurement['items_per_second']:>12.3g} {measurement['unit']}/s"
+    if measurement["construct_seconds"] is not None:
+        line += f"  construct {measurement['construct_seconds'] * 1000:.2f} ms"
+    line += f"  peak {measurement['peak_memory_bytes'] / 2**20:.1f} MiB"
+    if measurement.get("peak_rss_growth_bytes") is not None:
+        line += f"  peak RSS growth {measurement['peak_rss_growth_bytes'] / 2**20:.1f} MiB"
+    if previous is not None and measurement["best_seconds"] > 0:
+        line += f"  ({previous['best_seconds'] / measurement['best_seconds']:.2f}x vs previous)"
+    return line
+
+
+#prints each measurement alongside its counterpart in an earlier run. a speedup above 1x
+#means the current run was faster
+def compare(results, previous_results):
+    previous = {(m["codons"], m["case"]): m for m in previous_results["measurements"]}
+    print(f"Comparing {results['backend']} backend against {previous_results['backend']} backend")
+    if results.get("startup") is not None:
+        print(_format_startup(results["startup"], previous_results.get("startup")))
+    for measurement in results["measurements"]:
+        print(_format(measurement, previous.get((measurement["codons"], measurement["case"]))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m neurannparser.benchmark", description="Benchmark the chromosome parsers.")
+    parser.add_argument("--codons", type=int, nargs="+", default=list(DEFAULT_CODONS),
+                        help="total codon count of each generated genome")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--cases", nargs="+", default=None, help="only run the named cases")
+    parser.add_argument("--directory", default=None,
+                        help="where to generate genomes. kept between runs, so large genomes are only generated once")
+    parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="an earlier results file to compare against")
+    startup = parser.add_mutually_exclusive_group()
+    startup.add_argument("--no-startup", action="store_true", help="skip measuring import and backend load time")
+    startup.add_argument("--startup-only", action="store_true", help="only measure import and backend load time")
+    args = parser.parse_args(argv)
+
+    codons = [] if args.startup_only else args.codons
+    results = run(codons, args.repeats, args.directory, args.cases, startup=not args.no_startup)
+    if args.output is not None:
+        with open(args.output, "w") as results_file:
+            json.dump(results, results_file, indent=4)
+    if args.compare is not None:
+        with open(args.compare) as previous_file:
+            compare(results, json.load(previous_file))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import os
+import pathlib
+import struct
+
+import numpy as np
+
+from . import numpyparser
+
+
+_COUNT = struct.Struct("<I")
+
+#the files making up a genome directory, in the order genomes are encoded
+GENOME_CHROMOSOME_FILES = ("subnetworks.chr", "quadrants.chr", "connections.chr")
+
+SUBNETWORK_GENE_HEADER_DTYPE = np.dtype([
+    ("GeneIndex", "<u8"),
+    ("CodonCount", "<u4")
+])
+
+QUADRANT_CONNECTIONS_HEADER_DTYPE = np.dtype([
+    ("SourceQuadrantIndex", "<u4"),
+    ("TargetQuadrantIndex", "<u4"),
+    ("ConnectionGeneCount", "<u4")
+])
+
+
+def _offsets(counts):
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+def _records(items, dtype, attributes):
+    #packs python objects into a structured array, one column at a time
+    records = np.empty(len(items), dtype=dtype)
+    for field, attribute in zip(dtype.names, attributes):
+        records[field] = np.fromiter((getattr(item, attribute) for item in items), dtype=dtype[field], count=len(items))
+    return records
+
+
+def _interleave(headers, records, offsets):
+    #lays out each header followed by its run of records, as a single buffer.
+    #the pieces are views into the arrays, so the join is the only copy made
+    header_bytes = np.ascontiguousarray(headers).view(np.uint8)
+    record_bytes = np.ascontiguousarray(records).view(np.uint8)
+    header_size = headers.dtype.itemsize
+    record_size = records.dtype.itemsize
+
+    pieces = []
+    for i, (start, end) in enumerate(zip(offsets[:-1].tolist(), offsets[1:].tolist())):
+        pieces.append(header_bytes[i * header_size:(i + 1) * header_size])
+        pieces.append(record_bytes[start * record_size:end * record_size])
+    return b"".join(pieces)
+
+
+
+#-----ENCODING-----
+#array-level encoders, producing the exact byte layouts the parsers accept.
+#the *_genes/*_blocks variants produce just the body, for writers that emit it in batches
+def encode_subnetwork_genes(gene_indices, gene_offsets, codons):
+    headers = np.empty(len(gene_indices), dtype=SUBNETWORK_GENE_HEADER_DTYPE)
+    headers["GeneIndex"] = gene_indices
+    headers["CodonCount"] = np.diff(gene_offsets)
+    codons = np.asarray(codons, dtype=numpyparser.CODON_DTYPE)
+    return _interleave(headers, codons, np.asarray(gene_offsets))
+
+
+def encode_subnetwork_chromosome(gene_indices, gene_offsets, codons):
+    return b"".join([
+        numpyparser.SUBNETWORKS_MAGIC,
+        _COUNT.pack(len(gene_indices)),
+        encode_subnetwork_genes(gene_indices, gene_offsets, codons)
+    ])
+
+
+def encode_quadrant_chromosome(subnetwork_indices, subnetworks_per_quadrant=None):
+    subnetwork_indices = np.asarray(subnetwork_indices, dtype="<u4")
+    if subnetwork_indices.ndim == 2:
+        if subnetworks_per_quadrant is None:
+            subnetworks_per_quadrant = subnetwork_indices.shape[1]
+    elif subnetworks_per_quadrant is None:
+        #a flat or empty quadrant list has no second dimension to infer from
+        raise ValueError(
+            f"subnetworks_per_quadrant is needed for a {subnetwork_indices.ndim}-D quadrant table")
+    else:
+        subnetwork_indices = subnetwork_indices.reshape(-1 if subnetworks_per_quadrant else 0, subnetworks_per_quadrant)
+
+    return b"".join([
+        numpyparser.QUADRANTS_MAGIC,
+        _COUNT.pack(len(subnetwork_indices)),
+        _COUNT.pack(subnetworks_per_quadrant),
+        np.ascontiguousarray(subnetwork_indices).tobytes()
+    ])
+
+
+def encode_quadrant_connections_blocks(source_quadrant_indices, target_quadrant_indices, gene_offsets, connection_genes):
+    headers = np.empty(len(source_quadrant_indices), dtype=QUADRANT_CONNECTIONS_HEADER_DTYPE)
+    headers["SourceQuadrantIndex"] = source_quadrant_indices
+    headers["TargetQuadrantIndex"] = target_quadrant_indices
+    headers["ConnectionGeneCount"] = np.diff(gene_offsets)
+    connection_genes = np.asarray(connection_genes, dtype=numpyparser.CONNECTION_GENE_DTYPE)
+    return _interleave(headers, connection_genes, np.asarray(gene_offsets))
+
+
+def encode_connections_chromosome(source_quadrant_indices, target_quadrant_indices, gene_offsets, connection_genes):
+    return b"".join([
+        numpyparser.CONNECTIONS_MAGIC,
+        _COUNT.pack(len(source_quadrant_indices)),
+        encode_quadrant_connections_blocks(source_quadrant_indices, target_quadrant_indices, gene_offsets, connection_genes)
+    ])
+
+
+
+#-----OBJECT CONVERSION-----
+def subnetwork_arrays_from_genes(genes):
+    codons = [codon for gene in genes for codon in gene.codons]
+    gene_indices = np.fromiter((gene.gene_index for gene in genes), dtype=np.uint64, count=len(genes))
+    gene_offsets = _offsets([len(gene.codons) for gene in genes])
+    codons = _records(codons, numpyparser.CODON_DTYPE, ("codon_index", "source", "target", "types", "weight"))
+    return gene_indices, gene_offsets, codons
+
+
+def connections_arrays_from_blocks(quadrant_connections):
+    connection_genes = [gene for block in quadrant_connections for gene in block.connection_genes]
+    source_quadrant_indices = np.fromiter(
+        (block.source_quadrant_index for block in quadrant_connections), dtype=np.uint32, count=len(quadrant_connections))
+    target_quadrant_indices = np.fromiter(
+        (block.target_quadrant_index for block in quadrant_connections), dtype=np.uint32, count=len(quadrant_connections))
+    gene_offsets = _offsets([len(block.connection_genes) for block in quadrant_connections])
+    connection_genes = _records(connection_genes, numpyparser.CONNECTION_GENE_DTYPE, (
+        "weight", "source_subnetwork_index", "source_output_index", "target_subnetwork_index", "target_input_index"))
+    return source_quadrant_indices, target_quadrant_indices, gene_offsets, connection_genes
+
+
+
+#-----WRITING-----
+def _write(path, data):
+    #one buffered write per chromosome
+    with open(path, "wb") as chromosome_file:
+        chromosome_file.write(data)
+
+
+def write_subnetwork_chromosome(path, genes):
+    _write(path, encode_subnetwork_chromosome(*subnetwork_arrays_from_genes(genes)))
+
+
+def write_quadrant_chromosome(path, quadrants, subnetworks_per_quadrant):
+    _write(path, encode_quadrant_chromosome(quadrants, subnetworks_per_quadrant))
+
+
+def write_connections_chromosome(path, quadrant_connections):
+    _write(path, encode_connections_chromosome(*connections_arrays_from_blocks(quadrant_connections)))
+
+
+#the three chromosomes of a genome, encoded as (subnetworks, quadrants, connections) bytes
+def encode_genome(genome):
+    return (
+        encode_subnetwork_chromosome(*subnetwork_arrays_from_genes(genome.subnetwork_genes)),
+        encode_quadrant_chromosome(genome.quadrant_definitions, genome.subnetworks_per_quadrant),
+        encode_connections_chromosome(*connections_arrays_from_blocks(genome.quadrant_connections))
+    )
+
+
+def columnar_codons(columns):
+    #the codon columns of a ColumnarGenome packed back into on-disk records
+    codons = np.empty(columns.codon_count, dtype=numpyparser.CODON_DTYPE)
+    codons["CodonIndex"] = columns.codon_index
+    codons["Source"] = columns.source
+    codons["Target"] = columns.target
+    codons["Types"] = columns.types
+    codons["Weight"] = columns.weight
+    return codons
+
+
+def columnar_connection_genes(columns):
+    connection_genes = np.empty(columns.connection_count, dtype=numpyparser.CONNECTION_GENE_DTYPE)
+    connection_genes["Weight"] = columns.connection_weight
+    connection_genes["SourceSubnetworkIndex"] = columns.source_subnetwork_index
+    connection_genes["SourceOutputIndex"] = columns.source_output_index
+    connection_genes["TargetSubnetworkIndex"] = columns.target_subnetwork_index
+    connection_genes["TargetInputIndex"] = columns.target_input_index
+    return connection_genes
+
+
+def encode_columnar_genome(columns):
+    codons = columnar_codons(columns)
+    connection_genes = columnar_connection_genes(columns)
+
+    return (
+        encode_subnetwork_chromosome(columns.gene_indices, columns.gene_offsets, codons),
+        encode_quadrant_chromosome(columns.quadrant_definitions, columns.subnetworks_per_quadrant),
+        encode_connections_chromosome(
+            columns.source_quadrant_index, columns.target_quadrant_index, columns.connection_offsets, connection_genes)
+    )
+
+
+def _write_chromosomes(path, chromosomes):
+    path = pathlib.Path(path)
+    os.makedirs(path, exist_ok=True)
+    for name, data in zip(GENOME_CHROMOSOME_FILES, chromosomes):
+        _write(path.joinpath(name), data)
+
+
+def write_genome(path, genome):
+    _write_chromosomes(path, encode_genome(genome))
+
+
+def write_columnar_genome(path, columns):
+    _write_chromosomes(path, encode_columnar_genome(columns))
+
+
+#writes any of the parse results, a NetworkGenome or a ColumnarGenome. genomes are written
+#as a directory of the three chromosome files
+def write_chromosome(path, chromosome):
+    chromosome.to_file(path)
@@ -0,0 +1,286 @@
+import pathlib
+
+import numpy as np
+
+from . import numpyparser
+from .networkparser import \
+    SOURCE_TYPE_INPUT, \
+    SOURCE_TYPE_HIDDEN, \
+    TARGET_TYPE_HIDDEN, \
+    TARGET_TYPE_OUTPUT, \
+    SubnetworkChromosomeParseResult, \
+    QuadrantChromosomeParseResult, \
+    ConnectionsChromosomeParseResult, \
+    NetworkGenome
+
+
+def _segment_ids(offsets):
+    #maps every element of a flattened array back to the segment that owns it
+    return np.repeat(np.arange(len(offsets) - 1, dtype=np.int64), np.diff(offsets))
+
+
+def _column(records, field, dtype):
+    return np.ascontiguousarray(records[field], dtype=dtype)
+
+
+#struct-of-arrays form of a NetworkGenome. codons of every subnetwork gene are stored end
+#to end, with gene i owning codons[gene_offsets[i]:gene_offsets[i + 1]]. connection genes
+#are laid out the same way, grouped by their QuadrantConnections block
+class ColumnarGenome:
+    ARRAY_FIELDS = (
+        "gene_indices", "gene_offsets",
+        "codon_index", "source", "target", "types", "weight",
+        "quadrant_definitions",
+        "source_quadrant_index", "target_quadrant_index", "connection_offsets",
+        "connection_weight",
+        "source_subnetwork_index", "source_output_index",
+        "target_subnetwork_index", "target_input_index"
+    )
+
+    def __init__(self, **arrays):
+        missing = [field for field in ColumnarGenome.ARRAY_FIELDS if field not in arrays]
+        if missing:
+            raise TypeError(f"ColumnarGenome missing arrays: {missing}")
+        for field in ColumnarGenome.ARRAY_FIELDS:
+            setattr(self, field, arrays[field])
+
+        self.subnetworks_per_quadrant = int(self.quadrant_definitions.shape[1])
+
+        #precomputed so that filters never need to touch the raw bitfield
+        self.source_type = self.types & (SOURCE_TYPE_INPUT | SOURCE_TYPE_HIDDEN)
+        self.target_type = self.types & (TARGET_TYPE_HIDDEN | TARGET_TYPE_OUTPUT)
+        self.codon_gene = _segment_ids(self.gene_offsets)
+        self.connection_block = _segment_ids(self.connection_offsets)
+
+    @property
+    def gene_count(self):
+        return len(self.gene_indices)
+
+    @property
+    def codon_count(self):
+        return len(self.codon_index)
+
+    @property
+    def quadrant_count(self):
+        return len(self.quadrant_definitions)
+
+    @property
+    def quadrant_connections_count(self):
+        return len(self.source_quadrant_index)
+
+    @property
+    def connection_count(self):
+        return len(self.connection_weight)
+
+    @property
+    def codon_counts(self):
+        return np.diff(self.gene_offsets)
+
+    @property
+    def connection_gene_counts(self):
+        return np.diff(self.connection_offsets)
+
+    @property
+    def source_is_input(self):
+        return self.source_type == SOURCE_TYPE_INPUT
+
+    @property
+    def source_is_hidden(self):
+        return self.source_type == SOURCE_TYPE_HIDDEN
+
+    @property
+    def target_is_hidden(self):
+        return self.target_type == TARGET_TYPE_HIDDEN
+
+    @property
+    def target_is_output(self):
+        return self.target_type == TARGET_TYPE_OUTPUT
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in ColumnarGenome.ARRAY_FIELDS}
+
+    #-----AGGREGATIONS-----
+    #per-segment reductions, returning one value per gene (or per QuadrantConnections block)
+    def sum_per_gene(self, values):
+        return np.bincount(self.codon_gene, weights=values, minlength=self.gene_count)
+
+    def count_per_gene(self, mask):
+        return np.bincount(self.codon_gene[mask], minlength=self.gene_count)
+
+    def sum_per_block(self, values):
+        return np.bincount(self.connection_block, weights=values, minlength=self.quadrant_connections_count)
+
+    def count_per_block(self, mask):
+        return np.bincount(self.connection_block[mask], minlength=self.quadrant_connections_count)
+
+    #-----FILTERS-----
+    #each returns a new genome keeping every gene/block, but only the selected codons/connections
+    def select_codons(self, mask):
+        arrays = self.to_dict()
+        for field in ("codon_index", "source", "target", "types", "weight"):
+            arrays[field] = arrays[field][mask]
+        arrays["gene_offsets"] = np.zeros_like(self.gene_offsets)
+        np.cumsum(self.count_per_gene(mask), out=arrays["gene_offsets"][1:])
+        return ColumnarGenome(**arrays)
+
+    def select_connections(self, mask):
+        arrays = self.to_dict()
+        for field in (
+                "connection_weight",
+                "source_subnetwork_index", "source_output_index",
+                "target_subnetwork_index", "target_input_index"):
+            arrays[field] = arrays[field][mask]
+        arrays["connection_offsets"] = np.zeros_like(self.connection_offsets)
+        np.cumsum(self.count_per_block(mask), out=arrays["connection_offsets"][1:])
+        return ColumnarGenome(**arrays)
+
+    def compile(self, input_count=None, hidden_count=None, output_count=None):
+        from .compiled import compile_genome
+
+        return compile_genome(self, input_count, hidden_count, output_count)
+
+    def validate(self, input_count=None, hidden_count=None, output_count=None):
+        from .validation import validate_genome
+
+        return validate_genome(self, input_count, hidden_count, output_count)
+
+    def to_file(self, path):
+        #writes the genome as a directory of chromosome files, straight from the columns
+        from .chromosomewriter import write_columnar_genome
+
+        write_columnar_genome(path, self)
+
+    def __str__(self):
+        return f"""ColumnarGenome:
+\tGene count = {self.gene_count}
+\tCodon count = {self.codon_count}
+\tQuadrant count = {self.quadrant_count}
+\tSubnetworks per quadrant = {self.subnetworks_per_quadrant}
+\tQuadrant connections count = {self.quadrant_connections_count}
+\tConnection count = {self.connection_count}"""
+
+    #-----CONSTRUCTION-----
+    @staticmethod
+    def from_arrays(subnetwork_arrays, quadrant_arrays, connections_arrays):
+        codons = subnetwork_arrays.codons
+        connection_genes = connections_arrays.connection_genes
+        return ColumnarGenome(
+            gene_indices=subnetwork_arrays.gene_indices,
+            gene_offsets=subnetwork_arrays.gene_offsets,
+            codon_index=_column(codons, "CodonIndex", np.uint32),
+            source=_column(codons, "Source", np.uint8),
+            target=_column(codons, "Target", np.uint8),
+            types=_column(codons, "Types", np.uint8),
+            weight=_column(codons, "Weight", np.float32),
+            quadrant_definitions=np.ascontiguousarray(quadrant_arrays.subnetwork_indices, dtype=np.uint32),
+            source_quadrant_index=connections_arrays.source_quadrant_indices,
+            target_quadrant_index=connections_arrays.target_quadrant_indices,
+            connection_offsets=connections_arrays.gene_offsets,
+            connection_weight=_column(connection_genes, "Weight", np.float32),
+            source_subnetwork_index=_column(connection_genes, "SourceSubnetworkIndex", np.uint32),
+            source_output_index=_column(connection_genes, "SourceOutputIndex", np.uint8),
+            target_subnetwork_index=_column(connection_genes, "TargetSubnetworkIndex", np.uint32),
+            target_input_index=_column(connection_genes, "TargetInputIndex", np.uint8)
+        )
+
+    @staticmethod
+    def from_directory(path):
+        #decodes a genome directory straight into columns, without building any python objects
+        path = pathlib.Path(path)
+        return ColumnarGenome.from_arrays(
+            decode_subnetworks(path.joinpath("subnetworks.chr")),
+            decode_quadrants(path.joinpath("quadrants.chr")),
+            decode_connections(path.joinpath("connections.chr"))
+        )
+
+    @staticmethod
+    def from_genome(genome):
+        genes = genome.subnetwork_genes
+        codons = [codon for gene in genes for codon in gene.codons]
+        blocks = genome.quadrant_connections
+        connection_genes = [connection_gene for block in blocks for connection_gene in block.connection_genes]
+
+        gene_offsets = np.zeros(len(genes) + 1, dtype=np.int64)
+        np.cumsum([len(gene.codons) for gene in genes], out=gene_offsets[1:])
+        connection_offsets = np.zeros(len(blocks) + 1, dtype=np.int64)
+        np.cumsum([len(block.connection_genes) for block in blocks], out=connection_offsets[1:])
+
+        quadrant_definitions = np.array(genome.quadrant_definitions, dtype=np.uint32)
+        quadrant_definitions = quadrant_definitions.reshape(len(genome.quadrant_definitions), genome.subnetworks_per_quadrant)
+
+        def column(items, attribute, dtype):
+            return np.fromiter((getattr(item, attribute) for item in items), dtype=dtype, count=len(items))
+
+        return ColumnarGenome(
+            gene_indices=column(genes, "gene_index", np.uint64),
+            gene_offsets=gene_offsets,
+            codon_index=column(codons, "codon_index", np.uint32),
+            source=column(codons, "source", np.uint8),
+            target=column(codons, "target", np.uint8),
+            types=column(codons, "types", np.uint8),
+            weight=column(codons, "weight", np.float32),
+            quadrant_definitions=quadrant_definitions,
+            source_quadrant_index=column(blocks, "source_quadrant_index", np.uint32),
+            target_quadrant_index=column(blocks, "target_quadrant_index", np.uint32),
+            connection_offsets=connection_offsets,
+            connection_weight=column(connection_genes, "weight", np.float32),
+            source_subnetwork_index=column(connection_genes, "source_subnetwork_index", np.uint32),
+            source_output_index=column(connection_genes, "source_output_index", np.uint8),
+            target_subnetwork_index=column(connection_genes, "target_subnetwork_index", np.uint32),
+            target_input_index=column(connection_genes, "target_input_index", np.uint8)
+        )
+
+
+
+#array-level counterparts of NetworkGenome's chromosome parsing, raising the same exceptions.
+#the *_buffer variants decode chromosome bytes already in memory, where None stands in for a
+#file that couldn't be read
+def decode_subnetwork_buffer(buffer):
+    if buffer is None:
+        arrays = numpyparser.SubnetworkArrays(numpyparser.SUBNETWORK_CHROMOSOME_BAD_PATH, -1, 0, None, None, None)
+    else:
+        arrays = numpyparser.decode_subnetwork_chromosome(buffer)
+
+    return_code = SubnetworkChromosomeParseResult.Retcodes(arrays.return_code)
+    if return_code != SubnetworkChromosomeParseResult.Retcodes.SUCCESS:
+        exception_message = f"{return_code}: Additional info = {arrays.additional_info}"
+        raise NetworkGenome.ChromosomeParseException(exception_message, return_code, arrays.additional_info)
+    return arrays
+
+
+def decode_quadrant_buffer(buffer):
+    if buffer is None:
+        arrays = numpyparser.QuadrantArrays(numpyparser.QUADRANT_CHROMOSOME_BAD_PATH, 0, 0, None)
+    else:
+        arrays = numpyparser.decode_quadrant_chromosome(buffer)
+
+    return_code = QuadrantChromosomeParseResult.Retcodes(arrays.return_code)
+    if return_code != QuadrantChromosomeParseResult.Retcodes.SUCCESS:
+        exception_message = f"{return_code}"
+        raise NetworkGenome.ChromosomeParseException(exception_message, return_code)
+    return arrays
+
+
+def decode_connections_buffer(buffer):
+    if buffer is None:
+        arrays = numpyparser.ConnectionsArrays(numpyparser.CONNECTIONS_CHROMOSOME_BAD_PATH, -1, 0, None, None, None, None)
+    else:
+        arrays = numpyparser.decode_connections_chromosome(buffer)
+
+    return_code = ConnectionsChromosomeParseResult.Retcodes(arrays.return_code)
+    if return_code != ConnectionsChromosomeParseResult.Retcodes.SUCCESS:
+        exception_message = f"{return_code}: Additional info = {arrays.additional_info}"
+        raise NetworkGenome.ChromosomeParseException(exception_message, return_code, arrays.additional_info)
+    return arrays
+
+
+def decode_subnetworks(path):
+    return decode_subnetwork_buffer(numpyparser.read_chromosome(path))
+
+
+def decode_quadrants(path):
+    return decode_quadrant_buffer(numpyparser.read_chromosome(path))
+
+
+def decode_connections(path):
+    return decode_connections_buffer(numpyparser.read_chromosome(path))
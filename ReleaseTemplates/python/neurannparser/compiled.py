@@ -0,0 +1,248 @@
+import numpy as np
+
+from .columnar import ColumnarGenome
+from .networkparser import \
+    SOURCE_TYPE_INPUT, \
+    SOURCE_TYPE_HIDDEN, \
+    TARGET_TYPE_HIDDEN, \
+    TARGET_TYPE_OUTPUT
+
+
+#the only codon Types that place a codon in exactly one of the four layer matrices
+_VALID_TYPES = np.array([
+    SOURCE_TYPE_INPUT | TARGET_TYPE_HIDDEN,
+    SOURCE_TYPE_INPUT | TARGET_TYPE_OUTPUT,
+    SOURCE_TYPE_HIDDEN | TARGET_TYPE_HIDDEN,
+    SOURCE_TYPE_HIDDEN | TARGET_TYPE_OUTPUT
+], dtype=np.uint8)
+
+#products computed at once by CSRMatrix.dot, about a megabyte of float32
+_PRODUCTS_PER_SLICE = 1 << 18
+
+#compressed sparse row matrix, stored target-major: row r holds the weights of every edge
+#arriving at node r, with the source nodes in indices[indptr[r]:indptr[r + 1]].
+#kept minimal rather than depending on scipy, to_scipy converts where scipy is installed
+class CSRMatrix:
+    def __init__(self, data, indices, indptr, shape):
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.shape = shape
+
+        #reduceat can't produce an empty segment, so only rows with edges are reduced
+        self._nonempty_rows = np.flatnonzero(np.diff(indptr) != 0)
+        self._row_starts = indptr[:-1][self._nonempty_rows]
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    @staticmethod
+    def from_edges(targets, sources, weights, shape):
+        order = np.lexsort((sources, targets))
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(targets, minlength=shape[0]), out=indptr[1:])
+        return CSRMatrix(
+            np.ascontiguousarray(weights[order], dtype=np.float32),
+            np.ascontiguousarray(sources[order], dtype=np.int64),
+            indptr,
+            shape
+        )
+
+    def dot(self, vectors):
+        #vectors has shape (..., sources), giving (..., targets). duplicated edges add together.
+        #the batch is moved to the last axis so that every row reduces over contiguous memory,
+        #and worked through in slices small enough for the products to stay in cache
+        vectors = np.asarray(vectors, dtype=np.float32)
+        batch_shape = vectors.shape[:-1]
+        columns = np.ascontiguousarray(vectors.reshape(-1, self.shape[1]).T)
+        batch_size = columns.shape[1]
+
+        result = np.zeros((self.shape[0], batch_size), dtype=np.float32)
+        if self.nnz != 0:
+            weights = self.data[:, None]
+            slice_size = max(1, _PRODUCTS_PER_SLICE // self.nnz)
+            for start in range(0, batch_size, slice_size):
+                contributions = columns[self.indices, start:start + slice_size]
+                contributions *= weights
+                result[self._nonempty_rows, start:start + slice_size] = \
+                    np.add.reduceat(contributions, self._row_starts, axis=0)
+        return result.T.reshape(batch_shape + (self.shape[0],))
+
+    def to_dense(self):
+        dense = np.zeros(self.shape, dtype=np.float32)
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        np.add.at(dense, (rows, self.indices), self.data)
+        return dense
+
+    def to_scipy(self):
+        from scipy.sparse import csr_matrix
+
+        return csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+    def __repr__(self):
+        return f"CSRMatrix({self.shape[0]}x{self.shape[1]}, {self.nnz} edges)"
+
+
+def _lookup_genes(gene_indices, subnetwork_indices):
+    #position in the subnetwork chromosome of each GeneIndex used by a quadrant.
+    #genomes are usually numbered densely from zero, which is checked directly first
+    if np.array_equal(gene_indices, np.arange(len(gene_indices))):
+        positions = subnetwork_indices.astype(np.int64)
+        found = positions < len(gene_indices)
+    else:
+        order = np.argsort(gene_indices, kind="stable")
+        search = np.searchsorted(gene_indices[order], subnetwork_indices)
+        found = search < len(order)
+        positions = order[np.minimum(search, len(order) - 1)] if len(order) else search
+        found[found] = gene_indices[positions[found]] == subnetwork_indices[found]
+
+    if not np.all(found):
+        missing = np.unique(subnetwork_indices[~found])
+        raise ValueError(f"Quadrants reference subnetwork genes not in the chromosome: {missing[:10].tolist()}")
+    return positions
+
+
+def _width(*index_arrays):
+    return int(max((int(indices.max()) + 1 for indices in index_arrays if len(indices)), default=0))
+
+
+#a NetworkGenome resolved into global node numbering. every (quadrant, slot) in the quadrant
+#chromosome is one subnetwork instance, built from the codons of the gene the slot names.
+#instance u = quadrant * subnetworks_per_quadrant + slot owns inputs [u * input_count, (u + 1) * input_count),
+#and the same for its hidden and output nodes. connection genes join the outputs of one
+#instance to the inputs of another.
+#
+#weights are CSRMatrix objects, each mapping a layer of nodes onto another
+class CompiledNetwork:
+    def __init__(self, columns, input_count=None, hidden_count=None, output_count=None):
+        spq = columns.subnetworks_per_quadrant
+        self.instance_count = columns.quadrant_count * spq
+        instance_positions = _lookup_genes(columns.gene_indices, columns.quadrant_definitions.ravel())
+        self.instance_genes = columns.gene_indices[instance_positions]
+
+        #every instance gets a copy of its gene's codons
+        codon_counts = columns.codon_counts[instance_positions]
+        codon_instance = np.repeat(np.arange(self.instance_count, dtype=np.int64), codon_counts)
+        instance_codon_starts = np.cumsum(codon_counts) - codon_counts
+        codons = np.arange(int(np.sum(codon_counts)), dtype=np.int64) + \
+            np.repeat(columns.gene_offsets[:-1][instance_positions] - instance_codon_starts, codon_counts)
+
+        #any other Types would be dropped from every matrix, or land in two of them at once
+        invalid_types = ~np.isin(columns.types[codons], _VALID_TYPES)
+        if np.any(invalid_types):
+            raise ValueError(
+                f"{len(np.unique(codons[invalid_types]))} codons have Types that aren't one source and one target layer")
+
+        source = columns.source[codons].astype(np.int64)
+        target = columns.target[codons].astype(np.int64)
+        weight = columns.weight[codons]
+        source_is_input = columns.source_is_input[codons]
+        source_is_hidden = columns.source_is_hidden[codons]
+        target_is_hidden = columns.target_is_hidden[codons]
+        target_is_output = columns.target_is_output[codons]
+
+        #connection genes are addressed by quadrant and slot within that quadrant
+        block = columns.connection_block
+        source_slot = columns.source_subnetwork_index.astype(np.int64)
+        target_slot = columns.target_subnetwork_index.astype(np.int64)
+        source_quadrant = columns.source_quadrant_index[block].astype(np.int64)
+        target_quadrant = columns.target_quadrant_index[block].astype(np.int64)
+        out_of_range = (source_slot >= spq) | (target_slot >= spq) | \
+            (source_quadrant >= columns.quadrant_count) | (target_quadrant >= columns.quadrant_count)
+        if np.any(out_of_range):
+            raise ValueError(
+                f"{int(np.count_nonzero(out_of_range))} connection genes reference a quadrant or subnetwork that doesn't exist")
+        source_instance = source_quadrant * spq + source_slot
+        target_instance = target_quadrant * spq + target_slot
+        source_output = columns.source_output_index.astype(np.int64)
+        target_input = columns.target_input_index.astype(np.int64)
+
+        #layer widths are the largest index used anywhere, unless given
+        used_widths = (
+            _width(source[source_is_input], target_input),
+            _width(source[source_is_hidden], target[target_is_hidden]),
+            _width(target[target_is_output], source_output)
+        )
+        self.input_count, self.hidden_count, self.output_count = (
+            used if given is None else given
+            for used, given in zip(used_widths, (input_count, hidden_count, output_count))
+        )
+        if any(used > width for used, width in zip(used_widths, (self.input_count, self.hidden_count, self.output_count))):
+            raise ValueError(f"Genome uses {used_widths} input, hidden and output nodes per subnetwork, "
+                             f"more than the given layer sizes")
+
+        widths = {"input": self.input_count, "hidden": self.hidden_count, "output": self.output_count}
+
+        def layer(source_layer, target_layer, mask):
+            return CSRMatrix.from_edges(
+                codon_instance[mask] * widths[target_layer] + target[mask],
+                codon_instance[mask] * widths[source_layer] + source[mask],
+                weight[mask],
+                (self.instance_count * widths[target_layer], self.instance_count * widths[source_layer])
+            )
+
+        self.input_to_hidden = layer("input", "hidden", source_is_input & target_is_hidden)
+        self.input_to_output = layer("input", "output", source_is_input & target_is_output)
+        self.hidden_to_hidden = layer("hidden", "hidden", source_is_hidden & target_is_hidden)
+        self.hidden_to_output = layer("hidden", "output", source_is_hidden & target_is_output)
+        self.inter_subnetwork = CSRMatrix.from_edges(
+            target_instance * self.input_count + target_input,
+            source_instance * self.output_count + source_output,
+            columns.connection_weight,
+            (self.instance_count * self.input_count, self.instance_count * self.output_count)
+        )
+
+    @property
+    def node_counts(self):
+        return (
+            self.instance_count * self.input_count,
+            self.instance_count * self.hidden_count,
+            self.instance_count * self.output_count
+        )
+
+    #evaluates a batch of networks synchronously for the given number of steps.
+    #inputs has shape (batch, instance_count * input_count) and is added to the input nodes every
+    #step, alongside the previous step's outputs arriving over inter-subnetwork edges.
+    #input nodes are linear; hidden and output nodes apply activation.
+    #returns the outputs, shape (batch, instance_count * output_count), or with return_state=True
+    #the (inputs, hidden, outputs) after the last step
+    def forward(self, inputs, steps=1, activation=np.tanh, state=None, return_state=False):
+        inputs = np.asarray(inputs, dtype=np.float32)
+        input_nodes, hidden_nodes, output_nodes = self.node_counts
+        if inputs.shape[-1] != input_nodes:
+            raise ValueError(f"Expected inputs with {input_nodes} columns, got {inputs.shape[-1]}")
+
+        batch_shape = inputs.shape[:-1]
+        if state is None:
+            hidden = np.zeros(batch_shape + (hidden_nodes,), dtype=np.float32)
+            outputs = np.zeros(batch_shape + (output_nodes,), dtype=np.float32)
+        else:
+            _, hidden, outputs = state
+
+        input_values = inputs
+        for _ in range(steps):
+            input_values = inputs + self.inter_subnetwork.dot(outputs)
+            hidden = activation(self.input_to_hidden.dot(input_values) + self.hidden_to_hidden.dot(hidden))
+            outputs = activation(self.input_to_output.dot(input_values) + self.hidden_to_output.dot(hidden))
+
+        if return_state:
+            return input_values, hidden, outputs
+        return outputs
+
+    def __str__(self):
+        return f"""CompiledNetwork:
+\tSubnetwork instances = {self.instance_count}
+\tNodes per subnetwork = {self.input_count} input, {self.hidden_count} hidden, {self.output_count} output
+\tInput->hidden edges = {self.input_to_hidden.nnz}
+\tInput->output edges = {self.input_to_output.nnz}
+\tHidden->hidden edges = {self.hidden_to_hidden.nnz}
+\tHidden->output edges = {self.hidden_to_output.nnz}
+\tInter-subnetwork edges = {self.inter_subnetwork.nnz}"""
+
+
+#compiles a NetworkGenome or ColumnarGenome. the layer sizes are inferred from the largest node
+#index the genome uses, or can be fixed so that every genome in a population lines up
+def compile_genome(genome, input_count=None, hidden_count=None, output_count=None):
+    columns = genome if isinstance(genome, ColumnarGenome) else ColumnarGenome.from_genome(genome)
+    return CompiledNetwork(columns, input_count, hidden_count, output_count)
@@ -0,0 +1,437 @@
+import hashlib
+import pathlib
+import struct
+
+import numpy as np
+
+from . import numpyparser
+from .chromosomewriter import \
+    encode_subnetwork_chromosome, \
+    encode_quadrant_chromosome, \
+    encode_connections_chromosome, \
+    subnetwork_arrays_from_genes, \
+    connections_arrays_from_blocks, \
+    columnar_codons, \
+    columnar_connection_genes, \
+    _write_chromosomes
+from .columnar import \
+    ColumnarGenome, \
+    decode_subnetworks, \
+    decode_quadrants, \
+    decode_connections
+from .networkparser import NetworkGenome, logger
+
+
+#-----DELTA LAYOUT-----
+#header
+#   "GDLT", u32 version,
+#   u64 parent gene count, codon count, quadrant count, subnetworks per quadrant,
+#       quadrant connections count, connection gene count
+#   u64 child gene count, quadrant count, subnetworks per quadrant, quadrant connections count
+#   16 byte blake2b digest of the parent's records
+#arrays
+#   every field of _ARRAY_FIELDS in turn, as a u64 element count followed by its records
+DELTA_MAGIC = b"GDLT"
+DELTA_VERSION = 2
+
+_DIGEST_SIZE = 16
+_VERSION = struct.Struct("<4sI")
+_HEADER = struct.Struct(f"<4sI10Q{_DIGEST_SIZE}s")
+_COUNT = struct.Struct("<Q")
+
+#child genes and blocks are copied from the parent position given by their source, which is
+#only stored where it isn't the child's own position. the rest are new, and stored in full
+_ARRAY_FIELDS = (
+    ("gene_source_positions", np.dtype("<i8")),
+    ("gene_source_values", np.dtype("<i8")),
+    ("new_gene_indices", np.dtype("<u8")),
+    ("new_codon_counts", np.dtype("<i8")),
+    ("new_codons", numpyparser.CODON_DTYPE),
+    ("codon_patch_positions", np.dtype("<i8")),
+    ("codon_patch_records", numpyparser.CODON_DTYPE),
+    ("quadrant_patch_positions", np.dtype("<i8")),
+    ("quadrant_patch_values", np.dtype("<u4")),
+    ("block_source_positions", np.dtype("<i8")),
+    ("block_source_values", np.dtype("<i8")),
+    ("new_block_sources", np.dtype("<u4")),
+    ("new_block_targets", np.dtype("<u4")),
+    ("new_connection_counts", np.dtype("<i8")),
+    ("new_connection_genes", numpyparser.CONNECTION_GENE_DTYPE),
+    ("connection_patch_positions", np.dtype("<i8")),
+    ("connection_patch_records", numpyparser.CONNECTION_GENE_DTYPE),
+)
+
+
+def _offsets(counts):
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+def _ranges(starts, counts):
+    #every position of the runs [start, start + count), end to end
+    counts = np.asarray(counts, dtype=np.int64)
+    run_starts = np.cumsum(counts) - counts
+    return np.arange(int(np.sum(counts)), dtype=np.int64) + np.repeat(np.asarray(starts, dtype=np.int64) - run_starts, counts)
+
+
+def _as_bytes(records):
+    #records compared byte for byte, so that an unchanged NaN weight isn't a change
+    records = np.ascontiguousarray(records)
+    return records.view(np.dtype((np.void, records.dtype.itemsize)))
+
+
+def _sparse_sources(sources):
+    positions = np.flatnonzero(sources != np.arange(len(sources)))
+    return positions, sources[positions]
+
+
+def _dense_sources(count, positions, values):
+    sources = np.arange(count, dtype=np.int64)
+    sources[positions] = values
+    return sources
+
+
+#-----RAGGED RECORDS-----
+#genes and blocks are both runs of records, segment i owning records[offsets[i]:offsets[i + 1]].
+#a child segment is either copied from a parent segment of the same length, with any records
+#that differ patched, or stored in full
+def _ragged_delta(parent_offsets, parent_records, child_offsets, child_records, sources):
+    copied = sources >= 0
+    child_counts = np.diff(child_offsets)
+    new_segments = np.flatnonzero(~copied)
+    new_records = child_records[_ranges(child_offsets[:-1][new_segments], child_counts[new_segments])]
+
+    copied_segments = np.flatnonzero(copied)
+    copied_counts = child_counts[copied_segments]
+    child_positions = _ranges(child_offsets[:-1][copied_segments], copied_counts)
+    parent_positions = _ranges(parent_offsets[:-1][sources[copied_segments]], copied_counts)
+    changed = _as_bytes(child_records[child_positions]) != _as_bytes(parent_records[parent_positions])
+    patch_positions = child_positions[changed]
+
+    return child_counts[new_segments], new_records, patch_positions, child_records[patch_positions]
+
+
+def _ragged_apply(parent_offsets, parent_records, sources, new_counts, new_records, patch_positions, patch_records):
+    copied = sources >= 0
+    copied_segments = np.flatnonzero(copied)
+    new_segments = np.flatnonzero(~copied)
+    if len(new_segments) != len(new_counts):
+        raise GenomeDelta.DeltaFormatException(
+            f"Delta has {len(new_counts)} new segments, but its sources leave {len(new_segments)}")
+
+    counts = np.empty(len(sources), dtype=np.int64)
+    counts[copied_segments] = np.diff(parent_offsets)[sources[copied_segments]]
+    counts[new_segments] = new_counts
+    offsets = _offsets(counts)
+
+    records = np.empty(offsets[-1], dtype=parent_records.dtype)
+    records[_ranges(offsets[:-1][copied_segments], counts[copied_segments])] = \
+        parent_records[_ranges(parent_offsets[:-1][sources[copied_segments]], counts[copied_segments])]
+    records[_ranges(offsets[:-1][new_segments], new_counts)] = new_records
+    records[patch_positions] = patch_records
+    return offsets, records
+
+
+def _gene_sources(parent_arrays, child_arrays):
+    #child genes are matched to the parent gene with the same GeneIndex and codon count
+    parent_indices = parent_arrays.gene_indices
+    child_indices = child_arrays.gene_indices
+    sources = np.full(len(child_indices), -1, dtype=np.int64)
+    if len(parent_indices) == 0 or len(child_indices) == 0:
+        return sources
+
+    #the first parent gene of each GeneIndex
+    order = np.argsort(parent_indices, kind="stable")
+    search = np.minimum(np.searchsorted(parent_indices[order], child_indices), len(order) - 1)
+    candidates = order[search]
+    found = (parent_indices[candidates] == child_indices) & \
+        (np.diff(parent_arrays.gene_offsets)[candidates] == np.diff(child_arrays.gene_offsets))
+    sources[found] = candidates[found]
+    return sources
+
+
+def _block_sources(parent_arrays, child_arrays):
+    #blocks have no identity of their own, so a child block is matched to the parent block in
+    #the same position, where it joins the same quadrants with as many connection genes
+    sources = np.full(child_arrays.quadrant_connections_count, -1, dtype=np.int64)
+    shared = min(parent_arrays.quadrant_connections_count, child_arrays.quadrant_connections_count)
+    found = (parent_arrays.source_quadrant_indices[:shared] == child_arrays.source_quadrant_indices[:shared]) & \
+        (parent_arrays.target_quadrant_indices[:shared] == child_arrays.target_quadrant_indices[:shared]) & \
+        (np.diff(parent_arrays.gene_offsets)[:shared] == np.diff(child_arrays.gene_offsets)[:shared])
+    sources[:shared][found] = np.flatnonzero(found)
+    return sources
+
+
+def _genome_arrays(genome):
+    #the (subnetworks, quadrants, connections) arrays of a genome directory, NetworkGenome or
+    #ColumnarGenome, or the arrays themselves
+    if isinstance(genome, tuple):
+        return genome
+    if isinstance(genome, NetworkGenome):
+        gene_indices, gene_offsets, codons = subnetwork_arrays_from_genes(genome.subnetwork_genes)
+        quadrant_definitions = np.array(genome.quadrant_definitions, dtype=np.uint32)
+        quadrant_definitions = quadrant_definitions.reshape(len(genome.quadrant_definitions), genome.subnetworks_per_quadrant)
+        source_quadrant_indices, target_quadrant_indices, connection_offsets, connection_genes = \
+            connections_arrays_from_blocks(genome.quadrant_connections)
+    elif isinstance(genome, ColumnarGenome):
+        gene_indices, gene_offsets, codons = genome.gene_indices, genome.gene_offsets, columnar_codons(genome)
+        quadrant_definitions = genome.quadrant_definitions
+        source_quadrant_indices, target_quadrant_indices, connection_offsets, connection_genes = \
+            genome.source_quadrant_index, genome.target_quadrant_index, genome.connection_offsets, \
+            columnar_connection_genes(genome)
+    else:
+        path = pathlib.Path(genome)
+        return (
+            decode_subnetworks(path.joinpath("subnetworks.chr")),
+            decode_quadrants(path.joinpath("quadrants.chr")),
+            decode_connections(path.joinpath("connections.chr"))
+        )
+
+    return (
+        numpyparser.SubnetworkArrays(
+            numpyparser.SUBNETWORK_CHROMOSOME_SUCCESS, 0, len(gene_indices), gene_indices, gene_offsets, codons),
+        numpyparser.QuadrantArrays(
+            numpyparser.QUADRANT_CHROMOSOME_SUCCESS, quadrant_definitions.shape[0], quadrant_definitions.shape[1],
+            quadrant_definitions),
+        numpyparser.ConnectionsArrays(
+            numpyparser.CONNECTIONS_CHROMOSOME_SUCCESS, 0, len(source_quadrant_indices),
+            source_quadrant_indices, target_quadrant_indices, connection_offsets, connection_genes)
+    )
+
+
+def _parent_shape(subnetwork_arrays, quadrant_arrays, connections_arrays):
+    return (
+        subnetwork_arrays.gene_count, len(subnetwork_arrays.codons),
+        quadrant_arrays.quadrant_count, quadrant_arrays.subnetworks_per_quadrant,
+        connections_arrays.quadrant_connections_count, len(connections_arrays.connection_genes)
+    )
+
+
+def _parent_digest(subnetwork_arrays, quadrant_arrays, connections_arrays):
+    #identifies the parent by the content of its chromosomes, in the same little endian layout
+    #whichever form it was given in, so a delta can't be applied to a different genome that
+    #happens to have the same shape
+    digest = hashlib.blake2b(digest_size=_DIGEST_SIZE)
+    for array, dtype in (
+            (subnetwork_arrays.gene_indices, np.dtype("<u8")),
+            (subnetwork_arrays.gene_offsets, np.dtype("<i8")),
+            (subnetwork_arrays.codons, numpyparser.CODON_DTYPE),
+            (quadrant_arrays.subnetwork_indices, np.dtype("<u4")),
+            (connections_arrays.source_quadrant_indices, np.dtype("<u4")),
+            (connections_arrays.target_quadrant_indices, np.dtype("<u4")),
+            (connections_arrays.gene_offsets, np.dtype("<i8")),
+            (connections_arrays.connection_genes, numpyparser.CONNECTION_GENE_DTYPE)):
+        array = np.ascontiguousarray(array, dtype=dtype)
+        digest.update(_COUNT.pack(array.size))
+        digest.update(array.tobytes())
+    return digest.digest()
+
+
+#the changes turning a parent genome into a child: only the genes, codons, quadrant entries,
+#QuadrantConnections blocks and connection genes that differ are stored, so a delta is the
+#size of the mutation rather than of the genome.
+#parents and children can be genome directories, NetworkGenome or ColumnarGenome objects, or
+#(subnetworks, quadrants, connections) numpyparser arrays
+class GenomeDelta:
+    class DeltaFormatException(Exception):
+        pass
+
+    def __init__(self, parent_shape, child_shape, parent_digest, **arrays):
+        self.parent_shape = tuple(int(count) for count in parent_shape)
+        self.parent_digest = bytes(parent_digest)
+        self.child_gene_count, self.child_quadrant_count, self.child_subnetworks_per_quadrant, \
+            self.child_quadrant_connections_count = (int(count) for count in child_shape)
+        for field, dtype in _ARRAY_FIELDS:
+            setattr(self, field, np.asarray(arrays[field], dtype=dtype))
+
+    @staticmethod
+    def create(parent, child):
+        parent_subnetworks, parent_quadrants, parent_connections = parent_arrays = _genome_arrays(parent)
+        child_subnetworks, child_quadrants, child_connections = _genome_arrays(child)
+
+        gene_sources = _gene_sources(parent_subnetworks, child_subnetworks)
+        new_codon_counts, new_codons, codon_patch_positions, codon_patch_records = _ragged_delta(
+            parent_subnetworks.gene_offsets, parent_subnetworks.codons,
+            child_subnetworks.gene_offsets, child_subnetworks.codons, gene_sources)
+
+        #a quadrant table that changed shape is stored whole
+        parent_table = np.asarray(parent_quadrants.subnetwork_indices).ravel()
+        child_table = np.asarray(child_quadrants.subnetwork_indices).ravel()
+        if parent_quadrants.subnetwork_indices.shape == child_quadrants.subnetwork_indices.shape:
+            quadrant_patch_positions = np.flatnonzero(parent_table != child_table)
+        else:
+            quadrant_patch_positions = np.arange(len(child_table), dtype=np.int64)
+
+        block_sources = _block_sources(parent_connections, child_connections)
+        new_connection_counts, new_connection_genes, connection_patch_positions, connection_patch_records = _ragged_delta(
+            parent_connections.gene_offsets, parent_connections.connection_genes,
+            child_connections.gene_offsets, child_connections.connection_genes, block_sources)
+        new_blocks = block_sources < 0
+
+        gene_source_positions, gene_source_values = _sparse_sources(gene_sources)
+        block_source_positions, block_source_values = _sparse_sources(block_sources)
+        return GenomeDelta(
+            _parent_shape(*parent_arrays),
+            (child_subnetworks.gene_count, child_quadrants.quadrant_count, child_quadrants.subnetworks_per_quadrant,
+             child_connections.quadrant_connections_count),
+            _parent_digest(*parent_arrays),
+            gene_source_positions=gene_source_positions,
+            gene_source_values=gene_source_values,
+            new_gene_indices=child_subnetworks.gene_indices[gene_sources < 0],
+            new_codon_counts=new_codon_counts,
+            new_codons=new_codons,
+            codon_patch_positions=codon_patch_positions,
+            codon_patch_records=codon_patch_records,
+            quadrant_patch_positions=quadrant_patch_positions,
+            quadrant_patch_values=child_table[quadrant_patch_positions],
+            block_source_positions=block_source_positions,
+            block_source_values=block_source_values,
+            new_block_sources=child_connections.source_quadrant_indices[new_blocks],
+            new_block_targets=child_connections.target_quadrant_indices[new_blocks],
+            new_connection_counts=new_connection_counts,
+            new_connection_genes=new_connection_genes,
+            connection_patch_positions=connection_patch_positions,
+            connection_patch_records=connection_patch_records
+        )
+
+    #-----APPLYING-----
+    def apply_arrays(self, parent):
+        #the child's (subnetworks, quadrants, connections) numpyparser arrays. raises ValueError
+        #where parent isn't the genome the delta was created against
+        parent_subnetworks, parent_quadrants, parent_connections = parent_arrays = _genome_arrays(parent)
+        parent_shape = _parent_shape(*parent_arrays)
+        if parent_shape != self.parent_shape:
+            raise ValueError(f"Delta was created against a parent shaped {self.parent_shape}, not {parent_shape}")
+        parent_digest = _parent_digest(*parent_arrays)
+        if parent_digest != self.parent_digest:
+            raise ValueError(
+                f"Delta was created against parent {self.parent_digest.hex()}, not {parent_digest.hex()}")
+
+        gene_sources = _dense_sources(self.child_gene_count, self.gene_source_positions, self.gene_source_values)
+        gene_offsets, codons = _ragged_apply(
+            parent_subnetworks.gene_offsets, parent_subnetworks.codons, gene_sources,
+            self.new_codon_counts, self.new_codons, self.codon_patch_positions, self.codon_patch_records)
+        gene_indices = np.empty(self.child_gene_count, dtype=np.uint64)
+        copied = gene_sources >= 0
+        gene_indices[copied] = parent_subnetworks.gene_indices[gene_sources[copied]]
+        gene_indices[~copied] = self.new_gene_indices
+
+        child_shape = (self.child_quadrant_count, self.child_subnetworks_per_quadrant)
+        if parent_quadrants.subnetwork_indices.shape == child_shape:
+            quadrant_table = np.array(parent_quadrants.subnetwork_indices, dtype=np.uint32)
+        else:
+            quadrant_table = np.zeros(child_shape, dtype=np.uint32)
+        quadrant_table.ravel()[self.quadrant_patch_positions] = self.quadrant_patch_values
+
+        block_sources = _dense_sources(
+            self.child_quadrant_connections_count, self.block_source_positions, self.block_source_values)
+        connection_offsets, connection_genes = _ragged_apply(
+            parent_connections.gene_offsets, parent_connections.connection_genes, block_sources,
+            self.new_connection_counts, self.new_connection_genes,
+            self.connection_patch_positions, self.connection_patch_records)
+        copied = block_sources >= 0
+        source_quadrant_indices = np.empty(self.child_quadrant_connections_count, dtype=np.uint32)
+        target_quadrant_indices = np.empty(self.child_quadrant_connections_count, dtype=np.uint32)
+        source_quadrant_indices[copied] = parent_connections.source_quadrant_indices[block_sources[copied]]
+        target_quadrant_indices[copied] = parent_connections.target_quadrant_indices[block_sources[copied]]
+        source_quadrant_indices[~copied] = self.new_block_sources
+        target_quadrant_indices[~copied] = self.new_block_targets
+
+        return (
+            numpyparser.SubnetworkArrays(
+                numpyparser.SUBNETWORK_CHROMOSOME_SUCCESS, 0, self.child_gene_count, gene_indices, gene_offsets, codons),
+            numpyparser.QuadrantArrays(numpyparser.QUADRANT_CHROMOSOME_SUCCESS, *child_shape, quadrant_table),
+            numpyparser.ConnectionsArrays(
+                numpyparser.CONNECTIONS_CHROMOSOME_SUCCESS, 0, self.child_quadrant_connections_count,
+                source_quadrant_indices, target_quadrant_indices, connection_offsets, connection_genes)
+        )
+
+    def apply_columns(self, parent):
+        return ColumnarGenome.from_arrays(*self.apply_arrays(parent))
+
+    def apply(self, parent, path="No path provided"):
+        return NetworkGenome.from_arrays(path, *self.apply_arrays(parent))
+
+    def apply_to_file(self, parent, path):
+        #writes the child as a genome directory at path
+        subnetwork_arrays, quadrant_arrays, connections_arrays = self.apply_arrays(parent)
+        _write_chromosomes(path, (
+            encode_subnetwork_chromosome(
+                subnetwork_arrays.gene_indices, subnetwork_arrays.gene_offsets, subnetwork_arrays.codons),
+            encode_quadrant_chromosome(quadrant_arrays.subnetwork_indices, quadrant_arrays.subnetworks_per_quadrant),
+            encode_connections_chromosome(
+                connections_arrays.source_quadrant_indices, connections_arrays.target_quadrant_indices,
+                connections_arrays.gene_offsets, connections_arrays.connection_genes)
+        ))
+        logger.debug("Wrote delta child \"%s\"", path)
+
+    #-----SERIALISATION-----
+    def to_bytes(self):
+        pieces = [_HEADER.pack(
+            DELTA_MAGIC, DELTA_VERSION, *self.parent_shape,
+            self.child_gene_count, self.child_quadrant_count, self.child_subnetworks_per_quadrant,
+            self.child_quadrant_connections_count, self.parent_digest)]
+        for field, dtype in _ARRAY_FIELDS:
+            array = np.ascontiguousarray(getattr(self, field), dtype=dtype)
+            pieces.append(_COUNT.pack(len(array)))
+            pieces.append(array.tobytes())
+        return b"".join(pieces)
+
+    @staticmethod
+    def from_bytes(buffer):
+        #the version is checked before the rest of the header, whose size depends on it
+        if len(buffer) < _VERSION.size:
+            raise GenomeDelta.DeltaFormatException("Delta is too short to hold its header")
+        magic, version = _VERSION.unpack_from(buffer)
+        if magic != DELTA_MAGIC:
+            raise GenomeDelta.DeltaFormatException("Not a genome delta")
+        if version != DELTA_VERSION:
+            raise GenomeDelta.DeltaFormatException(f"Delta version {version}, expected {DELTA_VERSION}")
+        if len(buffer) < _HEADER.size:
+            raise GenomeDelta.DeltaFormatException("Delta is too short to hold its header")
+        _, _, *shape, parent_digest = _HEADER.unpack_from(buffer)
+
+        arrays = {}
+        offset = _HEADER.size
+        for field, dtype in _ARRAY_FIELDS:
+            if offset + _COUNT.size > len(buffer):
+                raise GenomeDelta.DeltaFormatException(f"Delta is truncated before {field}")
+            count, = _COUNT.unpack_from(buffer, offset)
+            offset += _COUNT.size
+            if offset + count * dtype.itemsize > len(buffer):
+                raise GenomeDelta.DeltaFormatException(f"Delta is truncated in {field}")
+            arrays[field] = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+            offset += count * dtype.itemsize
+        return GenomeDelta(shape[:6], shape[6:], parent_digest, **arrays)
+
+    def to_file(self, path):
+        with open(path, "wb") as delta_file:
+            delta_file.write(self.to_bytes())
+
+    @staticmethod
+    def from_file(path):
+        with open(path, "rb") as delta_file:
+            return GenomeDelta.from_bytes(delta_file.read())
+
+    @property
+    def nbytes(self):
+        return _HEADER.size + sum(_COUNT.size + getattr(self, field).nbytes for field, _ in _ARRAY_FIELDS)
+
+    def __str__(self):
+        return f"""GenomeDelta:
+\tNew genes = {len(self.new_gene_indices)}
+\tPatched codons = {len(self.codon_patch_positions)}
+\tPatched quadrant entries = {len(self.quadrant_patch_positions)}
+\tNew quadrant connections = {len(self.new_connection_counts)}
+\tPatched connection genes = {len(self.connection_patch_positions)}
+\tSize = {self.nbytes} bytes"""
+
+
+#parses a child stored as a delta against its parent. parent can be anything GenomeDelta
+#accepts, so a parent already in memory costs no I/O beyond reading the delta itself
+def load_child(parent, delta, path=None):
+    if not isinstance(delta, GenomeDelta):
+        path = delta if path is None else path
+        delta = GenomeDelta.from_file(delta)
+    return delta.apply(parent, "No path provided" if path is None else path)
@@ -0,0 +1,281 @@
+import collections
+import mmap
+import os
+import struct
+import threading
+
+import numpy as np
+
+from . import numpyparser
+from .networkparser import \
+    SubnetworkChromosomeParseResult, \
+    ConnectionsChromosomeParseResult, \
+    SubnetworkGene, \
+    QuadrantConnections, \
+    NetworkGenome, \
+    logger
+
+
+#-----SIDECAR LAYOUT-----
+#a sidecar starts with a header recording the size and mtime of the chromosome it was built
+#from, followed by one fixed-size record per gene (or QuadrantConnections block) in file order
+SUBNETWORK_INDEX_MAGIC = b"SIDX"
+CONNECTIONS_INDEX_MAGIC = b"CIDX"
+INDEX_SUFFIX = ".idx"
+
+_INDEX_HEADER = struct.Struct("<4sQqI")
+
+SUBNETWORK_INDEX_DTYPE = np.dtype([
+    ("Offset", "<u8"),
+    ("GeneIndex", "<u8"),
+    ("CodonCount", "<u4")
+])
+
+CONNECTIONS_INDEX_DTYPE = np.dtype([
+    ("Offset", "<u8"),
+    ("SourceQuadrantIndex", "<u4"),
+    ("TargetQuadrantIndex", "<u4"),
+    ("ConnectionGeneCount", "<u4")
+])
+
+#header sizes in the chromosome itself, used to step back from the data to the record start
+_SUBNETWORK_GENE_HEADER_SIZE = 12
+_QUADRANT_CONNECTIONS_HEADER_SIZE = 12
+
+#most recently used indices, so repeated lookups only cost a stat of the chromosome
+_MAX_LOADED_INDICES = 64
+_loaded_indices = collections.OrderedDict()
+_loaded_indices_lock = threading.Lock()
+
+
+class ChromosomeIndex:
+    def __init__(self, magic, size, mtime_ns, records):
+        self.magic = magic
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.records = records
+        #built on the first lookup, so an index only read for its offsets costs no sort
+        self._lookup = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def is_current(self, stat):
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+    def position_of(self, gene_index):
+        #returns which gene in the file has the given GeneIndex, or None
+        if self._lookup is None:
+            gene_indices = self.records["GeneIndex"]
+            #genomes are usually numbered densely from zero, with each GeneIndex at its own
+            #position, in which case no search is needed at all
+            dense = bool(np.array_equal(gene_indices, np.arange(len(gene_indices), dtype=np.uint64)))
+            #a stable sort keeps the first of any duplicated GeneIndex values in file order
+            by_gene_index = None if dense else np.argsort(gene_indices, kind="stable")
+            sorted_gene_indices = None if dense else gene_indices[by_gene_index]
+            self._lookup = (dense, by_gene_index, sorted_gene_indices)
+        dense, by_gene_index, sorted_gene_indices = self._lookup
+
+        if dense:
+            return gene_index if 0 <= gene_index < len(self.records) else None
+        i = np.searchsorted(sorted_gene_indices, gene_index)
+        if i < len(sorted_gene_indices) and sorted_gene_indices[i] == gene_index:
+            return int(by_gene_index[i])
+        return None
+
+    def positions_of(self, source_quadrant_index, target_quadrant_index):
+        mask = (self.records["SourceQuadrantIndex"] == source_quadrant_index) & \
+            (self.records["TargetQuadrantIndex"] == target_quadrant_index)
+        return np.flatnonzero(mask).tolist()
+
+    def write(self, index_path):
+        dtype = SUBNETWORK_INDEX_DTYPE if self.magic == SUBNETWORK_INDEX_MAGIC else CONNECTIONS_INDEX_DTYPE
+        with open(index_path, "wb") as index_file:
+            index_file.write(_INDEX_HEADER.pack(self.magic, self.size, self.mtime_ns, len(self.records)))
+            index_file.write(np.ascontiguousarray(self.records, dtype=dtype).tobytes())
+
+    @staticmethod
+    def read(index_path):
+        #returns None for a missing or malformed sidecar, which is then rebuilt
+        try:
+            with open(index_path, "rb") as index_file:
+                data = index_file.read()
+        except OSError:
+            return None
+        if len(data) < _INDEX_HEADER.size:
+            return None
+
+        magic, size, mtime_ns, count = _INDEX_HEADER.unpack_from(data)
+        if magic == SUBNETWORK_INDEX_MAGIC:
+            dtype = SUBNETWORK_INDEX_DTYPE
+        elif magic == CONNECTIONS_INDEX_MAGIC:
+            dtype = CONNECTIONS_INDEX_DTYPE
+        else:
+            return None
+        if len(data) != _INDEX_HEADER.size + count * dtype.itemsize:
+            return None
+
+        records = np.frombuffer(data, dtype=dtype, count=count, offset=_INDEX_HEADER.size)
+        return ChromosomeIndex(magic, size, mtime_ns, records)
+
+
+
+#-----BUILDING-----
+def _fail(return_code, additional_info):
+    exception_message = f"{return_code}: Additional info = {additional_info}"
+    raise NetworkGenome.ChromosomeParseException(exception_message, return_code, additional_info)
+
+
+def _bad_path(magic):
+    if magic == SUBNETWORK_INDEX_MAGIC:
+        _fail(SubnetworkChromosomeParseResult.Retcodes.BAD_PATH, -1)
+    _fail(ConnectionsChromosomeParseResult.Retcodes.BAD_PATH, -1)
+
+
+def _build_index(path, magic, stat):
+    #the chromosome is mapped so that only the gene headers are ever paged in
+    try:
+        chromosome_file = open(path, "rb")
+    except OSError:
+        _bad_path(magic)
+    with chromosome_file:
+        try:
+            buffer = mmap.mmap(chromosome_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            buffer = b""
+
+        if magic == SUBNETWORK_INDEX_MAGIC:
+            index = numpyparser.index_subnetwork_genes(buffer)
+            return_code = SubnetworkChromosomeParseResult.Retcodes(index.return_code)
+            if return_code != SubnetworkChromosomeParseResult.Retcodes.SUCCESS:
+                _fail(return_code, index.additional_info)
+
+            records = np.empty(index.gene_count, dtype=SUBNETWORK_INDEX_DTYPE)
+            records["Offset"] = index.codon_starts - _SUBNETWORK_GENE_HEADER_SIZE
+            records["GeneIndex"] = index.gene_indices
+            records["CodonCount"] = index.codon_counts
+        else:
+            index = numpyparser.index_quadrant_connections(buffer)
+            return_code = ConnectionsChromosomeParseResult.Retcodes(index.return_code)
+            if return_code != ConnectionsChromosomeParseResult.Retcodes.SUCCESS:
+                _fail(return_code, index.additional_info)
+
+            records = np.empty(index.quadrant_connections_count, dtype=CONNECTIONS_INDEX_DTYPE)
+            records["Offset"] = index.gene_starts - _QUADRANT_CONNECTIONS_HEADER_SIZE
+            records["SourceQuadrantIndex"] = index.source_quadrant_indices
+            records["TargetQuadrantIndex"] = index.target_quadrant_indices
+            records["ConnectionGeneCount"] = index.connection_gene_counts
+
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+
+    #the stat is taken before reading, so a file modified mid-build is never marked current
+    return ChromosomeIndex(magic, stat.st_size, stat.st_mtime_ns, records)
+
+
+def _load_index(path, magic):
+    path = os.fspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        _bad_path(magic)
+
+    with _loaded_indices_lock:
+        index = _loaded_indices.get(path)
+        if index is not None and index.magic == magic and index.is_current(stat):
+            _loaded_indices.move_to_end(path)
+            return index
+
+    index_path = path + INDEX_SUFFIX
+    index = ChromosomeIndex.read(index_path)
+    if index is None or index.magic != magic or not index.is_current(stat):
+        logger.debug("Rebuilding stale or missing chromosome index \"%s\"", index_path)
+        index = _build_index(path, magic, stat)
+        try:
+            index.write(index_path)
+        except OSError as e:
+            #an unwritable directory only costs the sidecar, the in-memory index still works
+            logger.warning(f"Unable to write chromosome index \"{index_path}\": {e}")
+
+    with _loaded_indices_lock:
+        _loaded_indices[path] = index
+        _loaded_indices.move_to_end(path)
+        if len(_loaded_indices) > _MAX_LOADED_INDICES:
+            _loaded_indices.popitem(last=False)
+    return index
+
+
+#builds and writes the sidecar for a subnetwork or connections chromosome, returning its path
+def write_gene_index(path):
+    path = os.fspath(path)
+    try:
+        with open(path, "rb") as chromosome_file:
+            chromosome_magic = chromosome_file.read(4)
+        stat = os.stat(path)
+    except OSError:
+        _bad_path(SUBNETWORK_INDEX_MAGIC)
+    magic = CONNECTIONS_INDEX_MAGIC if chromosome_magic == numpyparser.CONNECTIONS_MAGIC else SUBNETWORK_INDEX_MAGIC
+
+    index = _build_index(path, magic, stat)
+    index.write(path + INDEX_SUFFIX)
+    return path + INDEX_SUFFIX
+
+
+#returns the up to date index for a chromosome, reading its sidecar or rebuilding it when the
+#chromosome's size or mtime no longer match
+def load_gene_index(path):
+    return _load_index(path, SUBNETWORK_INDEX_MAGIC)
+
+
+def load_quadrant_connections_index(path):
+    return _load_index(path, CONNECTIONS_INDEX_MAGIC)
+
+
+
+#-----LOOKUP-----
+def _read_at(path, offset, size):
+    with open(path, "rb") as chromosome_file:
+        chromosome_file.seek(offset)
+        return chromosome_file.read(size)
+
+
+def get_nth_gene(path, n):
+    index = load_gene_index(path)
+    record = index.records[n]
+    codon_count = int(record["CodonCount"])
+    data = _read_at(path, int(record["Offset"]) + _SUBNETWORK_GENE_HEADER_SIZE,
+                    codon_count * numpyparser.CODON_DTYPE.itemsize)
+
+    codons = np.frombuffer(data, dtype=numpyparser.CODON_DTYPE)
+    codon_records = list(map(numpyparser.CodonRecord._make, codons.tolist()))
+    return SubnetworkGene(numpyparser.SubnetworkGeneRecord(int(record["GeneIndex"]), codon_records, codon_count))
+
+
+#seeks straight to the gene with the given GeneIndex, raising KeyError if there is none
+def get_gene(path, gene_index):
+    position = load_gene_index(path).position_of(gene_index)
+    if position is None:
+        raise KeyError(f"No gene with GeneIndex {gene_index} in \"{path}\"")
+    return get_nth_gene(path, position)
+
+
+def get_quadrant_connections(path, n):
+    index = load_quadrant_connections_index(path)
+    record = index.records[n]
+    gene_count = int(record["ConnectionGeneCount"])
+    data = _read_at(path, int(record["Offset"]) + _QUADRANT_CONNECTIONS_HEADER_SIZE,
+                    gene_count * numpyparser.CONNECTION_GENE_DTYPE.itemsize)
+
+    connection_genes = np.frombuffer(data, dtype=numpyparser.CONNECTION_GENE_DTYPE)
+    gene_records = list(map(numpyparser.ConnectionGeneRecord._make, connection_genes.tolist()))
+    return QuadrantConnections(numpyparser.QuadrantConnectionsRecord(
+        gene_records, gene_count, int(record["SourceQuadrantIndex"]), int(record["TargetQuadrantIndex"])))
+
+
+#every QuadrantConnections block between the two quadrants, in file order
+def find_quadrant_connections(path, source_quadrant_index, target_quadrant_index):
+    index = load_quadrant_connections_index(path)
+    return [
+        get_quadrant_connections(path, n)
+        for n in index.positions_of(source_quadrant_index, target_quadrant_index)
+    ]
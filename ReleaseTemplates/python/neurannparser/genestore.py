@@ -0,0 +1,315 @@
+import hashlib
+import pathlib
+import struct
+import threading
+
+from collections import namedtuple
+
+import numpy as np
+
+from . import numpyparser
+from .chromosomewriter import \
+    subnetwork_arrays_from_genes, \
+    connections_arrays_from_blocks, \
+    columnar_codons, \
+    columnar_connection_genes
+from .columnar import \
+    ColumnarGenome, \
+    decode_subnetworks, \
+    decode_quadrants, \
+    decode_connections
+from .networkparser import \
+    SubnetworkGene, \
+    QuadrantConnections, \
+    NetworkGenome, \
+    logger
+
+
+#contents are identified by a 128 bit blake2b digest of their on-disk bytes, header included
+_DIGEST_SIZE = 16
+_GENE_HEADER = struct.Struct("<Q")
+_BLOCK_HEADER = struct.Struct("<II")
+
+_HANDLE_DTYPE = np.uint32
+
+#the differences between two genomes of the same store. genes are given by GeneIndex, with
+#changed_genes those whose codons differ between the two. blocks are given by handle
+GenomeDiff = namedtuple("GenomeDiff", [
+    "added_genes", "removed_genes", "changed_genes",
+    "added_blocks", "removed_blocks", "quadrants_changed"
+])
+
+
+def _read_only(array):
+    array.setflags(write=False)
+    return array
+
+
+class _InternTable:
+    #one kind of interned content. handles number contents in the order they were first seen,
+    #and every content is kept as a read-only record array
+    def __init__(self, header_dtype):
+        self.handles = {}
+        self.records = []
+        self.headers = np.empty(1024, dtype=header_dtype)
+        self.objects = {}
+        self.added = 0
+        self.referenced_bytes = 0
+        self.stored_bytes = 0
+
+    def intern(self, digests, headers, records, offsets):
+        #the handle of every content, storing the ones not seen before
+        handles = np.empty(len(digests), dtype=_HANDLE_DTYPE)
+        starts = offsets[:-1].tolist()
+        ends = offsets[1:].tolist()
+        for i, digest in enumerate(digests):
+            handle = self.handles.get(digest)
+            if handle is None:
+                handle = len(self.records)
+                self.handles[digest] = handle
+                self.records.append(_read_only(records[starts[i]:ends[i]].copy()))
+                if handle == len(self.headers):
+                    self.headers = np.concatenate((self.headers, np.empty_like(self.headers)))
+                self.headers[handle] = headers[i]
+                self.stored_bytes += (ends[i] - starts[i]) * records.dtype.itemsize
+            handles[i] = handle
+
+        self.added += len(digests)
+        self.referenced_bytes += int(offsets[-1] - offsets[0]) * records.dtype.itemsize
+        return handles
+
+
+def _digests(header_struct, headers, records, offsets):
+    record_bytes = memoryview(np.ascontiguousarray(records).view(np.uint8))
+    itemsize = records.dtype.itemsize
+    digests = []
+    for header, start, end in zip(headers, offsets[:-1].tolist(), offsets[1:].tolist()):
+        digest = hashlib.blake2b(header_struct.pack(*header), digest_size=_DIGEST_SIZE)
+        digest.update(record_bytes[start * itemsize:end * itemsize])
+        digests.append(digest.digest())
+    return digests
+
+
+def _genome_arrays(genome):
+    #the (gene_indices, gene_offsets, codons, quadrant_definitions, source_quadrant_indices,
+    #target_quadrant_indices, connection_offsets, connection_genes) of any genome the store accepts
+    if isinstance(genome, NetworkGenome):
+        quadrant_definitions = np.array(genome.quadrant_definitions, dtype=np.uint32)
+        quadrant_definitions = quadrant_definitions.reshape(len(genome.quadrant_definitions), genome.subnetworks_per_quadrant)
+        return (*subnetwork_arrays_from_genes(genome.subnetwork_genes), quadrant_definitions,
+                *connections_arrays_from_blocks(genome.quadrant_connections))
+    if isinstance(genome, ColumnarGenome):
+        return (genome.gene_indices, genome.gene_offsets, columnar_codons(genome), genome.quadrant_definitions,
+                genome.source_quadrant_index, genome.target_quadrant_index, genome.connection_offsets,
+                columnar_connection_genes(genome))
+
+    path = pathlib.Path(genome)
+    subnetwork_arrays = decode_subnetworks(path.joinpath("subnetworks.chr"))
+    quadrant_arrays = decode_quadrants(path.joinpath("quadrants.chr"))
+    connections_arrays = decode_connections(path.joinpath("connections.chr"))
+    return (subnetwork_arrays.gene_indices, subnetwork_arrays.gene_offsets, subnetwork_arrays.codons,
+            quadrant_arrays.subnetwork_indices,
+            connections_arrays.source_quadrant_indices, connections_arrays.target_quadrant_indices,
+            connections_arrays.gene_offsets, connections_arrays.connection_genes)
+
+
+#content-addressed storage shared by a population. every SubnetworkGene (GeneIndex and codons)
+#and every QuadrantConnections block (quadrant pair and connection genes) is hashed as it is
+#added, and identical contents are stored once as immutable arrays. genomes hold only handles
+#into the store, so a population descended from common parents costs little more than its
+#distinct genes
+class GeneStore:
+    def __init__(self):
+        self._genes = _InternTable(np.uint64)
+        self._blocks = _InternTable(np.dtype([("Source", np.uint32), ("Target", np.uint32)]))
+        self._lock = threading.Lock()
+        self.genome_count = 0
+
+    #adds a genome directory, NetworkGenome or ColumnarGenome, returning its StoredGenome.
+    #a genome directory that fails to parse raises NetworkGenome.ChromosomeParseException
+    def add(self, genome):
+        path = getattr(genome, "path", None) if not isinstance(genome, (str, pathlib.PurePath)) else genome
+        gene_indices, gene_offsets, codons, quadrant_definitions, \
+            source_quadrant_indices, target_quadrant_indices, connection_offsets, connection_genes = _genome_arrays(genome)
+
+        #hashing happens outside the lock, so threads adding genomes only contend on the lookups
+        gene_indices = np.asarray(gene_indices, dtype=np.uint64)
+        block_quadrants = np.stack((source_quadrant_indices, target_quadrant_indices), axis=-1).astype(np.uint32)
+        gene_digests = _digests(_GENE_HEADER, gene_indices.reshape(-1, 1).tolist(), codons, gene_offsets)
+        block_digests = _digests(_BLOCK_HEADER, block_quadrants.tolist(), connection_genes, connection_offsets)
+
+        with self._lock:
+            gene_handles = self._genes.intern(gene_digests, gene_indices, codons, gene_offsets)
+            block_headers = block_quadrants.view(self._blocks.headers.dtype).reshape(-1)
+            block_handles = self._blocks.intern(block_digests, block_headers, connection_genes, connection_offsets)
+            self.genome_count += 1
+
+        logger.debug("Stored genome \"%s\": %s genes, %s blocks", path, len(gene_handles), len(block_handles))
+        return StoredGenome(
+            self, path, _read_only(gene_handles),
+            _read_only(np.array(quadrant_definitions, dtype=np.uint32)), _read_only(block_handles))
+
+    def add_many(self, genomes):
+        return [self.add(genome) for genome in genomes]
+
+    #-----CONTENTS-----
+    @property
+    def gene_count(self):
+        return len(self._genes.records)
+
+    @property
+    def block_count(self):
+        return len(self._blocks.records)
+
+    #headers are read under the lock, since adding a genome can replace a header array with a
+    #larger one that is still being filled
+    def gene_indices(self, gene_handles):
+        with self._lock:
+            return self._genes.headers[:len(self._genes.records)][gene_handles]
+
+    def block_quadrants(self, block_handles):
+        #(source, target) quadrant index of every block
+        with self._lock:
+            headers = self._blocks.headers[:len(self._blocks.records)][block_handles]
+        return headers["Source"], headers["Target"]
+
+    def codons(self, gene_handle):
+        #read-only CODON_DTYPE records of one gene
+        return self._genes.records[gene_handle]
+
+    def connection_genes(self, block_handle):
+        return self._blocks.records[block_handle]
+
+    def gene(self, gene_handle):
+        #one SubnetworkGene per handle, shared by every genome that uses it
+        gene = self._genes.objects.get(gene_handle)
+        if gene is None:
+            codons = list(map(numpyparser.CodonRecord._make, self.codons(gene_handle).tolist()))
+            with self._lock:
+                gene_index = int(self._genes.headers[gene_handle])
+            gene = SubnetworkGene(numpyparser.SubnetworkGeneRecord(gene_index, codons, len(codons)))
+            gene = self._genes.objects.setdefault(gene_handle, gene)
+        return gene
+
+    def block(self, block_handle):
+        block = self._blocks.objects.get(block_handle)
+        if block is None:
+            connection_genes = list(map(numpyparser.ConnectionGeneRecord._make, self.connection_genes(block_handle).tolist()))
+            with self._lock:
+                source, target = self._blocks.headers[block_handle].tolist()
+            block = QuadrantConnections(numpyparser.QuadrantConnectionsRecord(
+                connection_genes, len(connection_genes), source, target))
+            block = self._blocks.objects.setdefault(block_handle, block)
+        return block
+
+    def stats(self):
+        #stored bytes are the codon and connection gene records held once each, referenced bytes
+        #what every added genome would have held on its own
+        with self._lock:
+            stored = self._genes.stored_bytes + self._blocks.stored_bytes
+            referenced = self._genes.referenced_bytes + self._blocks.referenced_bytes
+            return {
+                "genomes": self.genome_count,
+                "genes_added": self._genes.added,
+                "unique_genes": self.gene_count,
+                "blocks_added": self._blocks.added,
+                "unique_blocks": self.block_count,
+                "stored_bytes": stored,
+                "referenced_bytes": referenced,
+                "redundancy": referenced / stored if stored else 1.0
+            }
+
+    def __str__(self):
+        stats = self.stats()
+        return f"""GeneStore:
+\tGenome count = {stats["genomes"]}
+\tUnique genes = {stats["unique_genes"]} of {stats["genes_added"]}
+\tUnique blocks = {stats["unique_blocks"]} of {stats["blocks_added"]}
+\tStored bytes = {stats["stored_bytes"]} of {stats["referenced_bytes"]}"""
+
+
+#a genome held as handles into a GeneStore. the gene and block objects it gives out are shared
+#with every other genome of the store, so they shouldn't be modified in place
+class StoredGenome:
+    def __init__(self, store, path, gene_handles, quadrant_definitions, block_handles):
+        self.store = store
+        self.path = path
+        self.gene_handles = gene_handles
+        self.quadrant_definitions = quadrant_definitions
+        self.block_handles = block_handles
+
+    @property
+    def subnetworks_per_quadrant(self):
+        return int(self.quadrant_definitions.shape[1])
+
+    @property
+    def gene_indices(self):
+        return self.store.gene_indices(self.gene_handles)
+
+    @property
+    def subnetwork_genes(self):
+        return [self.store.gene(handle) for handle in self.gene_handles.tolist()]
+
+    @property
+    def quadrant_connections(self):
+        return [self.store.block(handle) for handle in self.block_handles.tolist()]
+
+    def to_genome(self):
+        #a NetworkGenome sharing the store's gene and block objects
+        genome = NetworkGenome(self.path, lazy=True)
+        genome.subnetwork_genes = self.subnetwork_genes
+        genome.quadrant_definitions = self.quadrant_definitions.tolist()
+        genome.subnetworks_per_quadrant = self.subnetworks_per_quadrant
+        genome.quadrant_connections = self.quadrant_connections
+        return genome
+
+    def to_columns(self):
+        gene_handles = self.gene_handles.tolist()
+        block_handles = self.block_handles.tolist()
+        codons = [self.store.codons(handle) for handle in gene_handles]
+        connection_genes = [self.store.connection_genes(handle) for handle in block_handles]
+        source_quadrant_indices, target_quadrant_indices = self.store.block_quadrants(self.block_handles)
+
+        def offsets(runs):
+            result = np.zeros(len(runs) + 1, dtype=np.int64)
+            np.cumsum([len(run) for run in runs], out=result[1:])
+            return result
+
+        return ColumnarGenome.from_arrays(
+            numpyparser.SubnetworkArrays(
+                numpyparser.SUBNETWORK_CHROMOSOME_SUCCESS, 0, len(gene_handles), self.gene_indices, offsets(codons),
+                np.concatenate(codons) if codons else np.empty(0, dtype=numpyparser.CODON_DTYPE)),
+            numpyparser.QuadrantArrays(
+                numpyparser.QUADRANT_CHROMOSOME_SUCCESS, len(self.quadrant_definitions), self.subnetworks_per_quadrant,
+                self.quadrant_definitions),
+            numpyparser.ConnectionsArrays(
+                numpyparser.CONNECTIONS_CHROMOSOME_SUCCESS, 0, len(block_handles),
+                source_quadrant_indices, target_quadrant_indices, offsets(connection_genes),
+                np.concatenate(connection_genes) if connection_genes else np.empty(0, dtype=numpyparser.CONNECTION_GENE_DTYPE))
+        )
+
+    def diff(self, other):
+        #what changed going from this genome to other. only handles are compared, never codons
+        if other.store is not self.store:
+            raise ValueError("Only genomes of the same GeneStore can be diffed")
+
+        added = np.setdiff1d(other.gene_handles, self.gene_handles)
+        removed = np.setdiff1d(self.gene_handles, other.gene_handles)
+        added_indices = self.store.gene_indices(added)
+        removed_indices = self.store.gene_indices(removed)
+        changed = np.intersect1d(added_indices, removed_indices)
+        return GenomeDiff(
+            added_genes=np.setdiff1d(added_indices, changed),
+            removed_genes=np.setdiff1d(removed_indices, changed),
+            changed_genes=changed,
+            added_blocks=np.setdiff1d(other.block_handles, self.block_handles),
+            removed_blocks=np.setdiff1d(self.block_handles, other.block_handles),
+            quadrants_changed=not np.array_equal(self.quadrant_definitions, other.quadrant_definitions)
+        )
+
+    def __str__(self):
+        return f"""StoredGenome:
+\tPath = {self.path}
+\tGene count = {len(self.gene_handles)}
+\tQuadrant count = {len(self.quadrant_definitions)}
+\tQuadrant connections count = {len(self.block_handles)}"""
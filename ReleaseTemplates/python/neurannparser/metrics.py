@@ -0,0 +1,197 @@
+import contextlib
+import os
+import threading
+import time
+
+
+#parser instrumentation. while disabled, every instrumented call gets the shared no-op timer,
+#which costs a few attribute lookups and nothing else. enable() (or setting the environment
+#variable NEURANNPARSER_METRICS=1 before import) switches on per-phase timing and counting.
+#
+#each finished call is folded into a per-kind total, available from snapshot(), and passed as
+#an event dict to every callback added with add_callback
+METRICS_ENVIRONMENT_VARIABLE = "NEURANNPARSER_METRICS"
+
+enabled = os.environ.get(METRICS_ENVIRONMENT_VARIABLE, "") not in ("", "0")
+
+_lock = threading.Lock()
+_totals = {}
+_callbacks = []
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+
+
+def add_callback(callback):
+    #callback(event) runs on the parsing thread after every instrumented call
+    with _lock:
+        _callbacks.append(callback)
+
+
+def remove_callback(callback):
+    with _lock:
+        _callbacks.remove(callback)
+
+
+def snapshot():
+    #per-kind totals: calls, errors by return code, seconds by phase, and counts of the bytes
+    #read and records and python objects built
+    with _lock:
+        return {
+            kind: {
+                "calls": total["calls"],
+                "errors": dict(total["errors"]),
+                "seconds": dict(total["seconds"]),
+                "counts": dict(total["counts"]),
+            }
+            for kind, total in _totals.items()
+        }
+
+
+@contextlib.contextmanager
+def profile(stats_path=None):
+    #runs the block under cProfile, yielding the profiler. the stats are also dumped to
+    #stats_path where given, for pstats or snakeviz
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if stats_path is not None:
+            profiler.dump_stats(stats_path)
+
+
+
+#-----COUNTS-----
+def _subnetwork_counts(result):
+    codons = sum(gene.codon_count for gene in result.genes)
+    return {"genes": len(result.genes), "codons": codons, "objects": len(result.genes) + codons}
+
+
+def _quadrant_counts(result):
+    entries = len(result.quadrants) * result.subnetworks_per_quadrant
+    return {"quadrants": len(result.quadrants), "quadrant_entries": entries, "objects": len(result.quadrants) + entries}
+
+
+def _connections_counts(result):
+    blocks = result.quadrant_connections_array
+    connection_genes = sum(block.connection_gene_count for block in blocks)
+    return {"quadrant_connections": len(blocks), "connection_genes": connection_genes,
+            "objects": len(blocks) + connection_genes}
+
+
+def _result_counts(result):
+    #the counts of any parse result, by what it contains rather than its type, so this module
+    #doesn't need to import networkparser
+    if hasattr(result, "parse_result"):
+        return _result_counts(result.parse_result) if result.parse_result is not None else {}
+    if hasattr(result, "genes"):
+        return _subnetwork_counts(result)
+    if hasattr(result, "quadrants"):
+        return _quadrant_counts(result)
+    if hasattr(result, "quadrant_connections_array"):
+        return _connections_counts(result)
+    return {}
+
+
+def _error(result, return_code):
+    #the name of the failing return code, looking through generic results to the chromosome
+    #they were parsed as
+    if result is not None and hasattr(result, "parse_result"):
+        if result.parse_result is None:
+            return return_code.name
+        return _error(result.parse_result, result.parse_result.return_code)
+    if return_code is not None and return_code.value != 0:
+        return return_code.name
+    return None
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError, ValueError):
+        return 0
+
+
+
+#-----TIMERS-----
+class _NullTimer:
+    def lap(self, phase):
+        pass
+
+    def finish(self, result=None, return_code=None, counts=None):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class PhaseTimer:
+    def __init__(self, kind, path):
+        self.kind = kind
+        self.path = path
+        self.seconds = {}
+        self._start = time.perf_counter()
+        self._last = self._start
+
+    def lap(self, phase):
+        #attributes the time since the previous lap (or the start) to phase
+        now = time.perf_counter()
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def finish(self, result=None, return_code=None, counts=None):
+        #return_code and counts are taken from result unless given
+        self.seconds["total"] = time.perf_counter() - self._start
+        if return_code is None and result is not None:
+            return_code = result.return_code
+        error = _error(result, return_code)
+        if counts is None:
+            counts = _result_counts(result) if result is not None and error is None else {}
+        if self.path is not None and self.kind != "network_genome":
+            counts = dict(counts, bytes=_file_size(self.path))
+
+        event = {
+            "kind": self.kind,
+            "path": None if self.path is None else os.fspath(self.path),
+            "return_code": None if return_code is None else return_code.name,
+            "error": error,
+            "seconds": self.seconds,
+            "counts": counts,
+        }
+
+        with _lock:
+            total = _totals.setdefault(self.kind, {"calls": 0, "errors": {}, "seconds": {}, "counts": {}})
+            total["calls"] += 1
+            if error is not None:
+                total["errors"][error] = total["errors"].get(error, 0) + 1
+            for phase, seconds in self.seconds.items():
+                total["seconds"][phase] = total["seconds"].get(phase, 0.0) + seconds
+            for name, count in counts.items():
+                total["counts"][name] = total["counts"].get(name, 0) + count
+            callbacks = list(_callbacks)
+
+        for callback in callbacks:
+            callback(event)
+
+
+def timer(kind, path=None):
+    #a PhaseTimer for one instrumented call, or the shared no-op timer while disabled
+    if not enabled:
+        return _NULL_TIMER
+    return PhaseTimer(kind, path)
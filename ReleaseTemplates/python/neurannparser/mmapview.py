@@ -0,0 +1,269 @@
+import mmap
+import os
+
+import numpy as np
+
+from . import numpyparser
+from .networkparser import \
+    SubnetworkChromosomeParseResult, \
+    QuadrantChromosomeParseResult, \
+    ConnectionsChromosomeParseResult, \
+    logger
+
+
+def _map_file(path):
+    #returns the read-only mapping, an empty buffer for empty files, or None for a bad path
+    try:
+        with open(path, "rb") as chromosome_file:
+            try:
+                return mmap.mmap(chromosome_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                #empty files can't be mapped, but still need to report as short
+                return b""
+    except OSError:
+        return None
+
+
+def _current_sidecar(path, magic):
+    #the chromosome's .idx sidecar (see geneindex.py) where one exists and still matches the
+    #file, otherwise None. none is built here, since building one walks the same headers
+    from .geneindex import ChromosomeIndex, INDEX_SUFFIX
+
+    index = ChromosomeIndex.read(os.fspath(path) + INDEX_SUFFIX)
+    if index is None or index.magic != magic:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return index if index.is_current(stat) else None
+
+
+class _MappedChromosome:
+    def __init__(self, path):
+        self.path = path
+        self._mapping = _map_file(path)
+
+    def close(self):
+        #raises BufferError if any gene or codon views are still alive
+        if isinstance(self._mapping, mmap.mmap):
+            self._mapping.close()
+        self._mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+
+#-----SUBNETWORK CHROMOSOME-----
+class MappedSubnetworkGene:
+    def __init__(self, gene_index, codons):
+        self.gene_index = gene_index
+        self.codon_count = len(codons)
+        self.codons = codons
+
+    def __repr__(self):
+        return f"{self.gene_index}, {self.codon_count} codons (mapped)"
+
+
+#opening reads the gene offsets from a current .chr.idx sidecar (see write_gene_index) in one
+#read, milliseconds even for millions of genes. without one, every gene header is walked in
+#python, which is O(genes): around half a second per million genes
+class MappedSubnetworkChromosome(_MappedChromosome):
+    def __init__(self, path):
+        super().__init__(path)
+        self.gene_indices = np.empty(0, dtype=np.uint64)
+        self.codon_counts = np.empty(0, dtype=np.uint32)
+        self.codon_starts = np.empty(0, dtype=np.int64)
+
+        if self._mapping is None:
+            self.return_code = SubnetworkChromosomeParseResult.Retcodes.BAD_PATH
+            self.additional_info = -1
+            self.gene_count = 0
+        else:
+            #only the gene headers are read; codon pages are faulted in as the views are used
+            index = self.__sidecar_index(path) or numpyparser.index_subnetwork_genes(self._mapping)
+            self.return_code = SubnetworkChromosomeParseResult.Retcodes(index.return_code)
+            self.additional_info = index.additional_info
+            self.gene_count = index.gene_count
+
+            if self.return_code == SubnetworkChromosomeParseResult.Retcodes.SUCCESS:
+                self.gene_indices = index.gene_indices
+                self.codon_counts = index.codon_counts
+                self.codon_starts = index.codon_starts
+
+        if self.return_code == SubnetworkChromosomeParseResult.Retcodes.SUCCESS:
+            logger.debug("Finished mapping subnetwork chromosome \"%s\": %s genes found", path, self.gene_count)
+        else:
+            logger.error(f"Error mapping subnetwork chromosome \"{path}\": {self.return_code}. {self.gene_count} genes found, additional info: {self.additional_info}")
+
+    def __sidecar_index(self, path):
+        from .geneindex import SUBNETWORK_INDEX_MAGIC, _SUBNETWORK_GENE_HEADER_SIZE
+
+        sidecar = _current_sidecar(path, SUBNETWORK_INDEX_MAGIC)
+        if sidecar is None:
+            return None
+        #the count fields are used as views into the sidecar records, only the offsets are copied
+        records = sidecar.records
+        return numpyparser.SubnetworkIndex(
+            numpyparser.SUBNETWORK_CHROMOSOME_SUCCESS, -1, len(records),
+            records["GeneIndex"],
+            records["CodonCount"],
+            records["Offset"].astype(np.int64) + _SUBNETWORK_GENE_HEADER_SIZE
+        )
+
+    def codons(self, i):
+        return np.frombuffer(
+            self._mapping,
+            dtype=numpyparser.CODON_DTYPE,
+            count=int(self.codon_counts[i]),
+            offset=int(self.codon_starts[i])
+        )
+
+    def __len__(self):
+        return len(self.gene_indices)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("gene index out of range")
+        return MappedSubnetworkGene(int(self.gene_indices[i]), self.codons(i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def genes(self):
+        return self
+
+    def __str__(self):
+        return f"""MappedSubnetworkChromosome:
+\tReturn code = {self.return_code}
+\tAdditional info = {self.additional_info}
+\tGene count = {self.gene_count}"""
+
+
+
+#-----QUADRANT CHROMOSOME-----
+class MappedQuadrantChromosome(_MappedChromosome):
+    def __init__(self, path):
+        super().__init__(path)
+        self.quadrants = np.empty((0, 0), dtype=np.uint32)
+
+        if self._mapping is None:
+            self.return_code = QuadrantChromosomeParseResult.Retcodes.BAD_PATH
+            self.quadrant_count = 0
+            self.subnetworks_per_quadrant = 0
+        else:
+            arrays = numpyparser.decode_quadrant_chromosome(self._mapping)
+            self.return_code = QuadrantChromosomeParseResult.Retcodes(arrays.return_code)
+            self.quadrant_count = arrays.quadrant_count
+            self.subnetworks_per_quadrant = arrays.subnetworks_per_quadrant
+
+            if self.return_code == QuadrantChromosomeParseResult.Retcodes.SUCCESS:
+                self.quadrants = arrays.subnetwork_indices
+
+        if self.return_code == QuadrantChromosomeParseResult.Retcodes.SUCCESS:
+            logger.debug("Finished mapping quadrant chromosome \"%s\": %s quadrants found, %s subnetworks per quadrant", path, self.quadrant_count, self.subnetworks_per_quadrant)
+        else:
+            logger.error(f"Error mapping quadrant chromosome \"{path}\": {self.return_code}. {self.quadrant_count} quadrants found, {self.subnetworks_per_quadrant} subnetworks per quadrant")
+
+    def close(self):
+        #the quadrant table is itself a view into the mapping
+        self.quadrants = None
+        super().close()
+
+
+
+#-----CONNECTIONS CHROMOSOME-----
+class MappedQuadrantConnections:
+    def __init__(self, source_quadrant_index, target_quadrant_index, connection_genes):
+        self.source_quadrant_index = source_quadrant_index
+        self.target_quadrant_index = target_quadrant_index
+        self.connection_gene_count = len(connection_genes)
+        self.connection_genes = connection_genes
+
+    def __repr__(self):
+        return f"{self.source_quadrant_index}->{self.target_quadrant_index}: {self.connection_gene_count} (mapped)"
+
+
+#as with subnetworks, block offsets come from a current sidecar where there is one, and from
+#an O(blocks) walk of the block headers otherwise
+class MappedConnectionsChromosome(_MappedChromosome):
+    def __init__(self, path):
+        super().__init__(path)
+        self.source_quadrant_indices = np.empty(0, dtype=np.uint32)
+        self.target_quadrant_indices = np.empty(0, dtype=np.uint32)
+        self.connection_gene_counts = np.empty(0, dtype=np.uint32)
+        self.gene_starts = np.empty(0, dtype=np.int64)
+
+        if self._mapping is None:
+            self.return_code = ConnectionsChromosomeParseResult.Retcodes.BAD_PATH
+            self.additional_info = -1
+            self.quadrant_connections_count = 0
+        else:
+            index = self.__sidecar_index(path) or numpyparser.index_quadrant_connections(self._mapping)
+            self.return_code = ConnectionsChromosomeParseResult.Retcodes(index.return_code)
+            self.additional_info = index.additional_info
+            self.quadrant_connections_count = index.quadrant_connections_count
+
+            if self.return_code == ConnectionsChromosomeParseResult.Retcodes.SUCCESS:
+                self.source_quadrant_indices = index.source_quadrant_indices
+                self.target_quadrant_indices = index.target_quadrant_indices
+                self.connection_gene_counts = index.connection_gene_counts
+                self.gene_starts = index.gene_starts
+
+        if self.return_code == ConnectionsChromosomeParseResult.Retcodes.SUCCESS:
+            logger.debug("Finished mapping connections chromosome \"%s\": %s Quadrant connections found", path, self.quadrant_connections_count)
+        else:
+            logger.error(f"Error mapping connections chromosome \"{path}\": {self.return_code}, Additional info = {self.additional_info}")
+
+    def __sidecar_index(self, path):
+        from .geneindex import CONNECTIONS_INDEX_MAGIC, _QUADRANT_CONNECTIONS_HEADER_SIZE
+
+        sidecar = _current_sidecar(path, CONNECTIONS_INDEX_MAGIC)
+        if sidecar is None:
+            return None
+        records = sidecar.records
+        return numpyparser.ConnectionsIndex(
+            numpyparser.CONNECTIONS_CHROMOSOME_SUCCESS, -1, len(records),
+            records["SourceQuadrantIndex"],
+            records["TargetQuadrantIndex"],
+            records["ConnectionGeneCount"],
+            records["Offset"].astype(np.int64) + _QUADRANT_CONNECTIONS_HEADER_SIZE
+        )
+
+    def connection_genes(self, i):
+        return np.frombuffer(
+            self._mapping,
+            dtype=numpyparser.CONNECTION_GENE_DTYPE,
+            count=int(self.connection_gene_counts[i]),
+            offset=int(self.gene_starts[i])
+        )
+
+    def __len__(self):
+        return len(self.source_quadrant_indices)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("quadrant connections index out of range")
+        return MappedQuadrantConnections(
+            int(self.source_quadrant_indices[i]),
+            int(self.target_quadrant_indices[i]),
+            self.connection_genes(i)
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def quadrant_connections_array(self):
+        return self
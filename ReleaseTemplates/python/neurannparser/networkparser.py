@@ -1,9 +1,10 @@
 import ctypes
-import pathlib
 import os.path
 
 from enum import Enum
 
+from . import backends, metrics
+
 import logging
 logger = logging.getLogger("NetworkParser")
 
@@ -13,11 +14,12 @@ TARGET_TYPE_HIDDEN =  0b00000100
 TARGET_TYPE_OUTPUT =  0b00001000
 
 
-#load the dll on import
-logger.info("Loading library file")
-libpath = os.path.join(os.path.dirname(os.path.realpath(__file__)), "NetworkParser.dll")
-__network_parser_dll = ctypes.cdll.LoadLibrary(libpath)
-logger.info("Library file loaded.")
+#the parser backend (NetworkParser.dll or the pure numpy parser) is only chosen and loaded
+#the first time a chromosome is parsed, see backends.py
+def __getattr__(name):
+    if name == "BACKEND":
+        return backends.backend_name()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 
@@ -126,7 +128,7 @@ class SubnetworkChromosomeParseResult:
             for c_gene in c_result.Genes[:self.gene_count]:
                 self.genes.append(SubnetworkGene(c_gene))
 
-            logger.debug(f"Finished parsing subnetwork chromosome \"{path}\": {self.gene_count} genes found, additional info = {self.additional_info}")
+            logger.debug("Finished parsing subnetwork chromosome \"%s\": %s genes found, additional info = %s", path, self.gene_count, self.additional_info)
                 
         else:
             logger.error(f"Error parsing subnetwork chromosome \"{path}\": {self.return_code}. {self.gene_count} genes found, additional info: {self.additional_info}")
@@ -139,36 +141,38 @@ class SubnetworkChromosomeParseResult:
 \tFirst gene slice = {self.genes[:1]}"""
     
 
-    @staticmethod
-    def from_file(path):
-        global _parse_subnetwork_chromosome
-        global _free_subnetwork_parse_result
+    def to_file(self, path):
+        #writes the chromosome back out in the layout from_file reads
+        from .chromosomewriter import write_subnetwork_chromosome
 
+        logger.debug("Writing subnetwork chromosome \"%s\"", path)
+        write_subnetwork_chromosome(path, self.genes)
 
-        logger.debug(f"Attempting to parse subnetwork chromosome \"{path}\"")
-        c_result = _parse_subnetwork_chromosome(bytes(path, "ASCII"))
+    @staticmethod
+    def from_file(path):
+        timer = metrics.timer("subnetworks", path)
+        logger.debug("Attempting to parse subnetwork chromosome \"%s\"", path)
+        backend = backends.get_backend()
+        c_result = backend.parse_subnetwork_chromosome(bytes(os.fspath(path), "ASCII"))
+        timer.lap("parse")
         result = SubnetworkChromosomeParseResult(c_result, path=path)
+        timer.lap("construct")
 
-        logger.debug(f"Freeing C_SubnetworkChromosomeParseResult for \"{path}\"")
-        _free_subnetwork_parse_result(c_result)
-        logger.debug(f"Freed C_SubnetworkChromosomeParseResult for \"{path}\"")
+        logger.debug("Freeing C_SubnetworkChromosomeParseResult for \"%s\"", path)
+        backend.free_subnetwork_parse_result(c_result)
+        logger.debug("Freed C_SubnetworkChromosomeParseResult for \"%s\"", path)
+        timer.lap("free")
 
+        timer.finish(result)
         return result
 
+    @staticmethod
+    def from_mmap(path):
+        #maps the file rather than reading it, exposing its contents as read-only numpy views
+        from .mmapview import MappedSubnetworkChromosome
 
-#now that the types have been defined, set up our library functions
-logger.info("Preparing subnetwork chromosome library functions")
-_parse_subnetwork_chromosome = __network_parser_dll.ParseSubnetworkChromosome
-_parse_subnetwork_chromosome.restype = C_SubnetworkChromosomeParseResult
-_parse_subnetwork_chromosome.argtypes = [
-    ctypes.c_char_p 
-]
-
-_free_subnetwork_parse_result = __network_parser_dll.FreeSubnetworkParseResult
-_free_subnetwork_parse_result.argtypes = [
-    C_SubnetworkChromosomeParseResult
-]
-logger.info("Prepared subnetwork chromosome library functions")
+        logger.debug("Attempting to map subnetwork chromosome \"%s\"", path)
+        return MappedSubnetworkChromosome(path)
 
 
 
@@ -200,7 +204,7 @@ class QuadrantChromosomeParseResult:
                 [c_result.SubnetworkIndices[i][j] for j in range(self.subnetworks_per_quadrant)] 
                 for i in range(self.quadrant_count)
             ]
-            logger.debug(f"Finished parsing quadrant chromosome \"{path}\": {self.quadrant_count} quadrants found, {self.subnetworks_per_quadrant} subnetworks per quadrant")
+            logger.debug("Finished parsing quadrant chromosome \"%s\": %s quadrants found, %s subnetworks per quadrant", path, self.quadrant_count, self.subnetworks_per_quadrant)
         
         else:
             logger.error(f"Error parsing quadrant chromosome \"{path}\": {self.return_code}. {self.quadrant_count} quadrants found, {self.subnetworks_per_quadrant} subnetworks per quadrant")
@@ -213,35 +217,38 @@ class QuadrantChromosomeParseResult:
 \tQuadrant count: {self.quadrant_count}
 \tFirst quadrant slice: {self.quadrants[:1]}"""
     
-    @staticmethod
-    def from_file(path):
-        global _parse_quadrant_chromosome
-        global _free_quadrant_parse_result
+    def to_file(self, path):
+        #writes the chromosome back out in the layout from_file reads
+        from .chromosomewriter import write_quadrant_chromosome
 
+        logger.debug("Writing quadrant chromosome \"%s\"", path)
+        write_quadrant_chromosome(path, self.quadrants, self.subnetworks_per_quadrant)
 
-        logger.debug(f"Attempting to parse quadrant chromosome \"{path}\"")
-        c_result = _parse_quadrant_chromosome(bytes(path, "ASCII"))
+    @staticmethod
+    def from_file(path):
+        timer = metrics.timer("quadrants", path)
+        logger.debug("Attempting to parse quadrant chromosome \"%s\"", path)
+        backend = backends.get_backend()
+        c_result = backend.parse_quadrant_chromosome(bytes(os.fspath(path), "ASCII"))
+        timer.lap("parse")
         result = QuadrantChromosomeParseResult(c_result, path=path)
+        timer.lap("construct")
 
-        logger.debug(f"Freeing C_QuadrantChromosomeParseResult for \"{path}\"")
-        _free_quadrant_parse_result(c_result)
-        logger.debug(f"Freed C_QuadrantChromosomeParseResult for \"{path}\"")
+        logger.debug("Freeing C_QuadrantChromosomeParseResult for \"%s\"", path)
+        backend.free_quadrant_parse_result(c_result)
+        logger.debug("Freed C_QuadrantChromosomeParseResult for \"%s\"", path)
+        timer.lap("free")
 
+        timer.finish(result)
         return result
 
+    @staticmethod
+    def from_mmap(path):
+        #maps the file rather than reading it, exposing its contents as read-only numpy views
+        from .mmapview import MappedQuadrantChromosome
 
-logger.info("Preparing quadrant chromosome library functions")
-_parse_quadrant_chromosome = __network_parser_dll.ParseQuadrantChromosome
-_parse_quadrant_chromosome.restype = C_QuadrantChromosomeParseResult
-_parse_quadrant_chromosome.argtypes = [
-    ctypes.c_char_p
-]
-
-_free_quadrant_parse_result = __network_parser_dll.FreeQuadrantParseResult
-_free_quadrant_parse_result.argtypes = [
-    C_QuadrantChromosomeParseResult
-]
-logger.info("Prepared quadrant chromosome library functions")
+        logger.debug("Attempting to map quadrant chromosome \"%s\"", path)
+        return MappedQuadrantChromosome(path)
 
 
 
@@ -329,7 +336,7 @@ class ConnectionsChromosomeParseResult:
                 QuadrantConnections(c_cr)
                 for c_cr in c_result.QuadrantConnectionsArray[:self.quadrant_connections_count]
             ]
-            logger.debug(f"Finished parsing connections chromosome \"{path}\": {self.quadrant_connections_count} Quadrant connections found")
+            logger.debug("Finished parsing connections chromosome \"%s\": %s Quadrant connections found", path, self.quadrant_connections_count)
 
         else:
             logger.error(f"Error parsing connections chromosome \"{path}\": {self.return_code}, Additional info = {self.additional_info}")
@@ -342,35 +349,44 @@ class ConnectionsChromosomeParseResult:
 \tFirst quadrant connections slice: {self.quadrant_connections_array[:1]}
 """
 
-    @staticmethod
-    def from_file(path):
-        global _parse_connections_chromosome
-        global _free_connections_parse_result
+    def to_file(self, path):
+        #writes the chromosome back out in the layout from_file reads
+        from .chromosomewriter import write_connections_chromosome
 
+        logger.debug("Writing connections chromosome \"%s\"", path)
+        write_connections_chromosome(path, self.quadrant_connections_array)
 
-        logger.debug(f"Attempting to parse connections chromosome \"{path}\"")
-        c_result = _parse_connections_chromosome(bytes(path, "ASCII"))
+    def adjacency(self):
+        #index of the connection genes by source, target and quadrant pair, see adjacency.ConnectionAdjacency
+        from .adjacency import ConnectionAdjacency
+
+        return ConnectionAdjacency.from_result(self)
+
+    @staticmethod
+    def from_file(path):
+        timer = metrics.timer("connections", path)
+        logger.debug("Attempting to parse connections chromosome \"%s\"", path)
+        backend = backends.get_backend()
+        c_result = backend.parse_connections_chromosome(bytes(os.fspath(path), "ASCII"))
+        timer.lap("parse")
         result = ConnectionsChromosomeParseResult(c_result, path=path)
+        timer.lap("construct")
 
-        logger.debug(f"Freeing C_ConnectionsChromosomeParseResult for \"{path}\"")
-        _free_connections_parse_result(c_result)
-        logger.debug(f"Freed C_ConnectionsChromosomeParseResult for \"{path}\"")
+        logger.debug("Freeing C_ConnectionsChromosomeParseResult for \"%s\"", path)
+        backend.free_connections_parse_result(c_result)
+        logger.debug("Freed C_ConnectionsChromosomeParseResult for \"%s\"", path)
+        timer.lap("free")
 
+        timer.finish(result)
         return result
 
+    @staticmethod
+    def from_mmap(path):
+        #maps the file rather than reading it, exposing its contents as read-only numpy views
+        from .mmapview import MappedConnectionsChromosome
 
-logger.info("Preparing quadrant chromosome library functions")
-_parse_connections_chromosome = __network_parser_dll.ParseConnectionsChromosome
-_parse_connections_chromosome.restype = C_ConnectionsChromosomeParseResult
-_parse_connections_chromosome.argtypes = [
-    ctypes.c_char_p
-]
-
-_free_connections_parse_result = __network_parser_dll.FreeConnectionsParseResult
-_free_connections_parse_result.argtypes = [
-    C_ConnectionsChromosomeParseResult
-]
-logger.info("Prepared quadrant chromosome library functions")
+        logger.debug("Attempting to map connections chromosome \"%s\"", path)
+        return MappedConnectionsChromosome(path)
 
 
 
@@ -402,90 +418,248 @@ class GenericChromosomeParseResult:
         self.parse_result = None
 
         if self.return_code == GenericChromosomeParseResult.Retcodes.SUBNETWORKS:
-            self.parse_result = SubnetworkChromosomeParseResult(c_result.ParseResult.SCPR)
-            logger.debug(f"Finished parsing generic chromosome as subnetworks chromosome \"{path}\"")
+            self.parse_result = SubnetworkChromosomeParseResult(c_result.ParseResult.SCPR, path=path)
+            logger.debug("Finished parsing generic chromosome as subnetworks chromosome \"%s\"", path)
         elif self.return_code == GenericChromosomeParseResult.Retcodes.QUADRANTS:
-            self.parse_result = QuadrantChromosomeParseResult(c_result.ParseResult.QCPR)
-            logger.debug(f"Finished parsing generic chromosome as quadrants chromosome \"{path}\"")
+            self.parse_result = QuadrantChromosomeParseResult(c_result.ParseResult.QCPR, path=path)
+            logger.debug("Finished parsing generic chromosome as quadrants chromosome \"%s\"", path)
         elif self.return_code == GenericChromosomeParseResult.Retcodes.CONNECTIONS:
-            self.parse_result = ConnectionsChromosomeParseResult(c_result.ParseResult.CCPR)
-            logger.debug(f"Finished parsing generic chromosome as connections chromosome \"{path}\"")
+            self.parse_result = ConnectionsChromosomeParseResult(c_result.ParseResult.CCPR, path=path)
+            logger.debug("Finished parsing generic chromosome as connections chromosome \"%s\"", path)
         else:
             logger.error(f"Error parsing generic chromosome \"{path}\": {self.return_code}")
 
 
     @staticmethod
     def from_file(path):
-        global _parse_generic_chromosome
-        global _free_subnetwork_parse_result
-        global _free_quadrant_parse_result
-        global _free_connections_parse_result
-
-        logger.debug(f"Attempting to parse generic chromosome \"{path}\"")
-        c_result = _parse_generic_chromosome(bytes(path, "ASCII"))
+        timer = metrics.timer("generic", path)
+        logger.debug("Attempting to parse generic chromosome \"%s\"", path)
+        backend = backends.get_backend()
+        c_result = backend.parse_generic_chromosome(bytes(os.fspath(path), "ASCII"))
+        timer.lap("parse")
         result = GenericChromosomeParseResult(c_result, path=path)
+        timer.lap("construct")
 
         #freeing the result depends on the result type
         if result.return_code == GenericChromosomeParseResult.Retcodes.SUBNETWORKS:
-            _free_subnetwork_parse_result(c_result.ParseResult.SCPR)
+            backend.free_subnetwork_parse_result(c_result.ParseResult.SCPR)
         elif result.return_code == GenericChromosomeParseResult.Retcodes.QUADRANTS:
-            _free_quadrant_parse_result(c_result.ParseResult.QCPR)
+            backend.free_quadrant_parse_result(c_result.ParseResult.QCPR)
         elif result.return_code == GenericChromosomeParseResult.Retcodes.CONNECTIONS:
-            _free_connections_parse_result(c_result.ParseResult.CCPR)
+            backend.free_connections_parse_result(c_result.ParseResult.CCPR)
 
         #if the result didn't end up in anything relevant, don't free it.
         #there weren't any allocations made that GC won't catch.
+        timer.lap("free")
 
+        timer.finish(result)
         return result
 
+    @staticmethod
+    def from_buffer(buffer, path="No path provided"):
+        #parses a chromosome already read into memory, sniffing and decoding the same bytes.
+        #the native library only parses from a path, so buffers are always decoded with numpy
+        from .numpyparser import parse_generic_buffer
+
+        timer = metrics.timer("generic", path)
+        logger.debug("Attempting to parse generic chromosome buffer \"%s\"", path)
+        c_result = parse_generic_buffer(buffer)
+        timer.lap("parse")
+        result = GenericChromosomeParseResult(c_result, path=path)
+        timer.lap("construct")
+
+        timer.finish(result)
+        return result
 
-logger.info("Preparing generic chromosome library functions")
-_parse_generic_chromosome = __network_parser_dll.ParseGenericChromosome
-_parse_generic_chromosome.restype = C_GenericChromosomeParseResult
-_parse_generic_chromosome.argtypes = [
-    ctypes.c_char_p
-]
-logger.info("Prepared generic chromosome library functions")
 
 
+#placeholder for chromosomes a lazy NetworkGenome hasn't parsed yet
+_NOT_PARSED = object()
 
 #helper class that stores all aspects of a network's genome
 class NetworkGenome:
     class ChromosomeParseException(Exception):
-        pass
-
-    def __init__(self, path):
-        self.__parse_subnetworks(path)
-        self.__parse_quadrants(path)
-        self.__parse_connections(path)
+        #return_code and additional_info are those of the failed parse, where known
+        def __init__(self, message, return_code=None, additional_info=None):
+            super().__init__(message)
+            self.return_code = return_code
+            self.additional_info = additional_info
+
+        def __reduce__(self):
+            return (type(self), (str(self), self.return_code, self.additional_info))
+
+    #cache is an optional parsecache.ParseCache. genomes loaded through the same cache share
+    #their gene lists with each other, so they shouldn't be modified in place.
+    #with lazy=True each chromosome is only parsed the first time one of its attributes is
+    #accessed, and any ChromosomeParseException is raised from that access instead
+    def __init__(self, path, cache=None, lazy=False):
+        self.path = path
+        self.__cache = cache
+        self.__subnetwork_genes = _NOT_PARSED
+        self.__quadrant_definitions = _NOT_PARSED
+        self.__subnetworks_per_quadrant = _NOT_PARSED
+        self.__quadrant_connections = _NOT_PARSED
+
+        if not lazy:
+            self.preload()
+
+    #coroutine giving a fully loaded genome, parsed off the event loop. see
+    #asyncloader.load_genome_async
+    @staticmethod
+    async def aload(path, cache=None, executor=None):
+        from .asyncloader import load_genome_async
+
+        return await load_genome_async(path, cache, executor)
+
+    def preload(self):
+        #parses anything not yet parsed, giving the eager behaviour of a non-lazy genome
+        timer = metrics.timer("network_genome", self.path)
+        try:
+            if self.__subnetwork_genes is _NOT_PARSED:
+                self.__parse_subnetworks(self.path)
+                timer.lap("subnetworks")
+            if self.__quadrant_definitions is _NOT_PARSED:
+                self.__parse_quadrants(self.path)
+                timer.lap("quadrants")
+            if self.__quadrant_connections is _NOT_PARSED:
+                self.__parse_connections(self.path)
+                timer.lap("connections")
+        except NetworkGenome.ChromosomeParseException as e:
+            timer.finish(return_code=e.return_code)
+            raise
+
+        if metrics.enabled:
+            timer.finish(return_code=None, counts=self.__counts())
+        return self
+
+    def __counts(self):
+        codons = sum(gene.codon_count for gene in self.subnetwork_genes)
+        connection_genes = sum(block.connection_gene_count for block in self.quadrant_connections)
+        return {
+            "genes": len(self.subnetwork_genes),
+            "codons": codons,
+            "quadrants": len(self.quadrant_definitions),
+            "quadrant_connections": len(self.quadrant_connections),
+            "connection_genes": connection_genes
+        }
+
+    @property
+    def subnetwork_genes(self):
+        if self.__subnetwork_genes is _NOT_PARSED:
+            self.__parse_subnetworks(self.path)
+        return self.__subnetwork_genes
+
+    @subnetwork_genes.setter
+    def subnetwork_genes(self, subnetwork_genes):
+        self.__subnetwork_genes = subnetwork_genes
+
+    @property
+    def quadrant_definitions(self):
+        if self.__quadrant_definitions is _NOT_PARSED:
+            self.__parse_quadrants(self.path)
+        return self.__quadrant_definitions
+
+    @quadrant_definitions.setter
+    def quadrant_definitions(self, quadrant_definitions):
+        self.__quadrant_definitions = quadrant_definitions
+
+    @property
+    def subnetworks_per_quadrant(self):
+        if self.__subnetworks_per_quadrant is _NOT_PARSED:
+            self.__parse_quadrants(self.path)
+        return self.__subnetworks_per_quadrant
+
+    @subnetworks_per_quadrant.setter
+    def subnetworks_per_quadrant(self, subnetworks_per_quadrant):
+        self.__subnetworks_per_quadrant = subnetworks_per_quadrant
+
+    @property
+    def quadrant_connections(self):
+        if self.__quadrant_connections is _NOT_PARSED:
+            self.__parse_connections(self.path)
+        return self.__quadrant_connections
+
+    @quadrant_connections.setter
+    def quadrant_connections(self, quadrant_connections):
+        self.__quadrant_connections = quadrant_connections
+
+    def __from_file(self, result_class, path):
+        if self.__cache is not None:
+            return self.__cache.parse(result_class, path)
+        return result_class.from_file(path)
 
     def __parse_subnetworks(self, path):
-        subnetworks_path = pathlib.Path.joinpath(path, "subnetworks.chr")
-        subnetworks_result = SubnetworkChromosomeParseResult.from_file(subnetworks_path)
+        subnetworks_path = os.path.join(path, "subnetworks.chr")
+        subnetworks_result = self.__from_file(SubnetworkChromosomeParseResult, subnetworks_path)
 
         if subnetworks_result.return_code == SubnetworkChromosomeParseResult.Retcodes.SUCCESS:
             self.subnetwork_genes = subnetworks_result.genes
         else:
             exception_message = f"{subnetworks_result.return_code}: Additional info = {subnetworks_result.additional_info}"
-            raise NetworkGenome.ChromosomeParseException(exception_message)
+            raise NetworkGenome.ChromosomeParseException(
+                exception_message, subnetworks_result.return_code, subnetworks_result.additional_info)
         
     def __parse_quadrants(self, path):
-        quadrants_path = pathlib.Path.joinpath(path, "quadrants.chr")
-        quadrants_result = QuadrantChromosomeParseResult.from_file(quadrants_path)
+        quadrants_path = os.path.join(path, "quadrants.chr")
+        quadrants_result = self.__from_file(QuadrantChromosomeParseResult, quadrants_path)
 
         if quadrants_result.return_code == QuadrantChromosomeParseResult.Retcodes.SUCCESS:
             self.quadrant_definitions = quadrants_result.quadrants
             self.subnetworks_per_quadrant = quadrants_result.subnetworks_per_quadrant
         else:
             exception_message = f"{quadrants_result.return_code}"
-            raise NetworkGenome.ChromosomeParseException(exception_message)
+            raise NetworkGenome.ChromosomeParseException(exception_message, quadrants_result.return_code)
 
     def __parse_connections(self, path):
-        connections_path = pathlib.Path.joinpath(path, "connections.chr")
-        connections_result = ConnectionsChromosomeParseResult.from_file(connections_path)
+        connections_path = os.path.join(path, "connections.chr")
+        connections_result = self.__from_file(ConnectionsChromosomeParseResult, connections_path)
 
         if connections_result.return_code == ConnectionsChromosomeParseResult.Retcodes.SUCCESS:
             self.quadrant_connections = connections_result.quadrant_connections_array
         else:
             exception_message = f"{connections_result.return_code}: Additional info = {connections_result.additional_info}"
-            raise NetworkGenome.ChromosomeParseException(exception_message)
+            raise NetworkGenome.ChromosomeParseException(
+                exception_message, connections_result.return_code, connections_result.additional_info)
+
+    @staticmethod
+    def from_arrays(path, subnetwork_arrays, quadrant_arrays, connections_arrays):
+        #builds a genome from already decoded numpyparser arrays. every chromosome is assigned up
+        #front, so the lazy genome never goes looking for files at path
+        from . import numpyparser
+
+        genome = NetworkGenome(path, lazy=True)
+        genome.subnetwork_genes = SubnetworkChromosomeParseResult(
+            numpyparser.subnetwork_record(subnetwork_arrays), path=path).genes
+        quadrants_result = QuadrantChromosomeParseResult(numpyparser.quadrant_record(quadrant_arrays), path=path)
+        genome.quadrant_definitions = quadrants_result.quadrants
+        genome.subnetworks_per_quadrant = quadrants_result.subnetworks_per_quadrant
+        genome.quadrant_connections = ConnectionsChromosomeParseResult(
+            numpyparser.connections_record(connections_arrays), path=path).quadrant_connections_array
+        return genome
+
+    def as_columns(self):
+        #struct-of-arrays copy of the genome, for vectorized whole-genome passes
+        from .columnar import ColumnarGenome
+
+        return ColumnarGenome.from_genome(self)
+
+    def compile(self, input_count=None, hidden_count=None, output_count=None):
+        #resolves the genome into sparse weight matrices over global node numbering,
+        #see compiled.CompiledNetwork
+        from .compiled import compile_genome
+
+        return compile_genome(self, input_count, hidden_count, output_count)
+
+    def validate(self, input_count=None, hidden_count=None, output_count=None):
+        #checks every cross-chromosome reference and index range, returning a
+        #validation.ValidationReport listing each violation
+        from .validation import validate_genome
+
+        return validate_genome(self, input_count, hidden_count, output_count)
+
+    def to_file(self, path):
+        #writes the genome as a directory of subnetworks.chr, quadrants.chr and connections.chr
+        from .chromosomewriter import write_genome
+
+        logger.debug("Writing network genome \"%s\"", path)
+        write_genome(path, self)
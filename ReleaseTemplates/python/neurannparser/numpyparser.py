@@ -0,0 +1,377 @@
+import struct
+
+from collections import namedtuple
+
+import numpy as np
+
+
+#-----ON-DISK LAYOUTS-----
+#these mirror the field-by-field reads in subnetwork.cpp, quadrant.cpp and connections.cpp.
+#chromosomes are packed and little-endian, so none of these dtypes carry any padding
+CODON_DTYPE = np.dtype([
+    ("CodonIndex", "<u4"),
+    ("Source", "u1"),
+    ("Target", "u1"),
+    ("Types", "u1"),
+    ("Weight", "<f4")
+])
+
+CONNECTION_GENE_DTYPE = np.dtype([
+    ("Weight", "<f4"),
+    ("SourceSubnetworkIndex", "<u4"),
+    ("SourceOutputIndex", "u1"),
+    ("TargetSubnetworkIndex", "<u4"),
+    ("TargetInputIndex", "u1")
+])
+
+SUBNETWORKS_MAGIC = b"SUBN"
+QUADRANTS_MAGIC = b"QUAD"
+CONNECTIONS_MAGIC = b"CONN"
+
+_COUNT = struct.Struct("<I")
+_SUBNETWORK_GENE_HEADER = struct.Struct("<QI")
+_QUADRANT_CONNECTIONS_HEADER = struct.Struct("<III")
+
+
+#-----RETURN CODES-----
+#kept numerically identical to the #defines in the C++ headers
+SUBNETWORK_CHROMOSOME_SUCCESS =         0
+SUBNETWORK_CHROMOSOME_BAD_PATH =        1
+SUBNETWORK_CHROMOSOME_FILE_SHORT =      2
+SUBNETWORK_CHROMOSOME_MISSING_GENES =   3
+SUBNETWORK_CHROMOSOME_BAD_GENE =        4
+
+QUADRANT_CHROMOSOME_SUCCESS =           0
+QUADRANT_CHROMOSOME_BAD_PATH =          1
+QUADRANT_CHROMOSOME_FILE_SHORT =        2
+QUADRANT_CHROMOSOME_MISSING_QUADRANTS = 3
+
+CONNECTIONS_CHROMOSOME_SUCCESS =        0
+CONNECTIONS_CHROMOSOME_BAD_PATH =       1
+CONNECTIONS_CHROMOSOME_SHORT =          2
+CONNECTIONS_CHROMOSOME_QUADRANT_SHORT = 3
+
+GENERIC_PARSE_SUBNETWORKS =             0
+GENERIC_PARSE_QUADRANTS =               1
+GENERIC_PARSE_CONNECTIONS =             2
+GENERIC_PARSE_BAD_PATH =                3
+GENERIC_PARSE_UNRECOGNISED =            4
+GENERIC_PARSE_SHORT =                   5
+
+
+
+#-----ARRAY DECODING-----
+#byte positions of every gene in a subnetwork chromosome, without touching any codon data
+SubnetworkIndex = namedtuple("SubnetworkIndex", [
+    "return_code", "additional_info", "gene_count",
+    "gene_indices", "codon_counts", "codon_starts"
+])
+
+#a fully decoded subnetwork chromosome. gene i owns codons[gene_offsets[i]:gene_offsets[i + 1]]
+SubnetworkArrays = namedtuple("SubnetworkArrays", [
+    "return_code", "additional_info", "gene_count",
+    "gene_indices", "gene_offsets", "codons"
+])
+
+QuadrantArrays = namedtuple("QuadrantArrays", [
+    "return_code", "quadrant_count", "subnetworks_per_quadrant", "subnetwork_indices"
+])
+
+ConnectionsIndex = namedtuple("ConnectionsIndex", [
+    "return_code", "additional_info", "quadrant_connections_count",
+    "source_quadrant_indices", "target_quadrant_indices", "connection_gene_counts", "gene_starts"
+])
+
+#block i owns connection_genes[gene_offsets[i]:gene_offsets[i + 1]]
+ConnectionsArrays = namedtuple("ConnectionsArrays", [
+    "return_code", "additional_info", "quadrant_connections_count",
+    "source_quadrant_indices", "target_quadrant_indices", "gene_offsets", "connection_genes"
+])
+
+
+def _short_count(buffer, offset):
+    #a truncated count field still holds whatever bytes ifstream::read managed to copy
+    return int.from_bytes(bytes(buffer[offset:offset + 4]), "little")
+
+
+def _offsets(counts):
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+def _gather(buffer, dtype, counts, starts):
+    #copies each (possibly non-contiguous) run of records into one flat array
+    #as raw bytes, since field-by-field structured assignment is several times slower
+    total = int(np.sum(counts, dtype=np.int64))
+    result = np.empty(total, dtype=dtype)
+    result_bytes = result.view(np.uint8)
+    position = 0
+    for count, start in zip(counts.tolist(), starts.tolist()):
+        length = count * dtype.itemsize
+        result_bytes[position:position + length] = np.frombuffer(buffer, dtype=np.uint8, count=length, offset=start)
+        position += length
+    return result
+
+
+def index_subnetwork_genes(buffer):
+    buffer_length = len(buffer)
+    if buffer_length < 4:
+        return SubnetworkIndex(SUBNETWORK_CHROMOSOME_FILE_SHORT, 0, 0, None, None, None)
+    if bytes(buffer[:4]) != SUBNETWORKS_MAGIC:
+        return SubnetworkIndex(SUBNETWORK_CHROMOSOME_BAD_PATH, 0, 0, None, None, None)
+    if buffer_length < 8:
+        return SubnetworkIndex(SUBNETWORK_CHROMOSOME_FILE_SHORT, -1, _short_count(buffer, 4), None, None, None)
+
+    gene_count, = _COUNT.unpack_from(buffer, 4)
+    gene_indices = []
+    codon_counts = []
+    codon_starts = []
+
+    #only the headers are visited here; the codons themselves are skipped over.
+    #the failure modes match ParseSubnetworkGene: a truncated header or a partial codon
+    #is a bad gene, whereas running out of file on a codon boundary is a missing gene
+    position = 8
+    for i in range(gene_count):
+        if position + _SUBNETWORK_GENE_HEADER.size > buffer_length:
+            return SubnetworkIndex(SUBNETWORK_CHROMOSOME_BAD_GENE, i, gene_count, None, None, None)
+        gene_index, codon_count = _SUBNETWORK_GENE_HEADER.unpack_from(buffer, position)
+        position += _SUBNETWORK_GENE_HEADER.size
+
+        available = buffer_length - position
+        needed = codon_count * CODON_DTYPE.itemsize
+        if available < needed:
+            if available % CODON_DTYPE.itemsize == 0:
+                return SubnetworkIndex(SUBNETWORK_CHROMOSOME_MISSING_GENES, i, gene_count, None, None, None)
+            return SubnetworkIndex(SUBNETWORK_CHROMOSOME_BAD_GENE, i, gene_count, None, None, None)
+
+        gene_indices.append(gene_index)
+        codon_counts.append(codon_count)
+        codon_starts.append(position)
+        position += needed
+
+    return SubnetworkIndex(
+        SUBNETWORK_CHROMOSOME_SUCCESS, -1, gene_count,
+        np.array(gene_indices, dtype=np.uint64),
+        np.array(codon_counts, dtype=np.uint32),
+        np.array(codon_starts, dtype=np.int64)
+    )
+
+
+def decode_subnetwork_chromosome(buffer):
+    index = index_subnetwork_genes(buffer)
+    if index.return_code != SUBNETWORK_CHROMOSOME_SUCCESS:
+        return SubnetworkArrays(index.return_code, index.additional_info, index.gene_count, None, None, None)
+
+    return SubnetworkArrays(
+        index.return_code, index.additional_info, index.gene_count,
+        index.gene_indices,
+        _offsets(index.codon_counts),
+        _gather(buffer, CODON_DTYPE, index.codon_counts, index.codon_starts)
+    )
+
+
+def decode_quadrant_chromosome(buffer):
+    buffer_length = len(buffer)
+    if buffer_length < 4:
+        return QuadrantArrays(QUADRANT_CHROMOSOME_FILE_SHORT, 0, 0, None)
+    if bytes(buffer[:4]) != QUADRANTS_MAGIC:
+        return QuadrantArrays(QUADRANT_CHROMOSOME_BAD_PATH, 0, 0, None)
+    if buffer_length < 8:
+        return QuadrantArrays(QUADRANT_CHROMOSOME_FILE_SHORT, _short_count(buffer, 4), 0, None)
+    quadrant_count, = _COUNT.unpack_from(buffer, 4)
+    if buffer_length < 12:
+        return QuadrantArrays(QUADRANT_CHROMOSOME_FILE_SHORT, quadrant_count, _short_count(buffer, 8), None)
+    subnetworks_per_quadrant, = _COUNT.unpack_from(buffer, 8)
+
+    index_count = quadrant_count * subnetworks_per_quadrant
+    if buffer_length < 12 + index_count * 4:
+        return QuadrantArrays(QUADRANT_CHROMOSOME_MISSING_QUADRANTS, quadrant_count, subnetworks_per_quadrant, None)
+
+    #the whole quadrant table is one contiguous block, so it decodes in a single read
+    subnetwork_indices = np.frombuffer(buffer, dtype="<u4", count=index_count, offset=12)
+    subnetwork_indices = subnetwork_indices.reshape(quadrant_count, subnetworks_per_quadrant)
+    return QuadrantArrays(QUADRANT_CHROMOSOME_SUCCESS, quadrant_count, subnetworks_per_quadrant, subnetwork_indices)
+
+
+def index_quadrant_connections(buffer):
+    buffer_length = len(buffer)
+    if buffer_length < 4:
+        return ConnectionsIndex(CONNECTIONS_CHROMOSOME_SHORT, -1, 0, None, None, None, None)
+    if bytes(buffer[:4]) != CONNECTIONS_MAGIC:
+        return ConnectionsIndex(CONNECTIONS_CHROMOSOME_BAD_PATH, -1, 0, None, None, None, None)
+    if buffer_length < 8:
+        return ConnectionsIndex(CONNECTIONS_CHROMOSOME_SHORT, -1, _short_count(buffer, 4), None, None, None, None)
+
+    quadrant_connections_count, = _COUNT.unpack_from(buffer, 4)
+    source_quadrant_indices = []
+    target_quadrant_indices = []
+    connection_gene_counts = []
+    gene_starts = []
+
+    position = 8
+    for i in range(quadrant_connections_count):
+        if position + _QUADRANT_CONNECTIONS_HEADER.size > buffer_length:
+            return ConnectionsIndex(
+                CONNECTIONS_CHROMOSOME_QUADRANT_SHORT, i, quadrant_connections_count, None, None, None, None)
+        source, target, gene_count = _QUADRANT_CONNECTIONS_HEADER.unpack_from(buffer, position)
+        position += _QUADRANT_CONNECTIONS_HEADER.size
+
+        needed = gene_count * CONNECTION_GENE_DTYPE.itemsize
+        if buffer_length - position < needed:
+            return ConnectionsIndex(
+                CONNECTIONS_CHROMOSOME_QUADRANT_SHORT, i, quadrant_connections_count, None, None, None, None)
+
+        source_quadrant_indices.append(source)
+        target_quadrant_indices.append(target)
+        connection_gene_counts.append(gene_count)
+        gene_starts.append(position)
+        position += needed
+
+    return ConnectionsIndex(
+        CONNECTIONS_CHROMOSOME_SUCCESS, -1, quadrant_connections_count,
+        np.array(source_quadrant_indices, dtype=np.uint32),
+        np.array(target_quadrant_indices, dtype=np.uint32),
+        np.array(connection_gene_counts, dtype=np.uint32),
+        np.array(gene_starts, dtype=np.int64)
+    )
+
+
+def decode_connections_chromosome(buffer):
+    index = index_quadrant_connections(buffer)
+    if index.return_code != CONNECTIONS_CHROMOSOME_SUCCESS:
+        return ConnectionsArrays(
+            index.return_code, index.additional_info, index.quadrant_connections_count, None, None, None, None)
+
+    return ConnectionsArrays(
+        index.return_code, index.additional_info, index.quadrant_connections_count,
+        index.source_quadrant_indices,
+        index.target_quadrant_indices,
+        _offsets(index.connection_gene_counts),
+        _gather(buffer, CONNECTION_GENE_DTYPE, index.connection_gene_counts, index.gene_starts)
+    )
+
+
+def read_chromosome(path):
+    #returns None where the C++ parsers would fail to open the file
+    try:
+        with open(path, "rb") as chromosome_file:
+            return chromosome_file.read()
+    except OSError:
+        return None
+
+
+
+#-----C RESULT EQUIVALENTS-----
+#stand-ins for the C_ structures in networkparser.py, carrying the same field names so that
+#the existing result classes can be built from either backend without modification
+CodonRecord = namedtuple("CodonRecord", CODON_DTYPE.names)
+ConnectionGeneRecord = namedtuple("ConnectionGeneRecord", CONNECTION_GENE_DTYPE.names)
+SubnetworkGeneRecord = namedtuple("SubnetworkGeneRecord", ["GeneIndex", "Codons", "CodonCount"])
+SubnetworkChromosomeRecord = namedtuple("SubnetworkChromosomeRecord", ["Genes", "GeneCount", "ReturnCode", "AdditionalInfo"])
+QuadrantChromosomeRecord = namedtuple("QuadrantChromosomeRecord", [
+    "SubnetworkIndices", "QuadrantCount", "SubnetworksPerQuadrant", "ReturnCode"
+])
+QuadrantConnectionsRecord = namedtuple("QuadrantConnectionsRecord", [
+    "ConnectionGenes", "ConnectionGeneCount", "SourceQuadrantIndex", "TargetQuadrantIndex"
+])
+ConnectionsChromosomeRecord = namedtuple("ConnectionsChromosomeRecord", [
+    "QuadrantConnectionsArray", "QuadrantConnectionsCount", "ReturnCode", "AdditionalInfo"
+])
+GenericParseResultRecord = namedtuple("GenericParseResultRecord", ["SCPR", "QCPR", "CCPR"])
+GenericChromosomeRecord = namedtuple("GenericChromosomeRecord", ["ReturnCode", "ParseResult"])
+
+
+def _split_records(record_type, records, offsets):
+    #converting the whole array with tolist() is far cheaper than element-wise access
+    flat = list(map(record_type._make, records.tolist()))
+    offsets = offsets.tolist()
+    return [flat[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+def subnetwork_record(arrays):
+    genes = []
+    if arrays.return_code == SUBNETWORK_CHROMOSOME_SUCCESS:
+        codons = _split_records(CodonRecord, arrays.codons, arrays.gene_offsets)
+        genes = [
+            SubnetworkGeneRecord(gene_index, gene_codons, len(gene_codons))
+            for gene_index, gene_codons in zip(arrays.gene_indices.tolist(), codons)
+        ]
+    return SubnetworkChromosomeRecord(genes, arrays.gene_count, arrays.return_code, arrays.additional_info)
+
+
+def quadrant_record(arrays):
+    subnetwork_indices = []
+    if arrays.return_code == QUADRANT_CHROMOSOME_SUCCESS:
+        subnetwork_indices = arrays.subnetwork_indices.tolist()
+    return QuadrantChromosomeRecord(
+        subnetwork_indices, arrays.quadrant_count, arrays.subnetworks_per_quadrant, arrays.return_code)
+
+
+def connections_record(arrays):
+    quadrant_connections = []
+    if arrays.return_code == CONNECTIONS_CHROMOSOME_SUCCESS:
+        connection_genes = _split_records(ConnectionGeneRecord, arrays.connection_genes, arrays.gene_offsets)
+        quadrant_connections = [
+            QuadrantConnectionsRecord(genes, len(genes), source, target)
+            for genes, source, target in zip(
+                connection_genes,
+                arrays.source_quadrant_indices.tolist(),
+                arrays.target_quadrant_indices.tolist())
+        ]
+    return ConnectionsChromosomeRecord(
+        quadrant_connections, arrays.quadrant_connections_count, arrays.return_code, arrays.additional_info)
+
+
+
+#-----BACKEND ENTRY POINTS-----
+#drop-in replacements for the NetworkParser.dll exports
+def parse_subnetwork_chromosome(filepath):
+    buffer = read_chromosome(filepath)
+    if buffer is None:
+        return SubnetworkChromosomeRecord([], 0, SUBNETWORK_CHROMOSOME_BAD_PATH, -1)
+    return subnetwork_record(decode_subnetwork_chromosome(buffer))
+
+
+def parse_quadrant_chromosome(filepath):
+    buffer = read_chromosome(filepath)
+    if buffer is None:
+        return QuadrantChromosomeRecord([], 0, 0, QUADRANT_CHROMOSOME_BAD_PATH)
+    return quadrant_record(decode_quadrant_chromosome(buffer))
+
+
+def parse_connections_chromosome(filepath):
+    buffer = read_chromosome(filepath)
+    if buffer is None:
+        return ConnectionsChromosomeRecord([], 0, CONNECTIONS_CHROMOSOME_BAD_PATH, -1)
+    return connections_record(decode_connections_chromosome(buffer))
+
+
+def parse_generic_chromosome(filepath):
+    return parse_generic_buffer(read_chromosome(filepath))
+
+
+def parse_generic_buffer(buffer):
+    #the generic parse of a chromosome already read into memory, None being a failed read
+    if buffer is None:
+        return GenericChromosomeRecord(GENERIC_PARSE_BAD_PATH, None)
+    if len(buffer) < 4:
+        return GenericChromosomeRecord(GENERIC_PARSE_SHORT, None)
+
+    #the sniffed buffer is decoded directly rather than reopening the file
+    magic = buffer[:4]
+    if magic == SUBNETWORKS_MAGIC:
+        scpr = subnetwork_record(decode_subnetwork_chromosome(buffer))
+        return GenericChromosomeRecord(GENERIC_PARSE_SUBNETWORKS, GenericParseResultRecord(scpr, None, None))
+    if magic == QUADRANTS_MAGIC:
+        qcpr = quadrant_record(decode_quadrant_chromosome(buffer))
+        return GenericChromosomeRecord(GENERIC_PARSE_QUADRANTS, GenericParseResultRecord(None, qcpr, None))
+    if magic == CONNECTIONS_MAGIC:
+        ccpr = connections_record(decode_connections_chromosome(buffer))
+        return GenericChromosomeRecord(GENERIC_PARSE_CONNECTIONS, GenericParseResultRecord(None, None, ccpr))
+    return GenericChromosomeRecord(GENERIC_PARSE_UNRECOGNISED, None)
+
+
+def free_parse_result(result):
+    #everything here is garbage collected; kept for parity with the Free*ParseResult exports
+    pass
@@ -0,0 +1,221 @@
+import collections
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from . import metrics, numpyparser
+from .networkparser import \
+    SubnetworkChromosomeParseResult, \
+    QuadrantChromosomeParseResult, \
+    ConnectionsChromosomeParseResult, \
+    logger
+
+
+#approximate resident size of the python objects built for each record, measured with
+#tracemalloc. only used to keep the in-memory cache inside its byte budget
+_CODON_BYTES = 190
+_SUBNETWORK_GENE_BYTES = 300
+_CONNECTION_GENE_BYTES = 145
+_QUADRANT_CONNECTIONS_BYTES = 300
+_QUADRANT_ENTRY_BYTES = 36
+
+
+#sizes are taken from the results rather than the arrays, since a result parsed by the native
+#backend has no arrays
+def _subnetwork_size(result):
+    return len(result.genes) * _SUBNETWORK_GENE_BYTES + \
+        sum(gene.codon_count for gene in result.genes) * _CODON_BYTES
+
+
+def _quadrant_size(result):
+    return len(result.quadrants) * result.subnetworks_per_quadrant * _QUADRANT_ENTRY_BYTES
+
+
+def _connections_size(result):
+    blocks = result.quadrant_connections_array
+    return len(blocks) * _QUADRANT_CONNECTIONS_BYTES + \
+        sum(block.connection_gene_count for block in blocks) * _CONNECTION_GENE_BYTES
+
+
+#per result class: how to decode a buffer, turn the arrays into a result, and size it
+_CHROMOSOME_TYPES = {
+    SubnetworkChromosomeParseResult: (
+        "subnetworks",
+        numpyparser.decode_subnetwork_chromosome,
+        numpyparser.subnetwork_record,
+        numpyparser.SubnetworkArrays,
+        _subnetwork_size
+    ),
+    QuadrantChromosomeParseResult: (
+        "quadrants",
+        numpyparser.decode_quadrant_chromosome,
+        numpyparser.quadrant_record,
+        numpyparser.QuadrantArrays,
+        _quadrant_size
+    ),
+    ConnectionsChromosomeParseResult: (
+        "connections",
+        numpyparser.decode_connections_chromosome,
+        numpyparser.connections_record,
+        numpyparser.ConnectionsArrays,
+        _connections_size
+    ),
+}
+
+
+#opt-in cache of chromosome parse results, keyed by file identity. with key="stat" the identity
+#is the path as given, device, inode, size and mtime, so a hit costs a single stat. key="content"
+#hashes the file instead, which also matches identical copies at different paths at the cost of
+#a read; a miss then decodes the bytes that were hashed.
+#
+#misses go through the selected backend and are recorded in metrics like any other parse. the
+#numpy parser decodes instead where the arrays are needed for the on-disk cache, or the bytes
+#are already in memory from hashing.
+#
+#hits are served from an in-process LRU bounded by max_bytes, then from an optional on-disk
+#cache of decoded arrays in disk_path. cached results are shared between callers, so they
+#should be treated as read-only
+class ParseCache:
+    def __init__(self, max_bytes=256 * 1024 * 1024, disk_path=None, key="stat"):
+        if key not in ("stat", "content"):
+            raise ValueError(f"Unknown cache key \"{key}\", expected \"stat\" or \"content\"")
+
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path
+        self.key = key
+        if disk_path is not None:
+            os.makedirs(disk_path, exist_ok=True)
+
+        self.current_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "current_bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _identity(self, path):
+        #returns (identity, the file's bytes where they had to be read), with identity None when
+        #the file can't be read, in which case nothing is cached
+        if self.key == "stat":
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None, None
+            return f"{os.fspath(path)}:{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}", None
+
+        buffer = numpyparser.read_chromosome(path)
+        if buffer is None:
+            return None, None
+        return hashlib.sha256(buffer).hexdigest(), buffer
+
+    def _disk_file(self, kind, identity):
+        name = hashlib.sha256(identity.encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_path, f"{kind}-{name}.npz")
+
+    def _read_disk(self, disk_file, arrays_type):
+        try:
+            with np.load(disk_file, allow_pickle=False) as stored:
+                fields = {field: stored[field] for field in stored.files}
+        except (OSError, ValueError):
+            return None
+        #scalars were stored as 0-d arrays
+        return arrays_type(**{
+            field: fields[field].item() if fields[field].ndim == 0 else fields[field]
+            for field in arrays_type._fields
+        })
+
+    def _write_disk(self, disk_file, arrays):
+        #written to a temporary file first, so concurrent readers never see a partial entry
+        temporary_file = f"{disk_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary_file, "wb") as stored:
+                np.savez(stored, **{field: np.asarray(value) for field, value in arrays._asdict().items()})
+            os.replace(temporary_file, disk_file)
+        except OSError as e:
+            logger.warning(f"Unable to write parse cache entry \"{disk_file}\": {e}")
+
+    def _store(self, identity, result, size):
+        with self._lock:
+            if identity in self._entries:
+                return
+            if size > self.max_bytes:
+                return
+            while self.current_bytes + size > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+            self._entries[identity] = (result, size)
+            self.current_bytes += size
+
+    def parse(self, result_class, path):
+        kind, decode, to_record, arrays_type, size_of = _CHROMOSOME_TYPES[result_class]
+
+        identity, buffer = self._identity(path)
+        if identity is None:
+            return result_class.from_file(path)
+        identity = f"{kind}:{identity}"
+
+        with self._lock:
+            entry = self._entries.get(identity)
+            if entry is not None:
+                self._entries.move_to_end(identity)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        arrays = None
+        disk_file = None
+        if self.disk_path is not None:
+            disk_file = self._disk_file(kind, identity)
+            arrays = self._read_disk(disk_file, arrays_type)
+            if arrays is not None:
+                with self._lock:
+                    self.disk_hits += 1
+
+        if arrays is not None:
+            result = result_class(to_record(arrays), path=path)
+            self._store(identity, result, size_of(result))
+            return result
+
+        if buffer is None and disk_file is None:
+            result = result_class.from_file(path)
+        else:
+            timer = metrics.timer(kind, path)
+            if buffer is None:
+                buffer = numpyparser.read_chromosome(path)
+                if buffer is None:
+                    return result_class.from_file(path)
+            arrays = decode(buffer)
+            timer.lap("parse")
+            result = result_class(to_record(arrays), path=path)
+            timer.lap("construct")
+            timer.finish(result)
+
+        #failures aren't cached, so a repaired file is picked up on the next load
+        if result.return_code.value != 0:
+            return result
+        if disk_file is not None:
+            self._write_disk(disk_file, arrays)
+        self._store(identity, result, size_of(result))
+        return result
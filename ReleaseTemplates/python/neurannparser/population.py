@@ -0,0 +1,138 @@
+import collections
+import os
+import pathlib
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .columnar import ColumnarGenome
+from .networkparser import NetworkGenome, logger
+
+
+CHROMOSOME_FILES = ("subnetworks.chr", "quadrants.chr", "connections.chr")
+
+_ALIGNMENT = 8
+
+
+def _align(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _shared_memory_size(path):
+    #an upper bound on the columnar size of a genome. every on-disk header expands to at
+    #most twice its size once split into columns, and codon/connection data never grows
+    total = 0
+    for chromosome in CHROMOSOME_FILES:
+        try:
+            total += os.stat(pathlib.Path(path).joinpath(chromosome)).st_size
+        except OSError:
+            pass
+    return 2 * total + _ALIGNMENT * (len(ColumnarGenome.ARRAY_FIELDS) + 1)
+
+
+def _load_genome(path):
+    try:
+        return ColumnarGenome.from_directory(path)
+    except NetworkGenome.ChromosomeParseException as e:
+        return e
+
+
+def _load_into_shared_memory(path, shared_memory_name):
+    #runs in a worker process. the parent owns the block, so only the layout is pickled back
+    genome = _load_genome(path)
+    if isinstance(genome, NetworkGenome.ChromosomeParseException):
+        return genome
+
+    shared_memory = SharedMemory(name=shared_memory_name)
+    try:
+        layout = []
+        offset = 0
+        for field, array in genome.to_dict().items():
+            offset = _align(offset)
+            destination = np.ndarray(array.shape, dtype=array.dtype, buffer=shared_memory.buf, offset=offset)
+            destination[...] = array
+            del destination
+            layout.append((field, array.dtype.str, array.shape, offset))
+            offset += array.nbytes
+    finally:
+        shared_memory.close()
+
+    return layout
+
+
+def _unpack_shared_memory(shared_memory, layout):
+    used = max((offset + int(np.prod(shape)) * np.dtype(dtype).itemsize for _, dtype, shape, offset in layout), default=0)
+
+    #copy the block out in one go so the genome owns its memory and the block can be released
+    block = np.empty(used, dtype=np.uint8)
+    source = np.frombuffer(shared_memory.buf, dtype=np.uint8, count=used)
+    block[:] = source
+    del source
+
+    arrays = {}
+    for field, dtype, shape, offset in layout:
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        arrays[field] = block[offset:offset + nbytes].view(dtype).reshape(shape)
+    return ColumnarGenome(**arrays)
+
+
+def _collect(block, future):
+    try:
+        result = future.result()
+        if isinstance(result, NetworkGenome.ChromosomeParseException):
+            return result
+        return _unpack_shared_memory(block, result)
+    finally:
+        _release(block)
+
+
+def _release(block):
+    block.close()
+    block.unlink()
+
+
+def _load_process_batch(paths, workers):
+    #each genome gets a block sized by the parent, which holds it open until the result is
+    #copied out. blocks are only allocated for a bounded window of in-flight genomes
+    results = []
+    in_flight = collections.deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            for path in paths:
+                block = SharedMemory(create=True, size=_shared_memory_size(path))
+                in_flight.append((block, executor.submit(_load_into_shared_memory, path, block.name)))
+                if len(in_flight) >= 2 * workers:
+                    results.append(_collect(*in_flight.popleft()))
+            while in_flight:
+                results.append(_collect(*in_flight.popleft()))
+        finally:
+            for block, future in in_flight:
+                future.cancel()
+                _release(block)
+    return results
+
+
+#loads every genome directory in paths, returning one entry per path in input order.
+#genomes that fail to parse are returned as their ChromosomeParseException rather than
+#raised, so that one bad genome doesn't abort the whole batch
+def load_population(paths, workers=None, executor="process"):
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    logger.debug("Loading population of %s genomes with %s %s workers", len(paths), workers, executor)
+    if executor == "process":
+        results = _load_process_batch(paths, workers)
+    elif executor == "thread":
+        with ThreadPoolExecutor(max_workers=workers) as thread_executor:
+            results = list(thread_executor.map(_load_genome, paths))
+    else:
+        raise ValueError(f"Unknown executor \"{executor}\", expected \"process\" or \"thread\"")
+
+    failures = sum(isinstance(result, NetworkGenome.ChromosomeParseException) for result in results)
+    if failures:
+        logger.error(f"{failures} of {len(paths)} genomes failed to load")
+    return results
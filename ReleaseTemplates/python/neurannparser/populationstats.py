@@ -0,0 +1,390 @@
+import math
+import os
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from .columnar import \
+    decode_subnetworks, \
+    decode_quadrants, \
+    decode_connections
+from .networkparser import \
+    SOURCE_TYPE_INPUT, \
+    SOURCE_TYPE_HIDDEN, \
+    TARGET_TYPE_HIDDEN, \
+    TARGET_TYPE_OUTPUT, \
+    NetworkGenome, \
+    logger
+
+
+#-----ACCUMULATORS-----
+#every accumulator takes whole arrays at a time through add, and any two accumulators built
+#with the same settings combine through merge, in any order and across processes
+class Moments:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        other = Moments()
+        other.count = len(values)
+        other.mean = float(np.mean(values))
+        other.m2 = float(np.sum(np.square(values - other.mean)))
+        other.min = float(np.min(values))
+        other.max = float(np.max(values))
+        self.merge(other)
+
+    def merge(self, other):
+        #the pairwise update of Chan et al., exact for any split of the data
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def summary(self):
+        return {"count": self.count, "mean": self.mean if self.count else math.nan, "std": self.std,
+                "min": self.min if self.count else math.nan, "max": self.max if self.count else math.nan}
+
+
+class Histogram:
+    #bins equal-width bins over [low, high), with values outside counted as underflow and
+    #overflow, and NaN counted apart
+    def __init__(self, low, high, bins):
+        self.low = float(low)
+        self.high = float(high)
+        self.bins = int(bins)
+        self.counts = np.zeros(self.bins + 2, dtype=np.int64)
+        self.nan_count = 0
+
+    @property
+    def edges(self):
+        return np.linspace(self.low, self.high, self.bins + 1)
+
+    @property
+    def underflow(self):
+        return int(self.counts[0])
+
+    @property
+    def overflow(self):
+        return int(self.counts[-1])
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        nan = np.isnan(values)
+        self.nan_count += int(np.count_nonzero(nan))
+        values = values[~nan]
+
+        #bin 0 is the underflow and bin bins + 1 the overflow
+        scaled = (values - self.low) * (self.bins / (self.high - self.low))
+        bins = np.clip(np.floor(scaled), -1, self.bins).astype(np.int64) + 1
+        self.counts += np.bincount(bins, minlength=self.bins + 2)
+
+    def merge(self, other):
+        if (self.low, self.high, self.bins) != (other.low, other.high, other.bins):
+            raise ValueError("Only histograms with the same bins can be merged")
+        self.counts += other.counts
+        self.nan_count += other.nan_count
+
+    def summary(self):
+        return {"edges": self.edges.tolist(), "counts": self.counts[1:-1].tolist(),
+                "underflow": self.underflow, "overflow": self.overflow, "nan": self.nan_count}
+
+
+class QuantileSketch:
+    #approximate quantiles with a relative error of at most relative_accuracy, in the manner of
+    #DDSketch: every value is counted in a logarithmically sized bucket, and the buckets of two
+    #sketches add together. values closer to zero than min_value share a single bucket
+    def __init__(self, relative_accuracy=0.01, min_value=1e-9):
+        self.relative_accuracy = float(relative_accuracy)
+        self.min_value = float(min_value)
+        self._log_gamma = math.log((1 + self.relative_accuracy) / (1 - self.relative_accuracy))
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _keys(self, magnitudes):
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    @staticmethod
+    def _add_keys(buckets, keys, counts):
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            buckets[key] = buckets.get(key, 0) + count
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        self.count += len(values)
+
+        small = np.abs(values) < self.min_value
+        self.zero_count += int(np.count_nonzero(small))
+        for buckets, selected in ((self.positive, values[~small & (values > 0)]),
+                                  (self.negative, -values[~small & (values < 0)])):
+            keys, counts = np.unique(self._keys(selected), return_counts=True)
+            QuantileSketch._add_keys(buckets, keys, counts)
+
+    def merge(self, other):
+        if (self.relative_accuracy, self.min_value) != (other.relative_accuracy, other.min_value):
+            raise ValueError("Only sketches with the same accuracy can be merged")
+        for buckets, other_buckets in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_buckets.items():
+                buckets[key] = buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def _value(self, key):
+        #the midpoint of a bucket in relative terms, which is what bounds the error
+        gamma = math.exp(self._log_gamma)
+        return 2 * gamma ** key / (gamma + 1)
+
+    def quantiles(self, qs):
+        if self.count == 0:
+            return [math.nan for _ in qs]
+
+        #buckets in ascending order of value: negatives from largest magnitude, zero, positives
+        negative_keys = sorted(self.negative, reverse=True)
+        positive_keys = sorted(self.positive)
+        values = [-self._value(key) for key in negative_keys] + [0.0] + [self._value(key) for key in positive_keys]
+        counts = [self.negative[key] for key in negative_keys] + [self.zero_count] + [self.positive[key] for key in positive_keys]
+        cumulative = np.cumsum(counts)
+
+        ranks = [q * (self.count - 1) for q in qs]
+        return [values[int(np.searchsorted(cumulative, rank, side="right"))] for rank in ranks]
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def summary(self, qs=(0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)):
+        return dict(zip((f"p{round(q * 100, 2):g}" for q in qs), self.quantiles(qs)))
+
+
+class IntegerCounts:
+    #exact counts of small non-negative integers, growing as larger values are seen
+    def __init__(self, size=0):
+        self.counts = np.zeros(size, dtype=np.int64)
+
+    def add(self, values, weights=None):
+        values = np.asarray(values, dtype=np.int64).ravel()
+        if len(values) == 0:
+            return
+        counts = np.bincount(values, weights=weights, minlength=len(self.counts)).astype(np.int64)
+        counts[:len(self.counts)] += self.counts
+        self.counts = counts
+
+    def merge(self, other):
+        self.add(np.arange(len(other.counts)), other.counts)
+
+    @property
+    def total(self):
+        return int(np.sum(self.counts))
+
+    def quantiles(self, qs):
+        cumulative = np.cumsum(self.counts)
+        if len(cumulative) == 0 or cumulative[-1] == 0:
+            return [math.nan for _ in qs]
+        return [int(np.searchsorted(cumulative, q * (cumulative[-1] - 1), side="right")) for q in qs]
+
+    def summary(self):
+        values = np.flatnonzero(self.counts)
+        return {int(value): int(self.counts[value]) for value in values}
+
+
+class Distribution:
+    #moments, a fixed-bin histogram and a quantile sketch of the same values
+    def __init__(self, low, high, bins, relative_accuracy=0.01):
+        self.moments = Moments()
+        self.histogram = Histogram(low, high, bins)
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.moments.add(values)
+        self.histogram.add(values)
+        self.sketch.add(values)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.histogram.merge(other.histogram)
+        self.sketch.merge(other.sketch)
+
+    def summary(self):
+        return {**self.moments.summary(), "quantiles": self.sketch.summary(), "histogram": self.histogram.summary()}
+
+
+class PairCounts:
+    #a growing matrix of totals indexed by (source quadrant, target quadrant)
+    def __init__(self):
+        self.counts = np.zeros((0, 0), dtype=np.int64)
+
+    def add(self, sources, targets, weights):
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if len(sources) == 0:
+            return
+        shape = (max(self.counts.shape[0], int(sources.max()) + 1), max(self.counts.shape[1], int(targets.max()) + 1))
+        if shape != self.counts.shape:
+            counts = np.zeros(shape, dtype=np.int64)
+            counts[:self.counts.shape[0], :self.counts.shape[1]] = self.counts
+            self.counts = counts
+        np.add.at(self.counts, (sources, targets), np.asarray(weights, dtype=np.int64))
+
+    def merge(self, other):
+        sources, targets = np.nonzero(other.counts)
+        self.add(sources, targets, other.counts[sources, targets])
+
+
+
+#-----POPULATION STATISTICS-----
+CODON_TYPE_NAMES = {
+    SOURCE_TYPE_INPUT | TARGET_TYPE_HIDDEN: "input_to_hidden",
+    SOURCE_TYPE_INPUT | TARGET_TYPE_OUTPUT: "input_to_output",
+    SOURCE_TYPE_HIDDEN | TARGET_TYPE_HIDDEN: "hidden_to_hidden",
+    SOURCE_TYPE_HIDDEN | TARGET_TYPE_OUTPUT: "hidden_to_output",
+}
+
+
+#aggregates over a whole generation, built one genome at a time straight from the decoded
+#chromosome arrays, without building any python objects. weight histograms cover
+#[-weight_range, weight_range) in weight_bins bins
+class PopulationStatistics:
+    def __init__(self, weight_range=4.0, weight_bins=64, relative_accuracy=0.01):
+        self.settings = {"weight_range": weight_range, "weight_bins": weight_bins, "relative_accuracy": relative_accuracy}
+        self.genome_count = 0
+        self.failures = {}
+        self.codon_weight = Distribution(-weight_range, weight_range, weight_bins, relative_accuracy)
+        self.connection_weight = Distribution(-weight_range, weight_range, weight_bins, relative_accuracy)
+        self.codon_types = IntegerCounts(256)
+        self.codons_per_gene = IntegerCounts()
+        self.genes_per_genome = IntegerCounts()
+        self.subnetworks_per_quadrant = IntegerCounts()
+        self.quadrants_per_genome = IntegerCounts()
+        self.connection_genes_per_pair = PairCounts()
+        self.genomes_per_pair = PairCounts()
+
+    def add_arrays(self, subnetwork_arrays, quadrant_arrays, connections_arrays):
+        codons = subnetwork_arrays.codons
+        self.codon_weight.add(codons["Weight"])
+        self.codon_types.add(codons["Types"])
+        self.codons_per_gene.add(np.diff(subnetwork_arrays.gene_offsets))
+        self.genes_per_genome.add([subnetwork_arrays.gene_count])
+        self.subnetworks_per_quadrant.add([quadrant_arrays.subnetworks_per_quadrant])
+        self.quadrants_per_genome.add([quadrant_arrays.quadrant_count])
+
+        self.connection_weight.add(connections_arrays.connection_genes["Weight"])
+        sources = connections_arrays.source_quadrant_indices
+        targets = connections_arrays.target_quadrant_indices
+        self.connection_genes_per_pair.add(sources, targets, np.diff(connections_arrays.gene_offsets))
+        #each genome counts once towards every pair it connects, however many blocks it has
+        pairs = np.unique(np.stack((sources, targets), axis=-1), axis=0) if len(sources) else np.empty((0, 2))
+        self.genomes_per_pair.add(pairs[:, 0], pairs[:, 1], np.ones(len(pairs)))
+        self.genome_count += 1
+
+    def add(self, path):
+        #adds one genome directory. genomes that fail to parse are recorded in failures by path
+        path = os.fspath(path)
+        try:
+            self.add_arrays(
+                decode_subnetworks(os.path.join(path, "subnetworks.chr")),
+                decode_quadrants(os.path.join(path, "quadrants.chr")),
+                decode_connections(os.path.join(path, "connections.chr")))
+        except NetworkGenome.ChromosomeParseException as e:
+            self.failures[path] = str(e)
+        return self
+
+    def merge(self, other):
+        if other.settings != self.settings:
+            raise ValueError("Only statistics with the same settings can be merged")
+        self.genome_count += other.genome_count
+        self.failures.update(other.failures)
+        for name in ("codon_weight", "connection_weight", "codon_types", "codons_per_gene", "genes_per_genome",
+                     "subnetworks_per_quadrant", "quadrants_per_genome",
+                     "connection_genes_per_pair", "genomes_per_pair"):
+            getattr(self, name).merge(getattr(other, name))
+        return self
+
+    @property
+    def connection_density(self):
+        #mean connection genes per genome between each (source, target) quadrant pair
+        return self.connection_genes_per_pair.counts / max(self.genome_count, 1)
+
+    def report(self):
+        type_counts = self.codon_types.summary()
+        return {
+            "genomes": self.genome_count,
+            "failures": len(self.failures),
+            "codon_weight": self.codon_weight.summary(),
+            "connection_weight": self.connection_weight.summary(),
+            "codon_types": {CODON_TYPE_NAMES.get(types, f"invalid_{types:#010b}"): count
+                            for types, count in type_counts.items()},
+            "codons_per_gene": dict(zip(("p5", "p50", "p95"), self.codons_per_gene.quantiles((0.05, 0.5, 0.95)))),
+            "genes_per_genome": dict(zip(("p5", "p50", "p95"), self.genes_per_genome.quantiles((0.05, 0.5, 0.95)))),
+            "subnetworks_per_quadrant": self.subnetworks_per_quadrant.summary(),
+            "quadrants_per_genome": self.quadrants_per_genome.summary(),
+            "connection_density": self.connection_density.tolist(),
+        }
+
+    def __str__(self):
+        codon_weight = self.codon_weight.moments
+        connection_weight = self.connection_weight.moments
+        return f"""PopulationStatistics:
+\tGenome count = {self.genome_count}
+\tFailed genomes = {len(self.failures)}
+\tCodon count = {codon_weight.count}, weight mean = {codon_weight.mean:.4f}, std = {codon_weight.std:.4f}
+\tConnection gene count = {connection_weight.count}, weight mean = {connection_weight.mean:.4f}, std = {connection_weight.std:.4f}
+\tQuadrant pairs connected = {int(np.count_nonzero(self.connection_genes_per_pair.counts))}"""
+
+
+def _statistics_of(arguments):
+    paths, settings = arguments
+    statistics = PopulationStatistics(**settings)
+    for path in paths:
+        statistics.add(path)
+    return statistics
+
+
+#computes PopulationStatistics over every genome directory in paths. the paths are split into
+#chunks, each worker streams through its chunks building partial statistics, and only those
+#small partials come back to be merged, so the cost per genome doesn't grow with the population
+def population_statistics(paths, workers=None, executor="process", chunk_size=16, **settings):
+    paths = [os.fspath(path) for path in paths]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if executor == "process":
+        executor_type = ProcessPoolExecutor
+    elif executor == "thread":
+        executor_type = ThreadPoolExecutor
+    else:
+        raise ValueError(f"Unknown executor \"{executor}\", expected \"process\" or \"thread\"")
+
+    statistics = PopulationStatistics(**settings)
+    chunks = [(paths[i:i + chunk_size], settings) for i in range(0, len(paths), chunk_size)]
+    logger.debug("Computing statistics of %s genomes in %s chunks with %s %s workers",
+                 len(paths), len(chunks), workers, executor)
+    with executor_type(max_workers=workers) as pool:
+        for partial in pool.map(_statistics_of, chunks):
+            statistics.merge(partial)
+
+    if statistics.failures:
+        logger.error(f"{len(statistics.failures)} of {len(paths)} genomes failed to load")
+    return statistics
@@ -0,0 +1,138 @@
+import os
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .networkparser import GenericChromosomeParseResult, logger
+from .numpyparser import read_chromosome
+
+
+_MAGIC_SIZE = 4
+
+#kinds are the return codes a generic parse would give the file
+_KINDS = {
+    b"SUBN": GenericChromosomeParseResult.Retcodes.SUBNETWORKS,
+    b"QUAD": GenericChromosomeParseResult.Retcodes.QUADRANTS,
+    b"CONN": GenericChromosomeParseResult.Retcodes.CONNECTIONS,
+}
+
+_RECOGNISED = frozenset(_KINDS.values())
+
+ChromosomeEntry = namedtuple("ChromosomeEntry", ["path", "kind", "size"])
+
+
+def _walk(root, suffix):
+    #every file under root ending in suffix, in a stable order
+    for directory, directory_names, file_names in os.walk(root):
+        directory_names.sort()
+        for file_name in sorted(file_names):
+            if file_name.endswith(suffix):
+                yield os.path.join(directory, file_name)
+
+
+def _kind(magic):
+    if len(magic) < _MAGIC_SIZE:
+        return GenericChromosomeParseResult.Retcodes.SHORT
+    return _KINDS.get(magic[:_MAGIC_SIZE], GenericChromosomeParseResult.Retcodes.UNRECOGNISED)
+
+
+def classify(path):
+    #the ChromosomeEntry of one file, from a single read of its magic
+    try:
+        with open(path, "rb") as chromosome_file:
+            magic = chromosome_file.read(_MAGIC_SIZE)
+            size = os.fstat(chromosome_file.fileno()).st_size
+    except OSError:
+        return ChromosomeEntry(path, GenericChromosomeParseResult.Retcodes.BAD_PATH, 0)
+    return ChromosomeEntry(path, _kind(magic), size)
+
+
+def _classify_and_parse(path):
+    #one open and one read per file: the whole chromosome is read, classified from its first
+    #bytes, and that same buffer decoded. returns (entry, parse result or None)
+    buffer = read_chromosome(path)
+    if buffer is None:
+        return ChromosomeEntry(path, GenericChromosomeParseResult.Retcodes.BAD_PATH, 0), None
+
+    entry = ChromosomeEntry(path, _kind(buffer[:_MAGIC_SIZE]), len(buffer))
+    if entry.kind not in _RECOGNISED:
+        return entry, None
+    return entry, GenericChromosomeParseResult.from_buffer(buffer, path).parse_result
+
+
+#the outcome of scan_directory. entries lists every chromosome file found, and results holds
+#the parse result of each recognised one by path
+class DirectoryScan:
+    def __init__(self, root, entries, results):
+        self.root = root
+        self.entries = entries
+        self.results = results
+
+    def of_kind(self, kind):
+        return [entry for entry in self.entries if entry.kind == kind]
+
+    @property
+    def unrecognised(self):
+        return [entry for entry in self.entries if entry.kind not in _RECOGNISED]
+
+    @property
+    def failures(self):
+        #paths of recognised chromosomes that failed to parse
+        return [path for path, result in self.results.items() if result.return_code.value != 0]
+
+    @property
+    def genome_directories(self):
+        #directories holding one of each kind of chromosome, as NetworkGenome expects
+        kinds = {}
+        for entry in self.entries:
+            kinds.setdefault(os.path.dirname(entry.path), set()).add(os.path.basename(entry.path))
+        return [
+            directory for directory, names in kinds.items()
+            if {"subnetworks.chr", "quadrants.chr", "connections.chr"} <= names
+        ]
+
+    def __str__(self):
+        counts = {kind: len(self.of_kind(kind)) for kind in GenericChromosomeParseResult.Retcodes}
+        return f"""DirectoryScan:
+\tRoot = {self.root}
+\tSubnetworks chromosomes = {counts[GenericChromosomeParseResult.Retcodes.SUBNETWORKS]}
+\tQuadrants chromosomes = {counts[GenericChromosomeParseResult.Retcodes.QUADRANTS]}
+\tConnections chromosomes = {counts[GenericChromosomeParseResult.Retcodes.CONNECTIONS]}
+\tUnrecognised files = {len(self.unrecognised)}
+\tFailed parses = {len(self.failures)}"""
+
+
+#walks root for chromosome files and, on a pool of workers, reads each one once, classifies it
+#by its magic and decodes the same bytes. executor picks the pool. with parse=False only the
+#inventory is built, from one bounded read of each file's magic on threads.
+#parsing from memory always decodes with the numpy parser, whichever backend is selected
+def scan_directory(root, workers=None, executor="thread", parse=True, suffix=".chr"):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if executor == "process":
+        executor_type = ProcessPoolExecutor
+    elif executor == "thread":
+        executor_type = ThreadPoolExecutor
+    else:
+        raise ValueError(f"Unknown executor \"{executor}\", expected \"process\" or \"thread\"")
+
+    paths = list(_walk(root, suffix))
+    entries = []
+    results = {}
+    if parse:
+        with executor_type(max_workers=workers) as pool:
+            for entry, result in pool.map(_classify_and_parse, paths):
+                entries.append(entry)
+                if result is not None:
+                    results[entry.path] = result
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            entries = list(pool.map(classify, paths))
+
+    recognised = [entry for entry in entries if entry.kind in _RECOGNISED]
+    logger.debug("Scanned \"%s\": %s chromosome files, %s recognised", root, len(entries), len(recognised))
+
+    scan = DirectoryScan(root, entries, results)
+    if scan.failures:
+        logger.error(f"{len(scan.failures)} of {len(recognised)} chromosomes under \"{root}\" failed to parse")
+    return scan
@@ -0,0 +1,123 @@
+import struct
+
+import numpy as np
+
+from . import numpyparser
+from .networkparser import \
+    SubnetworkChromosomeParseResult, \
+    ConnectionsChromosomeParseResult, \
+    SubnetworkGene, \
+    QuadrantConnections, \
+    NetworkGenome, \
+    logger
+
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_COUNT = struct.Struct("<I")
+_SUBNETWORK_GENE_HEADER = struct.Struct("<QI")
+_QUADRANT_CONNECTIONS_HEADER = struct.Struct("<III")
+
+
+def _fail(kind, path, return_code, additional_info):
+    logger.error(f"Error streaming {kind} chromosome \"{path}\": {return_code}, Additional info = {additional_info}")
+    exception_message = f"{return_code}: Additional info = {additional_info}"
+    raise NetworkGenome.ChromosomeParseException(exception_message, return_code, additional_info)
+
+
+def _open(kind, path, magic, bad_path, short, magic_info, chunk_size):
+    #validates the chromosome header the same way the C++ parsers do, returning the open
+    #file positioned at the first gene along with the declared count
+    try:
+        chromosome_file = open(path, "rb", buffering=chunk_size)
+    except OSError:
+        _fail(kind, path, bad_path, -1)
+
+    header = chromosome_file.read(8)
+    if len(header) < 4:
+        chromosome_file.close()
+        _fail(kind, path, short, magic_info)
+    if header[:4] != magic:
+        chromosome_file.close()
+        _fail(kind, path, bad_path, magic_info)
+    if len(header) < 8:
+        chromosome_file.close()
+        _fail(kind, path, short, -1)
+
+    count, = _COUNT.unpack_from(header, 4)
+    return chromosome_file, count
+
+
+def _read(chromosome_file, size, chunk_size):
+    #reads up to size bytes a chunk at a time, so a corrupt count can't force a huge allocation
+    if size <= chunk_size:
+        return chromosome_file.read(size)
+
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = chromosome_file.read(min(remaining, chunk_size))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+#yields each gene of a subnetwork chromosome in turn, reading through a buffer of chunk_size
+#bytes, so memory use is bounded by the largest single gene rather than the whole file.
+#with arrays=True, (gene_index, codons) pairs are yielded instead of SubnetworkGene objects.
+#a ChromosomeParseException is raised at the gene where the stream breaks, carrying the same
+#return code and additional info that from_file would report
+def iter_subnetwork_genes(path, chunk_size=DEFAULT_CHUNK_SIZE, arrays=False):
+    retcodes = SubnetworkChromosomeParseResult.Retcodes
+    chromosome_file, gene_count = _open(
+        "subnetwork", path, numpyparser.SUBNETWORKS_MAGIC,
+        retcodes.BAD_PATH, retcodes.FILE_SHORT, 0, chunk_size)
+
+    with chromosome_file:
+        for i in range(gene_count):
+            header = chromosome_file.read(_SUBNETWORK_GENE_HEADER.size)
+            if len(header) < _SUBNETWORK_GENE_HEADER.size:
+                _fail("subnetwork", path, retcodes.BAD_GENE, i)
+            gene_index, codon_count = _SUBNETWORK_GENE_HEADER.unpack(header)
+
+            data = _read(chromosome_file, codon_count * numpyparser.CODON_DTYPE.itemsize, chunk_size)
+            if len(data) < codon_count * numpyparser.CODON_DTYPE.itemsize:
+                if len(data) % numpyparser.CODON_DTYPE.itemsize == 0:
+                    _fail("subnetwork", path, retcodes.MISSING_GENES, i)
+                _fail("subnetwork", path, retcodes.BAD_GENE, i)
+
+            codons = np.frombuffer(data, dtype=numpyparser.CODON_DTYPE)
+            if arrays:
+                yield gene_index, codons
+            else:
+                codon_records = list(map(numpyparser.CodonRecord._make, codons.tolist()))
+                yield SubnetworkGene(numpyparser.SubnetworkGeneRecord(gene_index, codon_records, codon_count))
+
+
+#as iter_subnetwork_genes, for the QuadrantConnections blocks of a connections chromosome.
+#with arrays=True, (source_quadrant_index, target_quadrant_index, connection_genes) is yielded
+def iter_quadrant_connections(path, chunk_size=DEFAULT_CHUNK_SIZE, arrays=False):
+    retcodes = ConnectionsChromosomeParseResult.Retcodes
+    chromosome_file, quadrant_connections_count = _open(
+        "connections", path, numpyparser.CONNECTIONS_MAGIC,
+        retcodes.BAD_PATH, retcodes.SHORT, -1, chunk_size)
+
+    with chromosome_file:
+        for i in range(quadrant_connections_count):
+            header = chromosome_file.read(_QUADRANT_CONNECTIONS_HEADER.size)
+            if len(header) < _QUADRANT_CONNECTIONS_HEADER.size:
+                _fail("connections", path, retcodes.QUADRANT_SHORT, i)
+            source, target, gene_count = _QUADRANT_CONNECTIONS_HEADER.unpack(header)
+
+            data = _read(chromosome_file, gene_count * numpyparser.CONNECTION_GENE_DTYPE.itemsize, chunk_size)
+            if len(data) < gene_count * numpyparser.CONNECTION_GENE_DTYPE.itemsize:
+                _fail("connections", path, retcodes.QUADRANT_SHORT, i)
+
+            connection_genes = np.frombuffer(data, dtype=numpyparser.CONNECTION_GENE_DTYPE)
+            if arrays:
+                yield source, target, connection_genes
+            else:
+                gene_records = list(map(numpyparser.ConnectionGeneRecord._make, connection_genes.tolist()))
+                yield QuadrantConnections(numpyparser.QuadrantConnectionsRecord(gene_records, gene_count, source, target))
@@ -0,0 +1,181 @@
+import mmap
+import os
+import pathlib
+import struct
+
+import numpy as np
+
+from . import numpyparser
+from .chromosomewriter import \
+    encode_subnetwork_genes, \
+    encode_quadrant_chromosome, \
+    encode_quadrant_connections_blocks
+from .networkparser import \
+    SOURCE_TYPE_INPUT, \
+    SOURCE_TYPE_HIDDEN, \
+    TARGET_TYPE_HIDDEN, \
+    TARGET_TYPE_OUTPUT
+
+
+#every valid pairing of one SOURCE_TYPE_ bit with one TARGET_TYPE_ bit
+VALID_TYPES = np.array([
+    SOURCE_TYPE_INPUT | TARGET_TYPE_HIDDEN,
+    SOURCE_TYPE_INPUT | TARGET_TYPE_OUTPUT,
+    SOURCE_TYPE_HIDDEN | TARGET_TYPE_HIDDEN,
+    SOURCE_TYPE_HIDDEN | TARGET_TYPE_OUTPUT
+], dtype=np.uint8)
+
+#shape of every generated subnetwork
+INPUT_COUNT = 8
+HIDDEN_COUNT = 16
+OUTPUT_COUNT = 4
+
+#genes are generated and written this many codons at a time, so that chromosomes far larger
+#than memory can be produced
+_BATCH_CODONS = 1 << 22
+
+_COUNT = struct.Struct("<I")
+
+
+def _random_codons(rng, codon_counts):
+    codons = np.empty(int(np.sum(codon_counts)), dtype=numpyparser.CODON_DTYPE)
+    types = rng.choice(VALID_TYPES, size=len(codons))
+    source_is_input = (types & SOURCE_TYPE_INPUT) != 0
+    target_is_hidden = (types & TARGET_TYPE_HIDDEN) != 0
+
+    #codons are numbered from zero within each gene
+    starts = np.repeat(np.cumsum(codon_counts) - codon_counts, codon_counts)
+    codons["CodonIndex"] = np.arange(len(codons)) - starts
+    codons["Source"] = np.where(
+        source_is_input, rng.integers(0, INPUT_COUNT, len(codons)), rng.integers(0, HIDDEN_COUNT, len(codons)))
+    codons["Target"] = np.where(
+        target_is_hidden, rng.integers(0, HIDDEN_COUNT, len(codons)), rng.integers(0, OUTPUT_COUNT, len(codons)))
+    codons["Types"] = types
+    codons["Weight"] = rng.standard_normal(len(codons), dtype=np.float32)
+    return codons
+
+
+def _random_connection_genes(rng, count, subnetworks_per_quadrant):
+    connection_genes = np.empty(count, dtype=numpyparser.CONNECTION_GENE_DTYPE)
+    connection_genes["Weight"] = rng.standard_normal(count, dtype=np.float32)
+    connection_genes["SourceSubnetworkIndex"] = rng.integers(0, max(subnetworks_per_quadrant, 1), count)
+    connection_genes["SourceOutputIndex"] = rng.integers(0, OUTPUT_COUNT, count)
+    connection_genes["TargetSubnetworkIndex"] = rng.integers(0, max(subnetworks_per_quadrant, 1), count)
+    connection_genes["TargetInputIndex"] = rng.integers(0, INPUT_COUNT, count)
+    return connection_genes
+
+
+
+#-----VALID CHROMOSOMES-----
+def write_subnetwork_chromosome(path, gene_count, codons_per_gene, seed=0):
+    rng = np.random.default_rng(seed)
+    genes_per_batch = max(1, _BATCH_CODONS // max(codons_per_gene, 1))
+
+    with open(path, "wb") as chromosome_file:
+        chromosome_file.write(numpyparser.SUBNETWORKS_MAGIC + _COUNT.pack(gene_count))
+        for first_gene in range(0, gene_count, genes_per_batch):
+            batch_size = min(genes_per_batch, gene_count - first_gene)
+            codon_counts = np.full(batch_size, codons_per_gene, dtype=np.int64)
+            gene_offsets = np.zeros(batch_size + 1, dtype=np.int64)
+            np.cumsum(codon_counts, out=gene_offsets[1:])
+
+            gene_indices = np.arange(first_gene, first_gene + batch_size, dtype=np.uint64)
+            chromosome_file.write(encode_subnetwork_genes(gene_indices, gene_offsets, _random_codons(rng, codon_counts)))
+
+
+def write_quadrant_chromosome(path, quadrant_count, subnetworks_per_quadrant, gene_count, seed=0):
+    rng = np.random.default_rng(seed)
+    subnetwork_indices = rng.integers(0, max(gene_count, 1), (quadrant_count, subnetworks_per_quadrant), dtype=np.uint32)
+    with open(path, "wb") as chromosome_file:
+        chromosome_file.write(encode_quadrant_chromosome(subnetwork_indices, subnetworks_per_quadrant))
+
+
+def write_connections_chromosome(path, quadrant_pairs, connections_per_pair, quadrant_count, subnetworks_per_quadrant, seed=0):
+    rng = np.random.default_rng(seed)
+    pairs_per_batch = max(1, _BATCH_CODONS // max(connections_per_pair, 1))
+
+    with open(path, "wb") as chromosome_file:
+        chromosome_file.write(numpyparser.CONNECTIONS_MAGIC + _COUNT.pack(quadrant_pairs))
+        for first_pair in range(0, quadrant_pairs, pairs_per_batch):
+            batch_size = min(pairs_per_batch, quadrant_pairs - first_pair)
+            gene_offsets = np.arange(batch_size + 1, dtype=np.int64) * connections_per_pair
+
+            chromosome_file.write(encode_quadrant_connections_blocks(
+                rng.integers(0, max(quadrant_count, 1), batch_size, dtype=np.uint32),
+                rng.integers(0, max(quadrant_count, 1), batch_size, dtype=np.uint32),
+                gene_offsets,
+                _random_connection_genes(rng, batch_size * connections_per_pair, subnetworks_per_quadrant)
+            ))
+
+
+#writes a valid genome directory of the given size and returns its path. every count is
+#configurable, and the same seed always produces the same genome
+def generate_genome(
+        path,
+        gene_count=1000,
+        codons_per_gene=100,
+        quadrant_count=16,
+        subnetworks_per_quadrant=8,
+        quadrant_pairs=64,
+        connections_per_pair=100,
+        seed=0):
+    path = pathlib.Path(path)
+    os.makedirs(path, exist_ok=True)
+    write_subnetwork_chromosome(path.joinpath("subnetworks.chr"), gene_count, codons_per_gene, seed)
+    write_quadrant_chromosome(path.joinpath("quadrants.chr"), quadrant_count, subnetworks_per_quadrant, gene_count, seed + 1)
+    write_connections_chromosome(
+        path.joinpath("connections.chr"),
+        quadrant_pairs, connections_per_pair, quadrant_count, subnetworks_per_quadrant, seed + 2)
+    return path
+
+
+
+#-----CORRUPTED CHROMOSOMES-----
+#each corruption truncates or overwrites a valid chromosome to provoke one specific error.
+#the gene (or QuadrantConnections block) that breaks is the one at position
+CORRUPTIONS = (
+    "short",
+    "bad_magic",
+    "missing_genes",
+    "bad_gene",
+    "missing_quadrants",
+    "quadrant_short"
+)
+
+
+def _record_start(path, position):
+    #byte offset and data size of a gene or QuadrantConnections block, found by walking the headers
+    with open(path, "rb") as chromosome_file:
+        buffer = mmap.mmap(chromosome_file.fileno(), 0, access=mmap.ACCESS_READ)
+    with buffer:
+        if buffer[:4] == numpyparser.SUBNETWORKS_MAGIC:
+            index = numpyparser.index_subnetwork_genes(buffer)
+            data_size = int(index.codon_counts[position]) * numpyparser.CODON_DTYPE.itemsize
+            return int(index.codon_starts[position]) - 12, data_size
+        index = numpyparser.index_quadrant_connections(buffer)
+        data_size = int(index.connection_gene_counts[position]) * numpyparser.CONNECTION_GENE_DTYPE.itemsize
+        return int(index.gene_starts[position]) - 12, data_size
+
+
+def corrupt_chromosome(path, corruption, position=0):
+    if corruption == "short":
+        os.truncate(path, 2)
+    elif corruption == "bad_magic":
+        with open(path, "r+b") as chromosome_file:
+            chromosome_file.write(b"XXXX")
+    elif corruption == "missing_genes":
+        #ends the file on a codon boundary, halfway through the gene
+        start, data_size = _record_start(path, position)
+        codon_count = data_size // numpyparser.CODON_DTYPE.itemsize
+        os.truncate(path, start + 12 + (codon_count // 2) * numpyparser.CODON_DTYPE.itemsize)
+    elif corruption == "bad_gene":
+        #ends the file partway through the first codon, or through the header of an empty gene
+        start, data_size = _record_start(path, position)
+        os.truncate(path, start + (12 + numpyparser.CODON_DTYPE.itemsize // 2 if data_size else 6))
+    elif corruption == "missing_quadrants":
+        os.truncate(path, max(12, os.path.getsize(path) - 2))
+    elif corruption == "quadrant_short":
+        start, data_size = _record_start(path, position)
+        os.truncate(path, start + (12 + data_size // 2 if data_size else 6))
+    else:
+        raise ValueError(f"Unknown corruption \"{corruption}\", expected one of {CORRUPTIONS}")
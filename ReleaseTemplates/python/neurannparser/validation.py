@@ -0,0 +1,248 @@
+import collections
+import os
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from .columnar import ColumnarGenome
+from .networkparser import \
+    SOURCE_TYPE_INPUT, \
+    SOURCE_TYPE_HIDDEN, \
+    TARGET_TYPE_HIDDEN, \
+    TARGET_TYPE_OUTPUT, \
+    NetworkGenome, \
+    logger
+
+
+#every check, in report order, as (name, chromosome, what position/item/value hold)
+CHECKS = (
+    ("duplicate_gene_index", "subnetworks", "gene, -1, GeneIndex"),
+    ("invalid_codon_types", "subnetworks", "gene, codon, Types"),
+    ("codon_source_out_of_range", "subnetworks", "gene, codon, Source"),
+    ("codon_target_out_of_range", "subnetworks", "gene, codon, Target"),
+    ("non_finite_codon_weight", "subnetworks", "gene, codon, -1"),
+    ("missing_subnetwork_gene", "quadrants", "quadrant, slot, GeneIndex"),
+    ("source_quadrant_out_of_range", "connections", "block, -1, SourceQuadrantIndex"),
+    ("target_quadrant_out_of_range", "connections", "block, -1, TargetQuadrantIndex"),
+    ("source_subnetwork_out_of_range", "connections", "block, connection gene, SourceSubnetworkIndex"),
+    ("target_subnetwork_out_of_range", "connections", "block, connection gene, TargetSubnetworkIndex"),
+    ("source_output_out_of_range", "connections", "block, connection gene, SourceOutputIndex"),
+    ("target_input_out_of_range", "connections", "block, connection gene, TargetInputIndex"),
+    ("non_finite_connection_weight", "connections", "block, connection gene, -1"),
+)
+
+_CHECK_CODES = {name: code for code, (name, _, _) in enumerate(CHECKS)}
+
+VIOLATION_DTYPE = np.dtype([
+    ("Check", "u1"),
+    ("Position", "<i8"),
+    ("Item", "<i8"),
+    ("Value", "<i8")
+])
+
+Violation = collections.namedtuple("Violation", ["check", "chromosome", "position", "item", "value"])
+
+_VALID_TYPES = np.array([
+    SOURCE_TYPE_INPUT | TARGET_TYPE_HIDDEN,
+    SOURCE_TYPE_INPUT | TARGET_TYPE_OUTPUT,
+    SOURCE_TYPE_HIDDEN | TARGET_TYPE_HIDDEN,
+    SOURCE_TYPE_HIDDEN | TARGET_TYPE_OUTPUT
+], dtype=np.uint8)
+
+
+#the outcome of validating one genome. every violation is one record of a structured array,
+#so a badly broken genome with millions of violations stays cheap to report on
+class ValidationReport:
+    def __init__(self, violations, path=None):
+        self.violations = violations
+        self.path = path
+
+    @property
+    def ok(self):
+        return len(self.violations) == 0
+
+    def __bool__(self):
+        return self.ok
+
+    def __len__(self):
+        return len(self.violations)
+
+    def counts(self):
+        #number of violations of each check that failed
+        codes, counts = np.unique(self.violations["Check"], return_counts=True)
+        return {CHECKS[code][0]: int(count) for code, count in zip(codes.tolist(), counts.tolist())}
+
+    def of_check(self, check):
+        return self.violations[self.violations["Check"] == _CHECK_CODES[check]]
+
+    def __iter__(self):
+        for code, position, item, value in self.violations.tolist():
+            name, chromosome, _ = CHECKS[code]
+            yield Violation(name, chromosome, position, item, value)
+
+    def __str__(self):
+        genome = "Genome" if self.path is None else f"\"{self.path}\""
+        if self.ok:
+            return f"ValidationReport: {genome} is valid"
+        counts = "\n".join(f"\t{check} = {count}" for check, count in self.counts().items())
+        return f"""ValidationReport: {genome} has {len(self)} violations
+{counts}"""
+
+
+
+#-----CHECKS-----
+def _violations(check, mask, position, item, value):
+    #collects the masked elements of one check into violation records
+    selected = np.flatnonzero(mask)
+    records = np.empty(len(selected), dtype=VIOLATION_DTYPE)
+    records["Check"] = _CHECK_CODES[check]
+    for field, column in (("Position", position), ("Item", item), ("Value", value)):
+        records[field] = column[selected] if isinstance(column, np.ndarray) else column
+    return records
+
+
+def _gene_positions(gene_indices, subnetwork_indices):
+    #position of each GeneIndex in the subnetwork chromosome, or -1 where there is no such gene
+    positions = np.full(len(subnetwork_indices), -1, dtype=np.int64)
+    if len(gene_indices) == 0:
+        return positions
+    order = np.argsort(gene_indices, kind="stable")
+    sorted_indices = gene_indices[order]
+    search = np.minimum(np.searchsorted(sorted_indices, subnetwork_indices), len(order) - 1)
+    found = sorted_indices[search] == subnetwork_indices
+    positions[found] = order[search[found]]
+    return positions
+
+
+def _check_subnetworks(columns, input_count, hidden_count, output_count):
+    reports = []
+    gene_positions = np.arange(columns.gene_count, dtype=np.int64)
+
+    #only the later copies of a GeneIndex are reported
+    order = np.argsort(columns.gene_indices, kind="stable")
+    sorted_indices = columns.gene_indices[order]
+    duplicate = np.zeros(columns.gene_count, dtype=bool)
+    duplicate[order[1:]] = sorted_indices[1:] == sorted_indices[:-1]
+    reports.append(_violations("duplicate_gene_index", duplicate, gene_positions, -1, columns.gene_indices.astype(np.int64)))
+
+    codon_gene = columns.codon_gene
+    codon_item = np.arange(columns.codon_count, dtype=np.int64) - columns.gene_offsets[:-1][codon_gene]
+    reports.append(_violations(
+        "invalid_codon_types", ~np.isin(columns.types, _VALID_TYPES), codon_gene, codon_item, columns.types))
+
+    #node indices can only be range checked against layer sizes given by the caller
+    source_limit = np.where(columns.source_is_input, -1 if input_count is None else input_count,
+                            -1 if hidden_count is None else hidden_count)
+    target_limit = np.where(columns.target_is_hidden, -1 if hidden_count is None else hidden_count,
+                            -1 if output_count is None else output_count)
+    reports.append(_violations(
+        "codon_source_out_of_range", (source_limit >= 0) & (columns.source >= source_limit),
+        codon_gene, codon_item, columns.source))
+    reports.append(_violations(
+        "codon_target_out_of_range", (target_limit >= 0) & (columns.target >= target_limit),
+        codon_gene, codon_item, columns.target))
+
+    reports.append(_violations("non_finite_codon_weight", ~np.isfinite(columns.weight), codon_gene, codon_item, -1))
+    return reports
+
+
+def _check_quadrants(columns, instance_genes):
+    spq = columns.subnetworks_per_quadrant
+    slots = np.arange(len(instance_genes), dtype=np.int64)
+    return [_violations(
+        "missing_subnetwork_gene", instance_genes < 0, slots // max(spq, 1), slots % max(spq, 1),
+        columns.quadrant_definitions.ravel().astype(np.int64))]
+
+
+def _check_connections(columns, input_count, output_count):
+    reports = []
+    spq = columns.subnetworks_per_quadrant
+    blocks = np.arange(columns.quadrant_connections_count, dtype=np.int64)
+
+    source_quadrant_bad = columns.source_quadrant_index >= columns.quadrant_count
+    target_quadrant_bad = columns.target_quadrant_index >= columns.quadrant_count
+    reports.append(_violations(
+        "source_quadrant_out_of_range", source_quadrant_bad, blocks, -1, columns.source_quadrant_index))
+    reports.append(_violations(
+        "target_quadrant_out_of_range", target_quadrant_bad, blocks, -1, columns.target_quadrant_index))
+
+    block = columns.connection_block
+    item = np.arange(columns.connection_count, dtype=np.int64) - columns.connection_offsets[:-1][block]
+    source_slot_bad = columns.source_subnetwork_index >= spq
+    target_slot_bad = columns.target_subnetwork_index >= spq
+    reports.append(_violations(
+        "source_subnetwork_out_of_range", source_slot_bad, block, item, columns.source_subnetwork_index))
+    reports.append(_violations(
+        "target_subnetwork_out_of_range", target_slot_bad, block, item, columns.target_subnetwork_index))
+
+    #ports, like codon node indices, can only be range checked against layer sizes given by the
+    #caller. a subnetwork's codons needn't use every port, so CompiledNetwork sizes each layer
+    #from the largest index used anywhere in the genome, which no port can exceed.
+    #-1 where the subnetwork itself can't be resolved, which is reported by the checks above
+    def port_limit(quadrant_bad, slot_bad, layer_count):
+        resolvable = ~quadrant_bad[block] & ~slot_bad
+        return np.where(resolvable, -1 if layer_count is None else layer_count, -1)
+
+    output_limit = port_limit(source_quadrant_bad, source_slot_bad, output_count)
+    input_limit = port_limit(target_quadrant_bad, target_slot_bad, input_count)
+    reports.append(_violations(
+        "source_output_out_of_range", (output_limit >= 0) & (columns.source_output_index >= output_limit),
+        block, item, columns.source_output_index))
+    reports.append(_violations(
+        "target_input_out_of_range", (input_limit >= 0) & (columns.target_input_index >= input_limit),
+        block, item, columns.target_input_index))
+
+    reports.append(_violations(
+        "non_finite_connection_weight", ~np.isfinite(columns.connection_weight), block, item, -1))
+    return reports
+
+
+#runs every referential and range check over a NetworkGenome or ColumnarGenome.
+#codon node indices and connection ports are only range checked when layer sizes are given
+def validate_genome(genome, input_count=None, hidden_count=None, output_count=None):
+    columns = genome if isinstance(genome, ColumnarGenome) else ColumnarGenome.from_genome(genome)
+    instance_genes = _gene_positions(columns.gene_indices, columns.quadrant_definitions.ravel())
+
+    reports = _check_subnetworks(columns, input_count, hidden_count, output_count)
+    reports += _check_quadrants(columns, instance_genes)
+    reports += _check_connections(columns, input_count, output_count)
+    return ValidationReport(np.concatenate(reports), path=getattr(genome, "path", None))
+
+
+
+#-----POPULATIONS-----
+def _validate_path(arguments):
+    path, input_count, hidden_count, output_count = arguments
+    try:
+        report = validate_genome(ColumnarGenome.from_directory(path), input_count, hidden_count, output_count)
+    except NetworkGenome.ChromosomeParseException as e:
+        return e
+    report.path = path
+    return report
+
+
+#validates every genome directory in paths in parallel, returning one entry per path in input
+#order. genomes that fail to parse are returned as their ChromosomeParseException
+def validate_population(paths, workers=None, executor="process", input_count=None, hidden_count=None, output_count=None):
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if executor == "process":
+        executor_type = ProcessPoolExecutor
+    elif executor == "thread":
+        executor_type = ThreadPoolExecutor
+    else:
+        raise ValueError(f"Unknown executor \"{executor}\", expected \"process\" or \"thread\"")
+
+    logger.debug("Validating population of %s genomes with %s %s workers", len(paths), workers, executor)
+    arguments = [(path, input_count, hidden_count, output_count) for path in paths]
+    with executor_type(max_workers=workers) as pool:
+        chunksize = max(1, len(paths) // (4 * workers)) if executor == "process" else 1
+        results = list(pool.map(_validate_path, arguments, chunksize=chunksize))
+
+    invalid = sum(not isinstance(result, ValidationReport) or not result.ok for result in results)
+    if invalid:
+        logger.warning(f"{invalid} of {len(paths)} genomes failed validation")
+    return results
@@ -15,6 +15,7 @@ setup(
     license='MIT',
     packages=['neurannparser'],
     package_data= {'neurannparser' : ['NetworkParser.dll']},
+    install_requires=['numpy'],
     distclass=BinaryDistribution,
 
     classifiers=[
@@ -23,6 +24,7 @@ setup(
         'Intended Audience :: Science/Research'
         'License :: OSI Approved :: MIT License',  
         'Operating System :: Microsoft :: Windows',        
+        'Operating System :: POSIX :: Linux',        
         'Programming Language :: Python :: 3.9',        
         'Programming Language :: Python :: 3.10',        
         'Programming Language :: Python :: 3.11',        
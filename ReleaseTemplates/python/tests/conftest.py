@@ -0,0 +1,25 @@
+import pytest
+
+from neurannparser import synthetic
+
+
+#a small genome with every kind of chromosome content, the same on every run
+@pytest.fixture
+def genome_path(tmp_path):
+    return synthetic.generate_genome(
+        tmp_path.joinpath("genome"), gene_count=50, codons_per_gene=20, quadrant_count=6,
+        subnetworks_per_quadrant=4, quadrant_pairs=10, connections_per_pair=15, seed=3)
+
+
+#a population of small genomes, each from its own seed, with the one at corrupt_position
+#broken by a bad gene
+@pytest.fixture
+def population_paths(tmp_path):
+    paths = [
+        synthetic.generate_genome(
+            tmp_path.joinpath(f"g{i}"), gene_count=20, codons_per_gene=5, quadrant_count=4,
+            subnetworks_per_quadrant=2, quadrant_pairs=6, connections_per_pair=4, seed=i)
+        for i in range(6)
+    ]
+    synthetic.corrupt_chromosome(paths[3].joinpath("subnetworks.chr"), "bad_gene", 10)
+    return paths
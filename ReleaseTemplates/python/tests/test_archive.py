@@ -0,0 +1,78 @@
+import pytest
+
+from neurannparser import NetworkGenome, ColumnarGenome, GenomeArchive, SubnetworkChromosomeParseResult
+from neurannparser.chromosomewriter import GENOME_CHROMOSOME_FILES, encode_genome, encode_columnar_genome
+
+
+def _read(path):
+    return tuple(path.joinpath(name).read_bytes() for name in GENOME_CHROMOSOME_FILES)
+
+
+@pytest.mark.parametrize("compression", [None, "zlib", "lzma"])
+#every genome comes back out exactly as the files it was written from
+def test_write_extract_round_trip(population_paths, tmp_path, compression):
+    archive_path = GenomeArchive.write(tmp_path.joinpath("population.garc"), population_paths, compression=compression)
+
+    with GenomeArchive.open(archive_path) as archive:
+        assert len(archive) == len(population_paths)
+        for i, path in enumerate(population_paths):
+            extracted = tmp_path.joinpath(f"extracted{i}")
+            archive.extract(i, extracted)
+            assert _read(extracted) == _read(path)
+
+
+@pytest.mark.parametrize("compression", [None, "zlib"])
+def test_genomes_and_columns_match_the_directories(genome_path, tmp_path, compression):
+    genome = NetworkGenome(genome_path)
+    columns = ColumnarGenome.from_directory(genome_path)
+    archive_path = GenomeArchive.write(
+        tmp_path.joinpath("genomes.garc"), [genome_path, genome, columns, _read(genome_path)], compression=compression)
+
+    with GenomeArchive.open(archive_path) as archive:
+        for i in range(len(archive)):
+            assert encode_genome(archive.genome(i)) == _read(genome_path)
+            assert encode_columnar_genome(archive.columns(i)) == _read(genome_path)
+
+
+def test_names_and_lookup(population_paths, tmp_path):
+    names = ["a", "b", "a", "c", "d", "e"]
+    archive_path = GenomeArchive.write(tmp_path.joinpath("named.garc"), population_paths, names=names)
+
+    with GenomeArchive.open(archive_path) as archive:
+        assert archive.names == names
+        assert archive.index_of("a") == 0
+        assert archive.index_of("d") == 4
+        assert bytes(archive.chromosome("c", 0)) == population_paths[3].joinpath("subnetworks.chr").read_bytes()
+        with pytest.raises(KeyError):
+            archive.index_of("missing")
+
+        #the corrupt genome is stored as it is, and fails the way its directory does. the
+        #exception is dropped before closing, since its traceback holds views into the archive
+        return_code = None
+        try:
+            archive.genome("c")
+        except NetworkGenome.ChromosomeParseException as e:
+            return_code = e.return_code
+        assert return_code == SubnetworkChromosomeParseResult.Retcodes.BAD_GENE
+
+
+def test_open_views_block_close(genome_path, tmp_path):
+    archive = GenomeArchive.open(GenomeArchive.write(tmp_path.joinpath("views.garc"), [genome_path]))
+    view = archive.chromosome(0, 0)
+    with pytest.raises(BufferError):
+        archive.close()
+    view.release()
+    archive.close()
+
+
+@pytest.mark.parametrize("data", [b"", b"GARC", b"NOPE" + b"\0" * 60])
+def test_bad_archives(tmp_path, data):
+    path = tmp_path.joinpath("bad.garc")
+    path.write_bytes(data)
+    with pytest.raises(GenomeArchive.ArchiveFormatException):
+        GenomeArchive.open(path)
+
+
+def test_unknown_compression(genome_path, tmp_path):
+    with pytest.raises(ValueError):
+        GenomeArchive.write(tmp_path.joinpath("bad.garc"), [genome_path], compression="zstd")
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from neurannparser import NetworkGenome, ColumnarGenome, SubnetworkChromosomeParseResult, write_chromosome
+from neurannparser import numpyparser
+from neurannparser.chromosomewriter import \
+    GENOME_CHROMOSOME_FILES, \
+    encode_subnetwork_chromosome, \
+    encode_quadrant_chromosome, \
+    encode_connections_chromosome, \
+    encode_genome, \
+    encode_columnar_genome
+
+
+def _chromosome_bytes(path):
+    return tuple(path.joinpath(name).read_bytes() for name in GENOME_CHROMOSOME_FILES)
+
+
+def test_decode_then_encode_is_byte_identical(genome_path):
+    subnetworks, quadrants, connections = _chromosome_bytes(genome_path)
+
+    arrays = numpyparser.decode_subnetwork_chromosome(subnetworks)
+    assert encode_subnetwork_chromosome(arrays.gene_indices, arrays.gene_offsets, arrays.codons) == subnetworks
+    arrays = numpyparser.decode_quadrant_chromosome(quadrants)
+    assert encode_quadrant_chromosome(arrays.subnetwork_indices) == quadrants
+    arrays = numpyparser.decode_connections_chromosome(connections)
+    assert encode_connections_chromosome(
+        arrays.source_quadrant_indices, arrays.target_quadrant_indices,
+        arrays.gene_offsets, arrays.connection_genes) == connections
+
+
+def test_genomes_encode_to_their_files(genome_path):
+    original = _chromosome_bytes(genome_path)
+    assert encode_genome(NetworkGenome(genome_path)) == original
+    assert encode_columnar_genome(ColumnarGenome.from_directory(genome_path)) == original
+
+
+def test_write_chromosome_round_trips(genome_path, tmp_path):
+    write_chromosome(tmp_path.joinpath("copy"), NetworkGenome(genome_path))
+    assert _chromosome_bytes(tmp_path.joinpath("copy")) == _chromosome_bytes(genome_path)
+
+    result = SubnetworkChromosomeParseResult.from_file(genome_path.joinpath("subnetworks.chr"))
+    write_chromosome(tmp_path.joinpath("subnetworks.chr"), result)
+    assert tmp_path.joinpath("subnetworks.chr").read_bytes() == genome_path.joinpath("subnetworks.chr").read_bytes()
+
+
+def test_quadrant_table_shapes():
+    table = np.arange(12, dtype=np.uint32).reshape(3, 4)
+    assert encode_quadrant_chromosome(table) == encode_quadrant_chromosome(table.ravel(), 4)
+    assert numpyparser.decode_quadrant_chromosome(encode_quadrant_chromosome([], 4)).quadrant_count == 0
+    assert numpyparser.decode_quadrant_chromosome(encode_quadrant_chromosome(np.zeros((0, 4)))).subnetworks_per_quadrant == 4
+    for table in ([], [1, 2, 3]):
+        with pytest.raises(ValueError, match="subnetworks_per_quadrant"):
+            encode_quadrant_chromosome(table)
@@ -0,0 +1,35 @@
+import numpy as np
+
+from neurannparser import NetworkGenome, ColumnarGenome
+
+
+def _assert_same_columns(columns, other):
+    for field in ColumnarGenome.ARRAY_FIELDS:
+        np.testing.assert_array_equal(getattr(columns, field), getattr(other, field), err_msg=field)
+
+
+def test_directory_and_genome_give_the_same_columns(genome_path):
+    _assert_same_columns(ColumnarGenome.from_directory(genome_path), ColumnarGenome.from_genome(NetworkGenome(genome_path)))
+
+
+def test_to_file_round_trips(genome_path, tmp_path):
+    columns = ColumnarGenome.from_directory(genome_path)
+    columns.to_file(tmp_path.joinpath("copy"))
+    for name in ("subnetworks.chr", "quadrants.chr", "connections.chr"):
+        assert tmp_path.joinpath("copy", name).read_bytes() == genome_path.joinpath(name).read_bytes()
+    _assert_same_columns(ColumnarGenome.from_directory(tmp_path.joinpath("copy")), columns)
+
+
+def test_columns_match_genome_objects(genome_path):
+    genome = NetworkGenome(genome_path)
+    columns = ColumnarGenome.from_directory(genome_path)
+
+    assert columns.gene_indices.tolist() == [gene.gene_index for gene in genome.subnetwork_genes]
+    assert columns.codon_counts.tolist() == [gene.codon_count for gene in genome.subnetwork_genes]
+    assert columns.quadrant_definitions.tolist() == genome.quadrant_definitions
+    assert columns.connection_gene_counts.tolist() == \
+        [block.connection_gene_count for block in genome.quadrant_connections]
+    assert columns.weight.tolist() == [codon.weight for gene in genome.subnetwork_genes for codon in gene.codons]
+    np.testing.assert_allclose(
+        columns.sum_per_gene(columns.weight),
+        [sum(codon.weight for codon in gene.codons) for gene in genome.subnetwork_genes], rtol=1e-5, atol=1e-5)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from neurannparser import ColumnarGenome, CompiledNetwork, SOURCE_TYPE_INPUT, SOURCE_TYPE_HIDDEN, TARGET_TYPE_HIDDEN
+
+
+def _with_types(genome_path, types):
+    columns = ColumnarGenome.from_directory(genome_path)
+    #codons of the gene in quadrant 0, slot 0, which is always compiled
+    gene = int(np.flatnonzero(columns.gene_indices == columns.quadrant_definitions[0, 0])[0])
+    arrays = columns.to_dict()
+    arrays["types"] = columns.types.copy()
+    arrays["types"][columns.gene_offsets[gene]] = types
+    return ColumnarGenome(**arrays)
+
+
+def test_compiles_every_codon_once(genome_path):
+    columns = ColumnarGenome.from_directory(genome_path)
+    network = CompiledNetwork(columns)
+    codon_copies = int(np.sum(columns.codon_counts[
+        np.searchsorted(columns.gene_indices, columns.quadrant_definitions.ravel())]))
+    #duplicate edges are summed into one entry, so there can be fewer edges than codons
+    edges = network.input_to_hidden.nnz + network.input_to_output.nnz + \
+        network.hidden_to_hidden.nnz + network.hidden_to_output.nnz
+    assert 0 < edges <= codon_copies
+    weights = sum(float(np.sum(matrix.data)) for matrix in (
+        network.input_to_hidden, network.input_to_output, network.hidden_to_hidden, network.hidden_to_output))
+    instance_codons = np.concatenate([
+        columns.weight[columns.gene_offsets[gene]:columns.gene_offsets[gene + 1]]
+        for gene in np.searchsorted(columns.gene_indices, columns.quadrant_definitions.ravel())])
+    assert weights == pytest.approx(float(np.sum(instance_codons)), rel=1e-4)
+
+
+@pytest.mark.parametrize("types", [0, SOURCE_TYPE_INPUT, SOURCE_TYPE_INPUT | SOURCE_TYPE_HIDDEN | TARGET_TYPE_HIDDEN])
+def test_invalid_codon_types_rejected(genome_path, types):
+    with pytest.raises(ValueError, match="1 codons have Types"):
+        CompiledNetwork(_with_types(genome_path, types))
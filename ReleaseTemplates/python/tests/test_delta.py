@@ -0,0 +1,90 @@
+import struct
+
+import numpy as np
+import pytest
+
+from neurannparser import NetworkGenome, ColumnarGenome, GenomeDelta, load_child
+from neurannparser.chromosomewriter import GENOME_CHROMOSOME_FILES, encode_genome
+
+
+def _read(path):
+    return tuple(path.joinpath(name).read_bytes() for name in GENOME_CHROMOSOME_FILES)
+
+
+def _reweighted(columns):
+    arrays = columns.to_dict()
+    arrays["weight"] = arrays["weight"].copy()
+    arrays["weight"][::37] *= -1
+    arrays["connection_weight"] = arrays["connection_weight"].copy()
+    arrays["connection_weight"][5] += 1
+    return ColumnarGenome(**arrays)
+
+
+def _restructured(columns):
+    #genes lose codons, a quadrant is rewired and the first two blocks are swapped
+    columns = columns.select_codons(np.arange(columns.codon_count) % 7 != 0)
+    arrays = columns.to_dict()
+    arrays["quadrant_definitions"] = arrays["quadrant_definitions"].copy()
+    arrays["quadrant_definitions"][2] = arrays["quadrant_definitions"][2][::-1]
+
+    order = np.arange(columns.quadrant_connections_count)
+    order[:2] = order[1::-1]
+    connection_order = np.concatenate([
+        np.arange(columns.connection_offsets[block], columns.connection_offsets[block + 1]) for block in order])
+    for field in ("source_quadrant_index", "target_quadrant_index"):
+        arrays[field] = arrays[field][order]
+    for field in (
+            "connection_weight",
+            "source_subnetwork_index", "source_output_index",
+            "target_subnetwork_index", "target_input_index"):
+        arrays[field] = arrays[field][connection_order]
+    arrays["connection_offsets"] = np.zeros_like(columns.connection_offsets)
+    np.cumsum(columns.connection_gene_counts[order], out=arrays["connection_offsets"][1:])
+    return ColumnarGenome(**arrays)
+
+
+@pytest.mark.parametrize("mutate", [lambda columns: columns, _reweighted, _restructured])
+#a child written from a delta is byte for byte the child it was created from
+def test_delta_round_trip(genome_path, tmp_path, mutate):
+    mutate(ColumnarGenome.from_directory(genome_path)).to_file(tmp_path.joinpath("child"))
+
+    delta = GenomeDelta.create(genome_path, tmp_path.joinpath("child"))
+    data = delta.to_bytes()
+    assert len(data) == delta.nbytes
+    GenomeDelta.from_bytes(data).apply_to_file(genome_path, tmp_path.joinpath("applied"))
+    assert _read(tmp_path.joinpath("applied")) == _read(tmp_path.joinpath("child"))
+
+
+def test_unrelated_genomes_round_trip(population_paths, tmp_path):
+    delta = GenomeDelta.create(population_paths[0], NetworkGenome(population_paths[1]))
+    delta.to_file(tmp_path.joinpath("child.gdlt"))
+
+    child = load_child(NetworkGenome(population_paths[0]), tmp_path.joinpath("child.gdlt"))
+    assert encode_genome(child) == _read(population_paths[1])
+
+
+def test_small_mutations_make_small_deltas(genome_path, tmp_path):
+    ColumnarGenome.from_directory(genome_path).to_file(tmp_path.joinpath("child"))
+    unchanged = GenomeDelta.create(genome_path, tmp_path.joinpath("child"))
+    assert len(unchanged.new_codons) == len(unchanged.codon_patch_positions) == 0
+    assert unchanged.nbytes < sum(map(len, _read(genome_path))) // 10
+
+
+def test_wrong_parent(genome_path, tmp_path):
+    parent = ColumnarGenome.from_directory(genome_path)
+    delta = GenomeDelta.create(parent, _reweighted(parent))
+    with pytest.raises(ValueError):
+        delta.apply(_reweighted(parent))
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[:3],
+    lambda data: b"NOPE" + data[4:],
+    lambda data: data[:4] + struct.pack("<I", 1) + data[8:],
+    lambda data: data[:-1],
+])
+def test_bad_deltas(genome_path, corrupt):
+    parent = ColumnarGenome.from_directory(genome_path)
+    data = GenomeDelta.create(parent, _reweighted(parent)).to_bytes()
+    with pytest.raises(GenomeDelta.DeltaFormatException):
+        GenomeDelta.from_bytes(corrupt(data))
@@ -0,0 +1,59 @@
+import numpy as np
+
+from neurannparser import NetworkGenome, ColumnarGenome, GeneStore
+from neurannparser.chromosomewriter import GENOME_CHROMOSOME_FILES, encode_genome, encode_columnar_genome
+
+
+def _read(path):
+    return tuple(path.joinpath(name).read_bytes() for name in GENOME_CHROMOSOME_FILES)
+
+
+def _mutated(path):
+    #the genome with the first codon of its second gene reweighted
+    columns = ColumnarGenome.from_directory(path)
+    arrays = columns.to_dict()
+    arrays["weight"] = arrays["weight"].copy()
+    arrays["weight"][columns.gene_offsets[1]] += 1
+    return ColumnarGenome(**arrays)
+
+
+#stored genomes encode back to exactly the files they were added from
+def test_stored_genomes_round_trip(population_paths):
+    paths = [path for i, path in enumerate(population_paths) if i != 3]
+    store = GeneStore()
+    stored = store.add_many(paths)
+
+    for path, genome in zip(paths, stored):
+        assert encode_columnar_genome(genome.to_columns()) == _read(path)
+        assert encode_genome(genome.to_genome()) == _read(path)
+
+
+def test_identical_genomes_share_genes(genome_path):
+    store = GeneStore()
+    first = store.add(genome_path)
+    second = store.add(NetworkGenome(genome_path))
+    third = store.add(ColumnarGenome.from_directory(genome_path))
+
+    np.testing.assert_array_equal(first.gene_handles, second.gene_handles)
+    np.testing.assert_array_equal(first.block_handles, third.block_handles)
+    stats = store.stats()
+    assert stats["genomes"] == 3
+    assert stats["unique_genes"] == len(first.gene_handles)
+    assert stats["redundancy"] == 3.0
+    #shared handles give out shared objects
+    assert first.to_genome().subnetwork_genes[0] is second.to_genome().subnetwork_genes[0]
+
+
+def test_diff_finds_the_changed_gene(genome_path):
+    store = GeneStore()
+    parent = store.add(genome_path)
+    child_columns = _mutated(genome_path)
+    child = store.add(child_columns)
+
+    assert store.gene_count == len(parent.gene_handles) + 1
+    diff = parent.diff(child)
+    np.testing.assert_array_equal(diff.changed_genes, child_columns.gene_indices[1:2])
+    assert len(diff.added_genes) == len(diff.removed_genes) == 0
+    assert len(diff.added_blocks) == len(diff.removed_blocks) == 0
+    assert not diff.quadrants_changed
+    assert encode_columnar_genome(child.to_columns()) == encode_columnar_genome(child_columns)
@@ -0,0 +1,91 @@
+import os
+import shutil
+
+from neurannparser import \
+    NetworkGenome, \
+    ParseCache, \
+    SubnetworkChromosomeParseResult, \
+    QuadrantChromosomeParseResult, \
+    ConnectionsChromosomeParseResult, \
+    metrics
+from neurannparser.chromosomewriter import encode_genome
+
+
+RESULT_CLASSES = (SubnetworkChromosomeParseResult, QuadrantChromosomeParseResult, ConnectionsChromosomeParseResult)
+
+
+def test_hits_return_the_cached_result(genome_path):
+    cache = ParseCache()
+    path = genome_path.joinpath("subnetworks.chr")
+    first = cache.parse(SubnetworkChromosomeParseResult, path)
+    assert cache.parse(SubnetworkChromosomeParseResult, path) is first
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+    genome = NetworkGenome(genome_path, cache=cache)
+    assert encode_genome(genome) == encode_genome(NetworkGenome(genome_path))
+
+
+def test_modified_file_is_reparsed(genome_path, tmp_path):
+    cache = ParseCache()
+    path = genome_path.joinpath("quadrants.chr")
+    first = cache.parse(QuadrantChromosomeParseResult, path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.parse(QuadrantChromosomeParseResult, path) is not first
+    assert cache.stats()["misses"] == 2
+
+
+def test_lru_eviction_stays_in_budget(population_paths):
+    paths = [path.joinpath("connections.chr") for path in population_paths]
+    sizes = ParseCache()
+    for path in paths:
+        sizes.parse(ConnectionsChromosomeParseResult, path)
+    budget = sizes.stats()["current_bytes"] // 2
+
+    cache = ParseCache(max_bytes=budget)
+    for path in paths:
+        cache.parse(ConnectionsChromosomeParseResult, path)
+    stats = cache.stats()
+    assert stats["evictions"] > 0
+    assert stats["current_bytes"] <= budget
+    #the most recent entry survives, the oldest doesn't
+    cache.parse(ConnectionsChromosomeParseResult, paths[-1])
+    cache.parse(ConnectionsChromosomeParseResult, paths[0])
+    assert cache.stats()["hits"] == 1
+
+
+def test_content_key_matches_copies_and_disk_cache(genome_path, tmp_path):
+    copy = tmp_path.joinpath("copy.chr")
+    shutil.copyfile(genome_path.joinpath("subnetworks.chr"), copy)
+    cache = ParseCache(key="content", disk_path=tmp_path.joinpath("disk"))
+    first = cache.parse(SubnetworkChromosomeParseResult, genome_path.joinpath("subnetworks.chr"))
+    assert cache.parse(SubnetworkChromosomeParseResult, copy) is first
+
+    #a new cache over the same directory is served from disk
+    cache = ParseCache(key="content", disk_path=tmp_path.joinpath("disk"))
+    result = cache.parse(SubnetworkChromosomeParseResult, copy)
+    assert cache.stats()["disk_hits"] == 1
+    assert [repr(gene) for gene in result.genes] == [repr(gene) for gene in first.genes]
+
+
+def test_failures_are_not_cached(population_paths):
+    cache = ParseCache()
+    path = population_paths[3].joinpath("subnetworks.chr")
+    result = cache.parse(SubnetworkChromosomeParseResult, path)
+    assert result.return_code == SubnetworkChromosomeParseResult.Retcodes.BAD_GENE
+    assert cache.stats()["entries"] == 0
+
+
+def test_misses_are_recorded_in_metrics(genome_path):
+    metrics.enable()
+    metrics.reset()
+    try:
+        cache = ParseCache()
+        for result_class, name in zip(RESULT_CLASSES, ("subnetworks.chr", "quadrants.chr", "connections.chr")):
+            cache.parse(result_class, genome_path.joinpath(name))
+            cache.parse(result_class, genome_path.joinpath(name))
+        assert {kind: total["calls"] for kind, total in metrics.snapshot().items()} == \
+            {"subnetworks": 1, "quadrants": 1, "connections": 1}
+    finally:
+        metrics.disable()
+        metrics.reset()
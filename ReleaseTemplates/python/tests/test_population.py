@@ -0,0 +1,23 @@
+import pytest
+
+from neurannparser import NetworkGenome, ColumnarGenome, SubnetworkChromosomeParseResult, load_population
+from neurannparser.chromosomewriter import encode_columnar_genome
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+#results come back in input order, with the corrupt genome as its exception
+def test_population_matches_individual_loads(population_paths, executor):
+    results = load_population(population_paths, workers=2, executor=executor)
+    assert len(results) == len(population_paths)
+
+    for path, result in zip(population_paths, results):
+        if path == population_paths[3]:
+            assert isinstance(result, NetworkGenome.ChromosomeParseException)
+            assert result.return_code == SubnetworkChromosomeParseResult.Retcodes.BAD_GENE
+        else:
+            assert encode_columnar_genome(result) == encode_columnar_genome(ColumnarGenome.from_directory(path))
+
+
+def test_unknown_executor(population_paths):
+    with pytest.raises(ValueError):
+        load_population(population_paths, executor="fibre")
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from neurannparser import PopulationStatistics, ColumnarGenome, population_statistics
+from neurannparser.populationstats import Moments, QuantileSketch
+
+
+def _assert_reports_equal(report, expected):
+    #counts must match exactly, moments only to rounding since merging reorders the sums
+    assert type(report) is type(expected)
+    if isinstance(expected, dict):
+        assert report.keys() == expected.keys()
+        for key in expected:
+            _assert_reports_equal(report[key], expected[key])
+    elif isinstance(expected, list):
+        assert len(report) == len(expected)
+        for value, expected_value in zip(report, expected):
+            _assert_reports_equal(value, expected_value)
+    elif isinstance(expected, float):
+        assert report == pytest.approx(expected, rel=1e-9, abs=1e-12, nan_ok=True)
+    else:
+        assert report == expected
+
+
+def _sequential(paths):
+    statistics = PopulationStatistics()
+    for path in paths:
+        statistics.add(path)
+    return statistics
+
+
+#merging partials in any grouping gives what adding every genome in turn does
+def test_merged_chunks_match_sequential(population_paths):
+    expected = _sequential(population_paths)
+    assert expected.genome_count == len(population_paths) - 1
+    assert list(expected.failures) == [str(population_paths[3])]
+
+    merged = PopulationStatistics()
+    for chunk in (population_paths[4:], population_paths[:1], population_paths[1:4]):
+        merged.merge(_sequential(chunk))
+    _assert_reports_equal(merged.report(), expected.report())
+    assert merged.failures == expected.failures
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_population_statistics_match_sequential(population_paths, executor):
+    statistics = population_statistics(population_paths, workers=2, executor=executor, chunk_size=2)
+    _assert_reports_equal(statistics.report(), _sequential(population_paths).report())
+
+
+def test_counts_match_the_genomes(population_paths):
+    paths = [path for i, path in enumerate(population_paths) if i != 3]
+    statistics = _sequential(paths)
+    genomes = [ColumnarGenome.from_directory(path) for path in paths]
+
+    weights = np.concatenate([genome.weight for genome in genomes]).astype(np.float64)
+    assert statistics.codon_weight.moments.count == len(weights)
+    assert statistics.codon_weight.moments.mean == pytest.approx(weights.mean())
+    assert statistics.codon_types.total == len(weights)
+    assert statistics.codons_per_gene.total == sum(genome.gene_count for genome in genomes)
+    assert int(statistics.connection_genes_per_pair.counts.sum()) == sum(genome.connection_count for genome in genomes)
+
+
+def test_quantile_sketch_accuracy():
+    values = np.random.default_rng(0).normal(size=20000)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    sketch.add(values)
+    for q, estimate in zip((0.1, 0.5, 0.9), sketch.quantiles((0.1, 0.5, 0.9))):
+        exact = np.quantile(values, q)
+        assert abs(estimate - exact) <= 0.01 * abs(exact) + 1e-3
+
+
+def test_moments_merge():
+    values = np.random.default_rng(1).normal(2.0, 3.0, size=1000)
+    whole = Moments()
+    whole.add(values)
+    parts = Moments()
+    for chunk in np.array_split(values, 7):
+        part = Moments()
+        part.add(chunk)
+        parts.merge(part)
+    assert parts.count == whole.count
+    assert parts.mean == pytest.approx(whole.mean)
+    assert parts.variance == pytest.approx(whole.variance)
+
+
+def test_mismatched_settings_dont_merge():
+    with pytest.raises(ValueError):
+        PopulationStatistics().merge(PopulationStatistics(weight_bins=32))
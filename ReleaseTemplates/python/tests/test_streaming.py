@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from neurannparser import \
+    NetworkGenome, \
+    SubnetworkChromosomeParseResult, \
+    ConnectionsChromosomeParseResult, \
+    iter_subnetwork_genes, \
+    iter_quadrant_connections, \
+    synthetic
+from neurannparser import numpyparser
+
+
+#chunk sizes smaller than a single gene, mid-gene and larger than the file
+@pytest.mark.parametrize("chunk_size", [7, 4096, 1 << 20])
+def test_streamed_genes_match_the_full_parse(genome_path, chunk_size):
+    subnetworks = numpyparser.decode_subnetwork_chromosome(genome_path.joinpath("subnetworks.chr").read_bytes())
+    streamed = list(iter_subnetwork_genes(genome_path.joinpath("subnetworks.chr"), chunk_size, arrays=True))
+    assert [gene_index for gene_index, _ in streamed] == subnetworks.gene_indices.tolist()
+    assert np.concatenate([codons for _, codons in streamed]).tobytes() == subnetworks.codons.tobytes()
+
+    connections = numpyparser.decode_connections_chromosome(genome_path.joinpath("connections.chr").read_bytes())
+    streamed = list(iter_quadrant_connections(genome_path.joinpath("connections.chr"), chunk_size, arrays=True))
+    assert [source for source, _, _ in streamed] == connections.source_quadrant_indices.tolist()
+    assert [target for _, target, _ in streamed] == connections.target_quadrant_indices.tolist()
+    assert np.concatenate([genes for _, _, genes in streamed]).tobytes() == connections.connection_genes.tobytes()
+
+
+def test_streamed_objects_match_genome(genome_path):
+    genome = NetworkGenome(genome_path)
+    assert [repr(gene) for gene in iter_subnetwork_genes(genome_path.joinpath("subnetworks.chr"))] == \
+        [repr(gene) for gene in genome.subnetwork_genes]
+    assert [repr(block) for block in iter_quadrant_connections(genome_path.joinpath("connections.chr"))] == \
+        [repr(block) for block in genome.quadrant_connections]
+
+
+@pytest.mark.parametrize("corruption, iterate, chromosome, retcodes", [
+    ("bad_gene", iter_subnetwork_genes, "subnetworks.chr", SubnetworkChromosomeParseResult.Retcodes),
+    ("quadrant_short", iter_quadrant_connections, "connections.chr", ConnectionsChromosomeParseResult.Retcodes),
+])
+def test_stream_fails_like_from_file(genome_path, corruption, iterate, chromosome, retcodes):
+    path = genome_path.joinpath(chromosome)
+    synthetic.corrupt_chromosome(path, corruption, 4)
+    result_class = SubnetworkChromosomeParseResult if retcodes is SubnetworkChromosomeParseResult.Retcodes \
+        else ConnectionsChromosomeParseResult
+    expected = result_class.from_file(path)
+
+    with pytest.raises(NetworkGenome.ChromosomeParseException) as error:
+        for _ in iterate(path):
+            pass
+    assert error.value.return_code == expected.return_code
+    assert error.value.additional_info == expected.additional_info
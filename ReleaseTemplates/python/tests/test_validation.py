@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from neurannparser import NetworkGenome, ColumnarGenome, SubnetworkChromosomeParseResult, validate_population, synthetic
+from neurannparser.validation import validate_genome
+
+
+SHAPES = (
+    dict(gene_count=50, codons_per_gene=20, quadrant_count=6, subnetworks_per_quadrant=4,
+         quadrant_pairs=10, connections_per_pair=15),
+    dict(gene_count=1, codons_per_gene=1, quadrant_count=1, subnetworks_per_quadrant=1,
+         quadrant_pairs=1, connections_per_pair=1),
+    dict(gene_count=200, codons_per_gene=3, quadrant_count=16, subnetworks_per_quadrant=8,
+         quadrant_pairs=64, connections_per_pair=40),
+)
+
+
+#every genome the generator writes is valid, with or without layer sizes
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("shape", SHAPES)
+def test_synthetic_genomes_validate_clean(tmp_path, shape, seed):
+    path = synthetic.generate_genome(tmp_path.joinpath("genome"), seed=seed, **shape)
+    genome = NetworkGenome(path)
+
+    report = genome.validate()
+    assert report.ok, str(report)
+    report = validate_genome(genome, synthetic.INPUT_COUNT, synthetic.HIDDEN_COUNT, synthetic.OUTPUT_COUNT)
+    assert report.ok, str(report)
+    genome.compile()
+
+
+def test_ports_checked_against_layer_sizes(genome_path):
+    columns = ColumnarGenome.from_directory(genome_path)
+    target_input_index = columns.target_input_index.copy()
+    target_input_index[0] = synthetic.INPUT_COUNT
+    columns.target_input_index = target_input_index
+
+    assert validate_genome(columns).ok
+    report = validate_genome(columns, synthetic.INPUT_COUNT, synthetic.HIDDEN_COUNT, synthetic.OUTPUT_COUNT)
+    assert report.counts() == {"target_input_out_of_range": 1}
+    violation, = report
+    assert (violation.position, violation.item, violation.value) == (0, 0, synthetic.INPUT_COUNT)
+
+
+def test_missing_gene_and_duplicates_reported(genome_path):
+    columns = ColumnarGenome.from_directory(genome_path)
+    gene_indices = columns.gene_indices.copy()
+    gene_indices[1] = gene_indices[0]
+    columns.gene_indices = gene_indices
+    quadrant_definitions = columns.quadrant_definitions.copy()
+    quadrant_definitions[0, 0] = 10 ** 6
+    columns.quadrant_definitions = quadrant_definitions
+
+    counts = validate_genome(columns).counts()
+    assert counts["duplicate_gene_index"] == 1
+    assert counts["missing_subnetwork_gene"] >= 1
+    assert np.all(validate_genome(columns).of_check("missing_subnetwork_gene")["Value"] >= 0)
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+#one entry per path in input order, with the corrupt genome as its exception
+def test_validate_population(population_paths, executor):
+    results = validate_population(
+        population_paths, workers=2, executor=executor,
+        input_count=synthetic.INPUT_COUNT, hidden_count=synthetic.HIDDEN_COUNT, output_count=synthetic.OUTPUT_COUNT)
+    assert len(results) == len(population_paths)
+
+    for path, result in zip(population_paths, results):
+        if path == population_paths[3]:
+            assert isinstance(result, NetworkGenome.ChromosomeParseException)
+            assert result.return_code == SubnetworkChromosomeParseResult.Retcodes.BAD_GENE
+        else:
+            assert result.ok
+            assert result.path == path